@@ -0,0 +1,290 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Literal, Sequence
+
+import dns.asyncresolver
+
+from podns.dns import fetch_pronouns_from_domain_async
+from podns.testing import (
+    StubDNSServer,
+    StubDoHServer,
+    synthetic_zones,
+)
+from podns.transport import PipelinedTCPResolver, TransportResolver
+
+
+__all__: tuple[str, ...] = (
+    "Transport",
+    "LoadResult",
+    "run_load",
+    "main",
+)
+
+
+type Transport = Literal["udp", "tcp", "doh"]
+
+
+@dataclass(slots=True, frozen=True)
+class LoadResult:
+    # latencies are in seconds, and `peak_memory` is the peak bytes allocated
+    # while the level ran (only measured with `trace_memory`).
+    concurrency: int
+    queries: int
+    errors: int
+    elapsed: float
+    qps: float
+    p50: float
+    p99: float
+    peak_memory: int | None
+
+
+def _percentile(ordered: Sequence[float], percentile: float) -> float:
+    if not ordered:
+        return 0.0
+    index: int = min(len(ordered) - 1, int(len(ordered) * percentile / 100))
+    return ordered[index]
+
+
+async def run_load(
+    server: StubDNSServer | StubDoHServer,
+    domains: Sequence[str],
+    *,
+    concurrency: int,
+    queries: int,
+    transport: Transport = "udp",
+    deadline: float | None = None,
+    trace_memory: bool = False,
+) -> LoadResult:
+    resolver: dns.asyncresolver.Resolver
+    if isinstance(server, StubDoHServer):
+        resolver = server.resolver()
+    elif transport == "tcp":
+        resolver = PipelinedTCPResolver([server.nameserver])
+    else:
+        resolver = server.async_resolver()
+    slots = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors: int = 0
+
+    async def lookup(domain: str) -> None:
+        nonlocal errors
+        async with slots:
+            started: float = time.perf_counter()
+            try:
+                await fetch_pronouns_from_domain_async(
+                    domain, resolver=resolver, deadline=deadline
+                )
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+    started: float = time.perf_counter()
+    try:
+        async with asyncio.TaskGroup() as tg:
+            for i in range(queries):
+                tg.create_task(lookup(domains[i % len(domains)]))
+        elapsed: float = time.perf_counter() - started
+        peak_memory: int | None = None
+        if trace_memory:
+            peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        if isinstance(resolver, TransportResolver):
+            await resolver.aclose()
+
+    latencies.sort()
+    return LoadResult(
+        concurrency=concurrency,
+        queries=queries,
+        errors=errors,
+        elapsed=elapsed,
+        qps=queries / elapsed if elapsed > 0 else 0.0,
+        p50=statistics.median(latencies) if latencies else 0.0,
+        p99=_percentile(latencies, 99),
+        peak_memory=peak_memory,
+    )
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.bench_fetch",
+        description=(
+            "Load-test fetch_pronouns_from_domain_async against a stub DNS server "
+            "on localhost, at each concurrency level."
+        ),
+    )
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        default="1,8,32,128",
+        help="comma separated concurrency levels (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-n",
+        "--queries",
+        type=int,
+        default=2_000,
+        help="lookups per concurrency level (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--domains",
+        type=int,
+        default=1_000,
+        help="synthetic zones served (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--transport",
+        choices=("udp", "tcp", "doh"),
+        default="udp",
+        help=(
+            "how queries are sent: UDP (falling back to TCP), pipelined TCP, or "
+            "DNS-over-HTTPS over HTTP/2 (default: %(default)s)"
+        ),
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="seconds added to every response (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--loss",
+        type=float,
+        default=0.0,
+        help="share of queries dropped (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--truncation",
+        type=float,
+        default=0.0,
+        help="share of UDP responses truncated (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--nxdomain",
+        type=float,
+        default=0.0,
+        help="share of queries answered with NXDOMAIN (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-t",
+        "--deadline",
+        type=float,
+        default=2.0,
+        help="per-lookup deadline in seconds (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="measure peak allocations per level with tracemalloc (slows lookups down)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="seed for zones and injected faults (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--save",
+        metavar="PATH",
+        help="write the results as JSON",
+    )
+    return parser
+
+
+def _report(result: LoadResult) -> str:
+    line: str = (
+        f"concurrency={result.concurrency:<5} qps={result.qps:>9.1f} "
+        f"p50={result.p50 * 1e3:>8.2f}ms p99={result.p99 * 1e3:>8.2f}ms "
+        f"errors={result.errors}"
+    )
+    if result.peak_memory is not None:
+        line += f" peak={result.peak_memory / 1024:.0f}KiB"
+    return line
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = _build_parser().parse_args(argv)
+    levels: list[int] = [int(level) for level in args.concurrency.split(",")]
+    zones = synthetic_zones(args.domains, seed=args.seed)
+    domains: list[str] = list(zones)
+
+    options: dict[str, float] = {
+        "latency": args.latency,
+        "drop_rate": args.loss,
+        "truncation_rate": args.truncation,
+        "nxdomain_rate": args.nxdomain,
+        "seed": args.seed,
+    }
+    results: list[LoadResult] = []
+    with (
+        StubDoHServer(zones, **options)
+        if args.transport == "doh"
+        else StubDNSServer(zones, **options)
+    ) as server:
+        for level in levels:
+            result = asyncio.run(
+                run_load(
+                    server,
+                    domains,
+                    concurrency=level,
+                    queries=args.queries,
+                    transport=args.transport,
+                    deadline=args.deadline,
+                    trace_memory=args.trace_memory,
+                )
+            )
+            results.append(result)
+            print(_report(result))
+
+    # ru_maxrss is in KiB on linux, and includes the stub server's thread.
+    max_rss: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"max rss={max_rss}KiB")
+    if args.save:
+        document = {
+            "python": sys.version.split()[0],
+            "max_rss_kib": max_rss,
+            "results": [asdict(result) for result in results],
+        }
+        Path(args.save).write_text(json.dumps(document, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
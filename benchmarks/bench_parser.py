@@ -0,0 +1,219 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import argparse
+import sys
+from typing import (
+    Any,
+    Callable,
+    Sequence,
+)
+
+from benchmarks.harness import (
+    BenchmarkResult,
+    compare,
+    load_baseline,
+    report,
+    run_benchmark,
+    save_baseline,
+)
+from podns.parser import (
+    _deduplicate_records,
+    _normalise_record,
+    _parse_pronouns,
+    _parse_record,
+    _parse_tags,
+    parse_pronoun_records,
+)
+from podns.pronouns import PronounRecord
+
+
+__all__: tuple[str, ...] = (
+    "CORPORA",
+    "benchmarks",
+    "main",
+)
+
+
+# record sets as they are found in the wild.
+_REALISTIC: dict[str, list[str]] = {
+    "single": ["she/her"],
+    "typical": ["she/her;preferred", "they/them"],
+    "full_sets": [
+        "he/him/his/his/himself;preferred",
+        "they/them/their/theirs/themself;plural",
+        "it/its",
+    ],
+    "untidy": [
+        "  She / Her ;Preferred  # set by hand",
+        "THEY/THEM;;plural",
+        "xe/xem/xyr/xyrs/xemself # neopronouns",
+    ],
+    "magic": ["*"],
+}
+
+# inputs that stress the parser: very long records, many records, long runs of
+# `;` and long comments.
+_ADVERSARIAL: dict[str, list[str]] = {
+    "long_record": [
+        "/".join(f"{'abcdefghij' * 10}{i}" for i in range(5)) + ";preferred;plural" * 50
+    ],
+    "many_records": [
+        f"s{i}/o{i}/d{i}/p{i}/r{i};preferred" if i % 7 == 0 else f"s{i}/o{i}"
+        for i in range(200)
+    ],
+    "semicolon_runs": ["she/her" + ";" * 2_000 + "preferred" + ";" * 2_000],
+    "comments": [
+        f"they/them # {'comment text ' * 200}",
+        "# " + "#" * 2_000,
+        "she/her#" + "x" * 2_000,
+    ],
+}
+
+CORPORA: dict[str, list[str]] = {
+    **{f"realistic.{name}": records for name, records in _REALISTIC.items()},
+    **{f"adversarial.{name}": records for name, records in _ADVERSARIAL.items()},
+}
+
+
+def _subset_chains(count: int) -> set[PronounRecord]:
+    # every full set is accompanied by its shorter forms, the worst case for
+    # deduplication's pairwise comparison.
+    records: set[PronounRecord] = set()
+    for i in range(count // 3):
+        for record in (f"s{i}/o{i}", f"s{i}/o{i}/d{i}", f"s{i}/o{i}/d{i}/p{i}/r{i}"):
+            records.add(_parse_record(record, pedantic=False))
+    return records
+
+
+def benchmarks() -> dict[str, Callable[[], Any]]:
+    cases: dict[str, Callable[[], Any]] = {}
+    for corpus, records in CORPORA.items():
+        normalised: list[str] = [
+            record for record in map(_normalise_record, records) if record
+        ]
+        # magic and comment-only records never reach pronoun or tag parsing.
+        parseable: list[str] = [record for record in normalised if record != "*"]
+
+        def normalise(records: list[str] = records) -> None:
+            for record in records:
+                _normalise_record(record)
+
+        def parse_pronouns(records: list[str] = parseable) -> None:
+            for record in records:
+                _parse_pronouns(record, pedantic=False)
+
+        def parse_tags(records: list[str] = parseable) -> None:
+            for record in records:
+                _parse_tags(record, pedantic=False)
+
+        def end_to_end(records: list[str] = records) -> None:
+            parse_pronoun_records(records)
+
+        cases[f"normalise_record[{corpus}]"] = normalise
+        if parseable:
+            cases[f"parse_pronouns[{corpus}]"] = parse_pronouns
+            cases[f"parse_tags[{corpus}]"] = parse_tags
+        cases[f"parse_pronoun_records[{corpus}]"] = end_to_end
+
+    for count in (30, 150):
+        records: set[PronounRecord] = _subset_chains(count)
+        cases[f"deduplicate_records[subset_chains.{count}]"] = lambda records=records: (
+            _deduplicate_records(records)
+        )
+
+    return cases
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.bench_parser",
+        description="Micro-benchmarks for the pronoun record parser.",
+    )
+    parser.add_argument(
+        "-k",
+        "--filter",
+        default="",
+        help="only run benchmarks whose name contains this text",
+    )
+    parser.add_argument(
+        "--save",
+        metavar="PATH",
+        help="write the results to a JSON baseline",
+    )
+    parser.add_argument(
+        "--compare",
+        metavar="PATH",
+        help="compare the results to a JSON baseline, exiting with status 1 on "
+        "regressions",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="slowdown, as a fraction, counted as a regression (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="timed runs per benchmark (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.2,
+        help="minimum seconds per timed run (default: %(default)s)",
+    )
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = _build_parser().parse_args(argv)
+
+    results: list[BenchmarkResult] = [
+        run_benchmark(name, function, repeat=args.repeat, min_time=args.min_time)
+        for name, function in benchmarks().items()
+        if args.filter in name
+    ]
+
+    baseline = load_baseline(args.compare) if args.compare else None
+    print(report(results, baseline))
+    if args.save:
+        save_baseline(args.save, results)
+    if baseline is None:
+        return 0
+
+    regressions = compare(baseline, results, threshold=args.threshold)
+    for regression in regressions:
+        print(
+            f"regression: {regression.name} is {regression.ratio:.2f}x slower "
+            f"than its baseline",
+            file=sys.stderr,
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import json
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Mapping,
+)
+
+
+__all__: tuple[str, ...] = (
+    "BenchmarkResult",
+    "Regression",
+    "run_benchmark",
+    "save_baseline",
+    "load_baseline",
+    "compare",
+    "report",
+)
+
+
+@dataclass(slots=True, frozen=True)
+class BenchmarkResult:
+    # `best` and `median` are seconds per call, across `repeat` timed runs of
+    # `number` calls each. comparisons use `best`, being the least noisy.
+    name: str
+    best: float
+    median: float
+    number: int
+    repeat: int
+
+
+@dataclass(slots=True, frozen=True)
+class Regression:
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline
+
+
+def run_benchmark(
+    name: str,
+    function: Callable[[], Any],
+    *,
+    repeat: int = 5,
+    min_time: float = 0.2,
+) -> BenchmarkResult:
+    # calibrate the number of calls so that each timed run takes `min_time`.
+    number: int = 1
+    while True:
+        started: float = time.perf_counter()
+        for _ in range(number):
+            function()
+        if time.perf_counter() - started >= min_time:
+            break
+        number *= 2
+
+    timings: list[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - started) / number)
+
+    return BenchmarkResult(
+        name=name,
+        best=min(timings),
+        median=statistics.median(timings),
+        number=number,
+        repeat=repeat,
+    )
+
+
+def save_baseline(path: str | Path, results: Iterable[BenchmarkResult]) -> None:
+    document: dict[str, Any] = {
+        "python": sys.version.split()[0],
+        "results": {result.name: asdict(result) for result in results},
+    }
+    Path(path).write_text(json.dumps(document, indent=2, sort_keys=True) + "\n")
+
+
+def load_baseline(path: str | Path) -> dict[str, BenchmarkResult]:
+    document = json.loads(Path(path).read_text())
+    return {
+        name: BenchmarkResult(**result) for name, result in document["results"].items()
+    }
+
+
+def compare(
+    baseline: Mapping[str, BenchmarkResult],
+    results: Iterable[BenchmarkResult],
+    *,
+    threshold: float = 0.1,
+) -> list[Regression]:
+    # a benchmark regressed when it is more than `threshold` (a fraction) slower
+    # than its baseline. benchmarks missing from the baseline are not compared.
+    regressions: list[Regression] = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous is None:
+            continue
+        if result.best > previous.best * (1 + threshold):
+            regressions.append(
+                Regression(
+                    name=result.name, baseline=previous.best, current=result.best
+                )
+            )
+    return regressions
+
+
+def report(
+    results: Iterable[BenchmarkResult],
+    baseline: Mapping[str, BenchmarkResult] | None = None,
+) -> str:
+    results = list(results)
+    width: int = max((len(result.name) for result in results), default=0)
+    lines: list[str] = []
+    for result in results:
+        line: str = f"{result.name:<{width}} {result.best * 1e6:>12.2f}us"
+        previous = (baseline or {}).get(result.name)
+        if previous is not None:
+            line += f" {(result.best / previous.best - 1) * 100:>+8.1f}%"
+        lines.append(line)
+    return "\n".join(lines)
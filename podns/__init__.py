@@ -22,15 +22,22 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
-from .dns import (
-    fetch_pronouns_from_domain_async,
-    fetch_pronouns_from_domain_sync,
-)
+import importlib
+from typing import TYPE_CHECKING, Any
+
 from .error import PODNSError
 from .parser import parse_pronoun_records
 from .pronouns import PronounsResponse
 
 
+if TYPE_CHECKING:
+    from . import dns
+    from .dns import (
+        fetch_pronouns_from_domain_async,
+        fetch_pronouns_from_domain_sync,
+    )
+
+
 __all__: tuple[str, ...] = (
     "fetch_pronouns_from_domain_sync",
     "fetch_pronouns_from_domain_async",
@@ -38,3 +45,28 @@ __all__: tuple[str, ...] = (
     "parse_pronoun_records",
     "PronounsResponse",
 )
+
+
+# `podns.dns` pulls in dnspython, which costs far more to import than the rest of
+# the package, so it is only loaded once something from it is first accessed.
+_LAZY_ATTRIBUTES: dict[str, tuple[str, str | None]] = {
+    "dns": (".dns", None),
+    "fetch_pronouns_from_domain_sync": (".dns", "fetch_pronouns_from_domain_sync"),
+    "fetch_pronouns_from_domain_async": (".dns", "fetch_pronouns_from_domain_async"),
+}
+
+
+def __getattr__(name: str) -> Any:
+    try:
+        module_name, attribute = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+    module = importlib.import_module(module_name, __name__)
+    value = module if attribute is None else getattr(module, attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_LAZY_ATTRIBUTES})
@@ -0,0 +1,219 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import hashlib
+import math
+import os
+import random
+import struct
+from typing import Final, Literal
+
+from podns.cache import cache_key
+from podns.error import PODNSStoreError
+
+
+__all__: tuple[str, ...] = (
+    "BloomFilter",
+    "AbsentDomains",
+)
+
+
+BLOOM_MAGIC: Final[bytes] = b"PODNSBF\x00"
+BLOOM_VERSION: Final[int] = 1
+
+# magic, version, bit count, hash count, items added.
+_HEADER: Final[struct.Struct] = struct.Struct("<8sIQIQ")
+_HASHES: Final[struct.Struct] = struct.Struct("<QQ")
+
+type AbsentCheck = Literal["lookup", "recheck", "skip"]
+
+
+class BloomFilter:
+    # a set that can answer "definitely not present" or "probably present",
+    # sized for `capacity` items at `error_rate` false positives. items are
+    # hashed with blake2b, so a filter saved to a file means the same thing in
+    # every process.
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        if capacity < 1:
+            raise ValueError(f"capacity must be at least 1: {capacity=}")
+        if not 0 < error_rate < 1:
+            raise ValueError(f"error_rate must be within (0, 1): {error_rate=}")
+
+        bits: int = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self._bit_count: int = max(8, bits)
+        self._hash_count: int = max(1, round(self._bit_count / capacity * math.log(2)))
+        self._bits = bytearray((self._bit_count + 7) // 8)
+        self.count: int = 0
+
+    @property
+    def bit_count(self) -> int:
+        return self._bit_count
+
+    @property
+    def hash_count(self) -> int:
+        return self._hash_count
+
+    def _positions(self, item: str) -> list[int]:
+        h1, h2 = _HASHES.unpack(hashlib.blake2b(item.encode(), digest_size=16).digest())
+        return [(h1 + i * h2) % self._bit_count for i in range(self._hash_count)]
+
+    def add(self, item: str) -> None:
+        added: bool = False
+        for position in self._positions(item):
+            byte, bit = divmod(position, 8)
+            if not self._bits[byte] & (1 << bit):
+                self._bits[byte] |= 1 << bit
+                added = True
+        if added:
+            self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        for position in self._positions(item):
+            byte, bit = divmod(position, 8)
+            if not self._bits[byte] & (1 << bit):
+                return False
+        return True
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def false_positive_rate(self) -> float:
+        # the expected rate for the items added so far.
+        return (
+            1 - math.exp(-self._hash_count * self.count / self._bit_count)
+        ) ** self._hash_count
+
+    def save(self, path: str | os.PathLike[str]) -> None:
+        temporary_path: str = f"{os.fspath(path)}.tmp"
+        with open(temporary_path, "wb") as f:
+            f.write(
+                _HEADER.pack(
+                    BLOOM_MAGIC,
+                    BLOOM_VERSION,
+                    self._bit_count,
+                    self._hash_count,
+                    self.count,
+                )
+            )
+            f.write(self._bits)
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike[str]) -> BloomFilter:
+        with open(path, "rb") as f:
+            data: bytes = f.read()
+        if len(data) < _HEADER.size:
+            raise PODNSStoreError(f"Not a Bloom filter: {path=}")
+
+        magic, version, bit_count, hash_count, count = _HEADER.unpack_from(data)
+        if magic != BLOOM_MAGIC:
+            raise PODNSStoreError(f"Not a Bloom filter: {path=}")
+        if version != BLOOM_VERSION:
+            raise PODNSStoreError(f"Unsupported Bloom filter version: {version=}")
+        bits = bytearray(data[_HEADER.size :])
+        if len(bits) != (bit_count + 7) // 8 or hash_count < 1:
+            raise PODNSStoreError(f"Corrupt Bloom filter: {path=}")
+
+        bloom = cls.__new__(cls)
+        bloom._bit_count = bit_count
+        bloom._hash_count = hash_count
+        bloom._bits = bits
+        bloom.count = count
+        return bloom
+
+
+class AbsentDomains:
+    # domains known to have no `pronouns.` record, fed from NXDOMAIN results,
+    # so that crawls can skip them. a Bloom filter never forgets a domain, so
+    # `recheck_rate` of the domains it matches are looked up anyway: this
+    # catches domains that have since gained a record, and measures the false
+    # positive rate actually seen (which includes them).
+
+    def __init__(
+        self,
+        bloom: BloomFilter | None = None,
+        *,
+        capacity: int = 1_000_000,
+        error_rate: float = 0.01,
+        recheck_rate: float = 0.05,
+        seed: int | None = None,
+    ) -> None:
+        if not 0 <= recheck_rate <= 1:
+            raise ValueError(f"recheck_rate must be within [0, 1]: {recheck_rate=}")
+
+        self.bloom: BloomFilter = (
+            bloom if bloom is not None else BloomFilter(capacity, error_rate)
+        )
+        self.recheck_rate: float = recheck_rate
+
+        self.checked: int = 0
+        self.skipped: int = 0
+        self.rechecked: int = 0
+        self.false_positives: int = 0
+
+        self._random = random.Random(seed)
+
+    @classmethod
+    def load(
+        cls,
+        path: str | os.PathLike[str],
+        *,
+        recheck_rate: float = 0.05,
+        seed: int | None = None,
+    ) -> AbsentDomains:
+        return cls(BloomFilter.load(path), recheck_rate=recheck_rate, seed=seed)
+
+    def save(self, path: str | os.PathLike[str]) -> None:
+        self.bloom.save(path)
+
+    @property
+    def false_positive_rate(self) -> float:
+        # the share of rechecked domains that turned out to have a record.
+        return self.false_positives / self.rechecked if self.rechecked else 0.0
+
+    def __contains__(self, domain: str) -> bool:
+        return cache_key(domain) in self.bloom
+
+    def add(self, domain: str) -> None:
+        self.bloom.add(cache_key(domain))
+
+    def check(self, domain: str) -> AbsentCheck:
+        self.checked += 1
+        if domain not in self:
+            return "lookup"
+        if self._random.random() < self.recheck_rate:
+            self.rechecked += 1
+            return "recheck"
+        self.skipped += 1
+        return "skip"
+
+    def record(self, domain: str, *, absent: bool, rechecked: bool = False) -> None:
+        # feeds a lookup's outcome back: absent domains are added, and a
+        # rechecked domain that was found is counted as a false positive.
+        if absent:
+            self.add(domain)
+        elif rechecked:
+            self.false_positives += 1
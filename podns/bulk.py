@@ -0,0 +1,312 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import time
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Iterable,
+    Literal,
+    Sequence,
+)
+
+import dns.asyncresolver
+import dns.exception
+import dns.resolver
+
+from podns.bloom import AbsentDomains
+from podns.cache import (
+    CacheBackend,
+    CachedLookup,
+    CacheResult,
+    cache_key,
+)
+from podns.dns import fetch_pronouns_from_domain_async
+from podns.limiter import AdaptiveLimiter
+from podns.pronouns import PronounsResponse
+from podns.ratelimit import RateLimiter
+from podns.scheduler import LookupPriority, LookupScheduler
+
+
+__all__: tuple[str, ...] = (
+    "BulkLookupResult",
+    "fetch_pronouns_bulk_async",
+)
+
+
+type BulkLookupStatus = Literal["ok", "nxdomain", "timeout", "error", "skipped"]
+
+_CACHE_BATCH_SIZE: int = 64
+
+
+@dataclass(slots=True, frozen=True)
+class BulkLookupResult:
+    domain: str
+    response: PronounsResponse | None
+    error: Exception | None
+    elapsed: float
+    # set when the domain was skipped as likely to have no record.
+    skipped: bool = False
+
+    @property
+    def status(self) -> BulkLookupStatus:
+        if self.skipped:
+            return "skipped"
+        elif isinstance(self.error, TimeoutError):
+            return "timeout"
+        elif self.error is not None:
+            return "error"
+        elif self.response is None:
+            return "nxdomain"
+        return "ok"
+
+
+async def _iterate(domains: Iterable[str] | AsyncIterable[str]) -> AsyncIterator[str]:
+    if isinstance(domains, AsyncIterable):
+        async for domain in domains:
+            yield domain
+    else:
+        for domain in domains:
+            yield domain
+
+
+async def _lookup(
+    domain: str,
+    *,
+    timeout: float | None,
+    pedantic: bool,
+    resolver: dns.asyncresolver.Resolver | None,
+    rate_limiter: RateLimiter | None,
+    scheduler: LookupScheduler | None,
+    priority: LookupPriority,
+    cache: CacheBackend | None,
+) -> BulkLookupResult:
+    response: PronounsResponse | None = None
+    error: Exception | None = None
+    started: float = time.perf_counter()
+    try:
+        response = await fetch_pronouns_from_domain_async(
+            domain,
+            pedantic=pedantic,
+            resolver=resolver,
+            deadline=timeout,
+            rate_limiter=rate_limiter,
+            scheduler=scheduler,
+            priority=priority,
+            cache=cache,
+        )
+    except Exception as e:
+        error = e
+    return BulkLookupResult(
+        domain=domain,
+        response=response,
+        error=error,
+        elapsed=time.perf_counter() - started,
+    )
+
+
+class _PrefetchedCache:
+    # answers cache lookups from a batch fetched ahead with `get_many`, falling
+    # back to the backend for keys that were not prefetched.
+
+    def __init__(self, backend: CacheBackend) -> None:
+        self._backend = backend
+        self._prefetched: dict[str, CacheResult] = {}
+
+    async def prefetch(self, keys: Sequence[str]) -> None:
+        results = await self._backend.get_many(keys)
+        self._prefetched.update(zip(keys, results))
+
+    def discard(self, key: str) -> None:
+        self._prefetched.pop(key, None)
+
+    async def get(self, key: str) -> CacheResult:
+        if key in self._prefetched:
+            return self._prefetched.pop(key)
+        return await self._backend.get(key)
+
+    async def get_many(self, keys: Sequence[str]) -> list[CacheResult]:
+        return [await self.get(key) for key in keys]
+
+    async def set(
+        self, key: str, value: CachedLookup, *, ttl: float | None = None
+    ) -> None:
+        await self._backend.set(key, value, ttl=ttl)
+
+    def get_sync(self, key: str) -> CacheResult:
+        return self._backend.get_sync(key)
+
+    def get_many_sync(self, keys: Sequence[str]) -> list[CacheResult]:
+        return self._backend.get_many_sync(keys)
+
+    def set_sync(
+        self, key: str, value: CachedLookup, *, ttl: float | None = None
+    ) -> None:
+        self._backend.set_sync(key, value, ttl=ttl)
+
+
+async def _batched(domains: AsyncIterator[str], size: int) -> AsyncIterator[list[str]]:
+    batch: list[str] = []
+    async for domain in domains:
+        batch.append(domain)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _is_overload(error: Exception | None) -> bool:
+    # signs that the resolver is struggling, rather than a problem with the domain.
+    return isinstance(
+        error, (TimeoutError, dns.exception.Timeout, dns.resolver.NoNameservers)
+    )
+
+
+async def fetch_pronouns_bulk_async(
+    domains: Iterable[str] | AsyncIterable[str],
+    *,
+    concurrency: int = 32,
+    timeout: float | None = None,
+    pedantic: bool = False,
+    resolver: dns.asyncresolver.Resolver | None = None,
+    limiter: AdaptiveLimiter | None = None,
+    rate_limiter: RateLimiter | None = None,
+    scheduler: LookupScheduler | None = None,
+    priority: LookupPriority = LookupPriority.BACKGROUND,
+    cache: CacheBackend | None = None,
+    absent_domains: AbsentDomains | None = None,
+) -> AsyncIterator[BulkLookupResult]:
+    # with a `limiter`, it decides how many lookups may be in flight and
+    # `concurrency` is ignored. with a `scheduler`, bulk lookups default to the
+    # background priority, leaving capacity to interactive lookups first. with
+    # `absent_domains`, domains it matches are skipped (bar its rechecks), and
+    # NXDOMAIN results are added to it.
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1: {concurrency=}")
+
+    slots = asyncio.Semaphore(concurrency)
+    # skipped domains take no lookup slot, but are still limited in number
+    # until consumed.
+    skip_slots = asyncio.Semaphore(concurrency)
+
+    async def acquire() -> float:
+        if limiter is not None:
+            return await limiter.acquire()
+        await slots.acquire()
+        return 0.0
+
+    def release(token: float | None, result: BulkLookupResult) -> None:
+        if token is None:
+            skip_slots.release()
+        elif limiter is not None:
+            limiter.release(
+                token, latency=result.elapsed, overloaded=_is_overload(result.error)
+            )
+        else:
+            slots.release()
+
+    # a slot is only handed back once its result has been consumed, so a slow
+    # consumer applies back pressure to the lookups instead of letting finished
+    # results pile up in memory.
+    results: asyncio.Queue[tuple[float | None, BulkLookupResult] | None] = (
+        asyncio.Queue()
+    )
+
+    # with a cache, domains are read in batches whose cached results are fetched
+    # in one round trip, before their lookups start.
+    prefetched = _PrefetchedCache(cache) if cache is not None else None
+
+    async def lookup(domain: str, token: float, rechecked: bool) -> None:
+        try:
+            result = await _lookup(
+                domain,
+                timeout=timeout,
+                pedantic=pedantic,
+                resolver=resolver,
+                rate_limiter=rate_limiter,
+                scheduler=scheduler,
+                priority=priority,
+                cache=prefetched,
+            )
+        finally:
+            # lookups that never read their entry (invalid domains, or ones
+            # joining a query already in flight) must not leave it behind.
+            if prefetched is not None:
+                prefetched.discard(cache_key(domain, pedantic=pedantic))
+        if absent_domains is not None and result.error is None:
+            absent_domains.record(
+                domain, absent=result.response is None, rechecked=rechecked
+            )
+        results.put_nowait((token, result))
+
+    async def start(tg: asyncio.TaskGroup, domain: str) -> None:
+        check = "lookup" if absent_domains is None else absent_domains.check(domain)
+        if check == "skip":
+            if prefetched is not None:
+                prefetched.discard(cache_key(domain, pedantic=pedantic))
+            await skip_slots.acquire()
+            skipped = BulkLookupResult(
+                domain=domain, response=None, error=None, elapsed=0.0, skipped=True
+            )
+            results.put_nowait((None, skipped))
+            return
+        token: float = await acquire()
+        tg.create_task(lookup(domain, token, check == "recheck"))
+
+    async def produce() -> None:
+        try:
+            async with asyncio.TaskGroup() as tg, aclosing(_iterate(domains)) as it:
+                if prefetched is None:
+                    async for domain in it:
+                        await start(tg, domain)
+                    return
+
+                async with aclosing(_batched(it, _CACHE_BATCH_SIZE)) as batches:
+                    async for batch in batches:
+                        await prefetched.prefetch(
+                            [cache_key(domain, pedantic=pedantic) for domain in batch]
+                        )
+                        for domain in batch:
+                            await start(tg, domain)
+        finally:
+            results.put_nowait(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (item := await results.get()) is not None:
+            token, result = item
+            release(token, result)
+            yield result
+        await producer
+    finally:
+        if not producer.done():
+            producer.cancel()
+            try:
+                await producer
+            except asyncio.CancelledError:
+                pass
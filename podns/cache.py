@@ -0,0 +1,361 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import (
+    Final,
+    Literal,
+    Protocol,
+    Sequence,
+)
+
+from podns.domain import canonical_domain
+from podns.error import PODNSInvalidDomain
+from podns.pronouns import PronounsResponse
+
+
+__all__: tuple[str, ...] = (
+    "CACHE_MISS",
+    "CacheMiss",
+    "CacheBackend",
+    "LookupCache",
+    "cache_key",
+)
+
+
+class CacheMiss(Enum):
+    MISS = "miss"
+
+
+# returned by cache lookups that find nothing, as `None` is a cached NXDOMAIN.
+CACHE_MISS: Final[Literal[CacheMiss.MISS]] = CacheMiss.MISS
+
+type CachedLookup = PronounsResponse | None
+type CacheResult = CachedLookup | Literal[CacheMiss.MISS]
+
+_HALVED: Final[bytes] = bytes(i >> 1 for i in range(256))
+
+
+def cache_key(domain: str, *, pedantic: bool = False) -> str:
+    # equivalent spellings of a domain share a key. pedantic and lenient parses
+    # of the same records can differ, so they are cached apart.
+    try:
+        key: str = canonical_domain(domain)
+    except PODNSInvalidDomain:
+        # invalid domains are rejected before they are looked up or cached, so
+        # their key is never used.
+        key = domain
+    return f"{key};pedantic" if pedantic else key
+
+
+class CacheBackend(Protocol):
+    # where lookup results are cached, keyed by `cache_key()`. values are a
+    # `PronounsResponse`, or `None` for NXDOMAIN, and lookups that find nothing
+    # return `CACHE_MISS`. a `ttl` given to `set` may only shorten the
+    # backend's own.
+    async def get(self, key: str) -> CacheResult: ...
+
+    async def get_many(self, keys: Sequence[str]) -> list[CacheResult]: ...
+
+    async def set(
+        self, key: str, value: CachedLookup, *, ttl: float | None = None
+    ) -> None: ...
+
+    def get_sync(self, key: str) -> CacheResult: ...
+
+    def get_many_sync(self, keys: Sequence[str]) -> list[CacheResult]: ...
+
+    def set_sync(
+        self, key: str, value: CachedLookup, *, ttl: float | None = None
+    ) -> None: ...
+
+
+class _FrequencySketch:
+    # a count-min sketch of 4-bit counters estimating how often each key has
+    # been requested. every counter is halved after `sample_size` increments,
+    # so popularity from long ago fades.
+    _DEPTH: int = 4
+    _SEEDS: tuple[int, ...] = (
+        0x9E3779B97F4A7C15,
+        0xC2B2AE3D27D4EB4F,
+        0x165667B19E3779F9,
+        0xD6E8FEB86659FD93,
+    )
+
+    def __init__(self, capacity: int) -> None:
+        width: int = 16
+        while width < capacity:
+            width *= 2
+        self._mask: int = width - 1
+        self._rows: list[bytearray] = [bytearray(width) for _ in range(self._DEPTH)]
+        self._sample_size: int = 10 * width
+        self._additions: int = 0
+
+    def _indexes(self, key: str) -> list[int]:
+        h: int = hash(key)
+        return [((h * seed) >> 32) & self._mask for seed in self._SEEDS]
+
+    def frequency(self, key: str) -> int:
+        return min(row[i] for row, i in zip(self._rows, self._indexes(key)))
+
+    def increment(self, key: str) -> None:
+        for row, i in zip(self._rows, self._indexes(key)):
+            if row[i] < 15:
+                row[i] += 1
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            self._additions //= 2
+            for row in self._rows:
+                row[:] = row.translate(_HALVED)
+
+
+class _Entry:
+    __slots__ = ("value", "expires", "weight")
+
+    def __init__(self, value: CachedLookup, expires: float, weight: int) -> None:
+        self.value = value
+        self.expires = expires
+        self.weight = weight
+
+
+def _estimate_size(key: str, value: CachedLookup) -> int:
+    # a rough count of the bytes held by an entry: fixed object overheads plus
+    # the strings it holds.
+    size: int = 200 + len(key)
+    if value is not None:
+        for record in value.records:
+            size += 250 + sum(len(p) for p in record.pronouns.to_list() if p)
+    return size
+
+
+class _Segment:
+    __slots__ = ("entries", "weight", "capacity")
+
+    def __init__(self, capacity: int) -> None:
+        self.entries: OrderedDict[str, _Entry] = OrderedDict()
+        self.weight: int = 0
+        self.capacity: int = capacity
+
+    def add(self, key: str, entry: _Entry) -> None:
+        self.entries[key] = entry
+        self.weight += entry.weight
+
+    def pop(self, key: str) -> _Entry:
+        entry = self.entries.pop(key)
+        self.weight -= entry.weight
+        return entry
+
+    def pop_oldest(self) -> tuple[str, _Entry]:
+        key, entry = self.entries.popitem(last=False)
+        self.weight -= entry.weight
+        return key, entry
+
+
+class LookupCache:
+    # a bounded, in-process `CacheBackend` using W-TinyLFU:
+    # new entries land in a small LRU window, and leaving it they must be
+    # requested more often than the entry they would evict from the main cache
+    # to be admitted. one-off lookups (such as a bulk crawl) therefore pass
+    # through the window without flushing popular domains.
+    #
+    # the limit is `maxsize` entries, or with `max_bytes`, an estimate of the
+    # memory held. entries live for at most `ttl` seconds (or the DNS TTL, when
+    # shorter), and NXDOMAIN results for `negative_ttl`. the cache is thread
+    # safe.
+
+    def __init__(
+        self,
+        maxsize: int = 10_000,
+        *,
+        max_bytes: int | None = None,
+        ttl: float = 300.0,
+        negative_ttl: float = 60.0,
+    ) -> None:
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be at least 1: {maxsize=}")
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError(f"max_bytes must be at least 1: {max_bytes=}")
+
+        self.maxsize: int = maxsize
+        self.max_bytes: int | None = max_bytes
+        self.ttl: float = ttl
+        self.negative_ttl: float = negative_ttl
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.rejections: int = 0
+
+        capacity: int = maxsize if max_bytes is None else max_bytes
+        window_capacity: int = max(1, capacity // 100)
+        main_capacity: int = max(1, capacity - window_capacity)
+        self._capacity: int = capacity
+        self._window = _Segment(window_capacity)
+        self._probation = _Segment(main_capacity)
+        self._protected = _Segment(main_capacity * 4 // 5)
+        self._sketch = _FrequencySketch(
+            maxsize if max_bytes is None else max(1, max_bytes // 512)
+        )
+        self._lock = threading.Lock()
+
+    @property
+    def hit_ratio(self) -> float:
+        requests: int = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+    @property
+    def weight(self) -> int:
+        return self._window.weight + self._probation.weight + self._protected.weight
+
+    def __len__(self) -> int:
+        return (
+            len(self._window.entries)
+            + len(self._probation.entries)
+            + len(self._protected.entries)
+        )
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            segment = self._find(key)
+            return (
+                segment is not None and segment.entries[key].expires > time.monotonic()
+            )
+
+    def _find(self, key: str) -> _Segment | None:
+        for segment in (self._window, self._protected, self._probation):
+            if key in segment.entries:
+                return segment
+        return None
+
+    def _weigh(self, key: str, value: CachedLookup) -> int:
+        return 1 if self.max_bytes is None else _estimate_size(key, value)
+
+    def get_sync(self, key: str) -> CacheResult:
+        with self._lock:
+            self._sketch.increment(key)
+            segment = self._find(key)
+            if segment is None:
+                self.misses += 1
+                return CACHE_MISS
+
+            entry = segment.entries[key]
+            if entry.expires <= time.monotonic():
+                segment.pop(key)
+                self.misses += 1
+                return CACHE_MISS
+
+            self.hits += 1
+            if segment is self._probation:
+                # a second hit in the main cache protects the entry.
+                self._protected.add(key, self._probation.pop(key))
+                while self._protected.weight > self._protected.capacity:
+                    self._probation.add(*self._protected.pop_oldest())
+            else:
+                segment.entries.move_to_end(key)
+            return entry.value
+
+    def get_many_sync(self, keys: Sequence[str]) -> list[CacheResult]:
+        return [self.get_sync(key) for key in keys]
+
+    def set_sync(
+        self, key: str, value: CachedLookup, *, ttl: float | None = None
+    ) -> None:
+        if ttl is None:
+            ttl = self.ttl if value is not None else self.negative_ttl
+        else:
+            ttl = min(ttl, self.ttl if value is not None else self.negative_ttl)
+        weight: int = self._weigh(key, value)
+        if ttl <= 0 or weight > self._capacity:
+            return
+
+        entry = _Entry(value, time.monotonic() + ttl, weight)
+        with self._lock:
+            segment = self._find(key)
+            if segment is not None:
+                segment.pop(key)
+                segment.add(key, entry)
+                self._evict(segment)
+                return
+
+            self._window.add(key, entry)
+            while self._window.weight > self._window.capacity:
+                self._admit(*self._window.pop_oldest())
+
+    def _main_weight(self) -> int:
+        return self._probation.weight + self._protected.weight
+
+    def _evict(self, segment: _Segment) -> None:
+        if segment is self._window:
+            while self._window.weight > self._window.capacity:
+                self._admit(*self._window.pop_oldest())
+            return
+        while self._main_weight() > self._probation.capacity:
+            victims = self._probation if self._probation.entries else self._protected
+            victims.pop_oldest()
+            self.evictions += 1
+
+    def _admit(self, key: str, candidate: _Entry) -> None:
+        # the candidate leaving the window only displaces main cache entries
+        # that have been requested less often than it.
+        if candidate.weight > self._probation.capacity:
+            self.rejections += 1
+            return
+        now: float = time.monotonic()
+        frequency: int = self._sketch.frequency(key)
+        while self._main_weight() + candidate.weight > self._probation.capacity:
+            victims = self._probation if self._probation.entries else self._protected
+            victim_key, victim = next(iter(victims.entries.items()))
+            if victim.expires > now and self._sketch.frequency(victim_key) >= frequency:
+                self.rejections += 1
+                return
+            victims.pop(victim_key)
+            self.evictions += 1
+        self._probation.add(key, candidate)
+
+    # the cache never blocks, so the async interface simply wraps the sync one.
+    async def get(self, key: str) -> CacheResult:
+        return self.get_sync(key)
+
+    async def get_many(self, keys: Sequence[str]) -> list[CacheResult]:
+        return self.get_many_sync(keys)
+
+    async def set(
+        self, key: str, value: CachedLookup, *, ttl: float | None = None
+    ) -> None:
+        self.set_sync(key, value, ttl=ttl)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            segment = self._find(key)
+            if segment is not None:
+                segment.pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            for segment in (self._window, self._probation, self._protected):
+                segment.entries.clear()
+                segment.weight = 0
@@ -0,0 +1,259 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+from typing import (
+    Final,
+    Iterator,
+    Sequence,
+    TextIO,
+)
+
+import dns.asyncresolver
+import dns.nameserver
+
+from podns.bloom import AbsentDomains
+from podns.bulk import BulkLookupResult, fetch_pronouns_bulk_async
+from podns.limiter import AdaptiveLimiter
+from podns.ratelimit import NameserverRateLimiter
+from podns.zone import lint_zones
+
+
+__all__: tuple[str, ...] = ("main",)
+
+
+_COMMENT: Final[re.Pattern[str]] = re.compile(r"(?:^|\s)#")
+
+
+def _parse_nameserver(value: str) -> dns.nameserver.Do53Nameserver:
+    # accepts `host`, `host:port`, `[v6-host]` and `[v6-host]:port`.
+    host, port = value, 53
+    if value.startswith("["):
+        host, _, remainder = value[1:].partition("]")
+        if remainder:
+            port = int(remainder.removeprefix(":"))
+    elif value.count(":") == 1:
+        host, port_part = value.split(":")
+        port = int(port_part)
+    return dns.nameserver.Do53Nameserver(host, port)
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="podns",
+        description=(
+            "Look up Pronouns over DNS records for many domains, writing one JSON "
+            "line per domain as lookups complete."
+        ),
+    )
+    parser.add_argument(
+        "file",
+        nargs="?",
+        default="-",
+        help="file of domains (or, with --zones, paths), one per line (default: stdin)",
+    )
+    parser.add_argument(
+        "--zones",
+        action="store_true",
+        help=(
+            "read paths of zone files or AXFR dumps instead of domains, and lint "
+            "their pronouns. TXT records without querying DNS"
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="processes linting zone files with --zones (default: one per CPU)",
+    )
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        type=int,
+        default=32,
+        help="maximum lookups in flight at once (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help=(
+            "adapt the number of lookups in flight to the resolver's health, "
+            "using --concurrency as the ceiling"
+        ),
+    )
+    parser.add_argument(
+        "-t",
+        "--timeout",
+        type=float,
+        default=5.0,
+        help="seconds allowed per lookup (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-n",
+        "--nameserver",
+        action="append",
+        type=_parse_nameserver,
+        help="nameserver to query as HOST[:PORT], may be repeated (default: system)",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        help="maximum queries per second sent to each nameserver (default: unlimited)",
+    )
+    parser.add_argument(
+        "--absent-filter",
+        metavar="PATH",
+        help=(
+            "Bloom filter of domains known to have no record, skipped unless "
+            "rechecked; created if missing and updated with this run's NXDOMAIN "
+            "results"
+        ),
+    )
+    parser.add_argument(
+        "--recheck-rate",
+        type=float,
+        default=0.05,
+        help=(
+            "share of --absent-filter matches looked up anyway (default: %(default)s)"
+        ),
+    )
+    parser.add_argument(
+        "--pedantic",
+        action="store_true",
+        help="raise on every specification violation",
+    )
+    return parser
+
+
+def _read_domains(stream: TextIO) -> Iterator[str]:
+    # `#` starts a comment at the start of a line or after whitespace, so it can
+    # still appear inside a path.
+    for line in stream:
+        domain: str = _COMMENT.split(line, maxsplit=1)[0].strip()
+        if domain:
+            yield domain
+
+
+def _format_result(result: BulkLookupResult) -> str:
+    return json.dumps(
+        {
+            "domain": result.domain,
+            "status": result.status,
+            "elapsed": round(result.elapsed, 6),
+            "result": None if result.response is None else result.response.to_dict(),
+            "error": (
+                None
+                if result.error is None
+                else f"{type(result.error).__name__}: {result.error}"
+            ),
+        }
+    )
+
+
+async def _run(arguments: argparse.Namespace, stream: TextIO) -> None:
+    resolver: dns.asyncresolver.Resolver | None = None
+    if arguments.nameserver:
+        resolver = dns.asyncresolver.Resolver(configure=False)
+        resolver.nameservers = arguments.nameserver
+
+    limiter: AdaptiveLimiter | None = None
+    if arguments.adaptive:
+        limiter = AdaptiveLimiter(
+            initial=min(16, arguments.concurrency), maximum=arguments.concurrency
+        )
+
+    rate_limiter: NameserverRateLimiter | None = None
+    if arguments.rate is not None:
+        rate_limiter = NameserverRateLimiter(default_rate=arguments.rate)
+
+    absent_domains: AbsentDomains | None = None
+    if arguments.absent_filter is not None:
+        if os.path.exists(arguments.absent_filter):
+            absent_domains = AbsentDomains.load(
+                arguments.absent_filter, recheck_rate=arguments.recheck_rate
+            )
+        else:
+            absent_domains = AbsentDomains(recheck_rate=arguments.recheck_rate)
+
+    async for result in fetch_pronouns_bulk_async(
+        _read_domains(stream),
+        concurrency=arguments.concurrency,
+        timeout=arguments.timeout,
+        pedantic=arguments.pedantic,
+        resolver=resolver,
+        limiter=limiter,
+        rate_limiter=rate_limiter,
+        absent_domains=absent_domains,
+    ):
+        sys.stdout.write(_format_result(result) + "\n")
+        sys.stdout.flush()
+
+    if absent_domains is not None:
+        absent_domains.save(arguments.absent_filter)
+
+
+def _lint(arguments: argparse.Namespace, stream: TextIO) -> int:
+    failed: bool = False
+    for report in lint_zones(_read_domains(stream), workers=arguments.workers):
+        failed |= not report.ok
+        for result in report.results:
+            sys.stdout.write(json.dumps(result.to_dict()) + "\n")
+        for line_error in report.line_errors:
+            sys.stdout.write(json.dumps(line_error.to_dict()) + "\n")
+        if report.error is not None:
+            sys.stdout.write(
+                json.dumps({"source": report.source, "error": str(report.error)}) + "\n"
+            )
+        sys.stdout.flush()
+    return 1 if failed else 0
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = _build_parser()
+    arguments = parser.parse_args(argv)
+    if arguments.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if arguments.rate is not None and arguments.rate <= 0:
+        parser.error("--rate must be positive")
+    if not 0 <= arguments.recheck_rate <= 1:
+        parser.error("--recheck-rate must be within [0, 1]")
+    if arguments.workers is not None and arguments.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    if arguments.zones:
+        if arguments.file == "-":
+            return _lint(arguments, sys.stdin)
+        with open(arguments.file) as stream:
+            return _lint(arguments, stream)
+
+    if arguments.file == "-":
+        asyncio.run(_run(arguments, sys.stdin))
+    else:
+        with open(arguments.file) as stream:
+            asyncio.run(_run(arguments, stream))
+    return 0
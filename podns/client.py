@@ -0,0 +1,217 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Coroutine,
+    Iterable,
+    Iterator,
+    Self,
+)
+
+import dns.asyncresolver
+
+from podns.bloom import AbsentDomains
+from podns.bulk import BulkLookupResult, fetch_pronouns_bulk_async
+from podns.cache import CacheBackend
+from podns.dns import fetch_pronouns_from_domain_async
+from podns.hedging import HedgingPolicy
+from podns.limiter import AdaptiveLimiter
+from podns.pronouns import PronounsResponse
+from podns.ratelimit import RateLimiter
+from podns.scheduler import LookupPriority, LookupScheduler
+from podns.transport import TransportResolver
+
+
+__all__: tuple[str, ...] = ("PronounsClient",)
+
+
+# `run_coroutine_threadsafe` only takes coroutines.
+async def _next(results: AsyncIterator[BulkLookupResult]) -> BulkLookupResult | None:
+    return await anext(results, None)
+
+
+async def _aclose(results: AsyncGenerator[BulkLookupResult]) -> None:
+    await results.aclose()
+
+
+class PronounsClient:
+    # a blocking API over the async fetch path, for threaded code. lookups from
+    # every thread run on one event loop in a background thread, so they share
+    # its in-flight queries, the cache and the resolver's pooled connections,
+    # rather than each thread blocking on a query of its own. the client's
+    # options apply to every lookup it makes.
+    #
+    # `close()` (or leaving the `with` block) cancels lookups still running,
+    # closes the resolver's connections when it is a `TransportResolver`, and
+    # stops the thread.
+
+    def __init__(
+        self,
+        *,
+        pedantic: bool = False,
+        resolver: dns.asyncresolver.Resolver | None = None,
+        deadline: float | None = None,
+        hedging: HedgingPolicy | None = None,
+        rate_limiter: RateLimiter | None = None,
+        scheduler: LookupScheduler | None = None,
+        cache: CacheBackend | None = None,
+    ) -> None:
+        self.pedantic: bool = pedantic
+        self.resolver: dns.asyncresolver.Resolver | None = resolver
+        self.deadline: float | None = deadline
+        self.hedging: HedgingPolicy | None = hedging
+        self.rate_limiter: RateLimiter | None = rate_limiter
+        self.scheduler: LookupScheduler | None = scheduler
+        self.cache: CacheBackend | None = cache
+
+        self._closed: bool = False
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="podns-client", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _submit[T](
+        self, coroutine: Coroutine[Any, Any, T]
+    ) -> concurrent.futures.Future[T]:
+        with self._lock:
+            if self._closed:
+                coroutine.close()
+                raise RuntimeError("PronounsClient is closed.")
+            return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def _wait[T](self, coroutine: Coroutine[Any, Any, T]) -> T:
+        if threading.get_ident() == self._thread.ident:
+            coroutine.close()
+            raise RuntimeError("Cannot block on lookups from the client's own thread.")
+        future = self._submit(coroutine)
+        try:
+            return future.result()
+        except BaseException:
+            # such as a KeyboardInterrupt while waiting.
+            future.cancel()
+            raise
+
+    def submit(
+        self, domain: str, *, priority: LookupPriority = LookupPriority.INTERACTIVE
+    ) -> concurrent.futures.Future[PronounsResponse | None]:
+        # starts a lookup without waiting for it.
+        return self._submit(
+            fetch_pronouns_from_domain_async(
+                domain,
+                pedantic=self.pedantic,
+                resolver=self.resolver,
+                deadline=self.deadline,
+                hedging=self.hedging,
+                rate_limiter=self.rate_limiter,
+                scheduler=self.scheduler,
+                priority=priority,
+                cache=self.cache,
+            )
+        )
+
+    def fetch(
+        self, domain: str, *, priority: LookupPriority = LookupPriority.INTERACTIVE
+    ) -> PronounsResponse | None:
+        return self._wait(
+            fetch_pronouns_from_domain_async(
+                domain,
+                pedantic=self.pedantic,
+                resolver=self.resolver,
+                deadline=self.deadline,
+                hedging=self.hedging,
+                rate_limiter=self.rate_limiter,
+                scheduler=self.scheduler,
+                priority=priority,
+                cache=self.cache,
+            )
+        )
+
+    def fetch_bulk(
+        self,
+        domains: Iterable[str],
+        *,
+        concurrency: int = 32,
+        limiter: AdaptiveLimiter | None = None,
+        priority: LookupPriority = LookupPriority.BACKGROUND,
+        absent_domains: AbsentDomains | None = None,
+    ) -> Iterator[BulkLookupResult]:
+        # `fetch_pronouns_bulk_async`, with the client's deadline as each
+        # lookup's timeout. `domains` is read from the client's thread, so it
+        # should not block.
+        results = fetch_pronouns_bulk_async(
+            domains,
+            concurrency=concurrency,
+            timeout=self.deadline,
+            pedantic=self.pedantic,
+            resolver=self.resolver,
+            limiter=limiter,
+            rate_limiter=self.rate_limiter,
+            scheduler=self.scheduler,
+            priority=priority,
+            cache=self.cache,
+            absent_domains=absent_domains,
+        )
+        try:
+            while (result := self._wait(_next(results))) is not None:
+                yield result
+        finally:
+            if not self._closed:
+                self._wait(_aclose(results))
+
+    async def _shutdown(self) -> None:
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if isinstance(self.resolver, TransportResolver):
+            await self.resolver.aclose()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
@@ -0,0 +1,145 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from typing import Final
+
+from podns.error import PODNSCodecError
+from podns.pronouns import (
+    PronounRecord,
+    Pronouns,
+    PronounsResponse,
+    PronounTag,
+)
+
+
+__all__: tuple[str, ...] = (
+    "encode_response",
+    "decode_response",
+)
+
+
+# a compact binary form of `PronounsResponse`, for caches shared between
+# processes. a version byte and a flags byte are followed by a varint count of
+# records. each record is a byte of tag bits (over `tuple(PronounTag)`), a byte
+# counting its pronoun values, then each value as a varint of its UTF-8 length
+# plus one (zero for a missing value) and its bytes. records are written in a
+# stable order, so equal responses encode to equal bytes.
+_VERSION: Final[int] = 1
+_USES_ANY_PRONOUNS: Final[int] = 1 << 0
+_USES_NAME_ONLY: Final[int] = 1 << 1
+_TAGS: Final[tuple[PronounTag, ...]] = tuple(PronounTag)
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, position: int) -> tuple[int, int]:
+    value: int = 0
+    shift: int = 0
+    while True:
+        if position >= len(data):
+            raise PODNSCodecError("Truncated varint in encoded response")
+        byte: int = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def encode_response(response: PronounsResponse) -> bytes:
+    out = bytearray((_VERSION,))
+    out.append(
+        (_USES_ANY_PRONOUNS if response.uses_any_pronouns else 0)
+        | (_USES_NAME_ONLY if response.uses_name_only else 0)
+    )
+    _write_varint(out, len(response.records))
+    for record in sorted(response.records, key=str):
+        tag_bits: int = 0
+        for tag in record.tags:
+            tag_bits |= 1 << _TAGS.index(tag)
+        out.append(tag_bits)
+
+        values: list[str | None] = record.pronouns.to_list()
+        while values and values[-1] is None:
+            values.pop()
+        out.append(len(values))
+        for value in values:
+            if value is None:
+                out.append(0)
+                continue
+            encoded: bytes = value.encode()
+            _write_varint(out, len(encoded) + 1)
+            out += encoded
+    return bytes(out)
+
+
+def decode_response(data: bytes) -> PronounsResponse:
+    if len(data) < 2 or data[0] != _VERSION:
+        raise PODNSCodecError(f"Unsupported encoded response: {data[:2]=}")
+    flags: int = data[1]
+    count, position = _read_varint(data, 2)
+
+    records: set[PronounRecord] = set()
+    try:
+        for _ in range(count):
+            tag_bits: int = data[position]
+            length: int = data[position + 1]
+            position += 2
+            if length > 5:
+                raise PODNSCodecError(f"Too many pronoun values: {length=}")
+
+            values: list[str | None] = [None] * 5
+            for i in range(length):
+                size, position = _read_varint(data, position)
+                if size == 0:
+                    continue
+                end: int = position + size - 1
+                if end > len(data):
+                    raise PODNSCodecError("Truncated pronoun value in encoded response")
+                values[i] = data[position:end].decode()
+                position = end
+
+            records.add(
+                PronounRecord(
+                    pronouns=Pronouns(*values),  # type: ignore[arg-type]
+                    tags=frozenset(
+                        tag for i, tag in enumerate(_TAGS) if tag_bits & (1 << i)
+                    ),
+                )
+            )
+    except (IndexError, UnicodeDecodeError) as e:
+        raise PODNSCodecError(f"Malformed encoded response: {e}") from e
+
+    if position != len(data):
+        raise PODNSCodecError("Trailing bytes after encoded response")
+    return PronounsResponse(
+        uses_any_pronouns=bool(flags & _USES_ANY_PRONOUNS),
+        uses_name_only=bool(flags & _USES_NAME_ONLY),
+        records=frozenset(records),
+    )
@@ -22,11 +22,40 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import asyncio
+import functools
+import time
+import weakref
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass
+
 import dns.asyncresolver
 import dns.resolver
 
+from podns.cache import (
+    CACHE_MISS,
+    CacheBackend,
+    CacheResult,
+    cache_key,
+)
+from podns.domain import canonical_domain
+from podns.error import PODNSLookupTimeout, PODNSParserError
+from podns.hedging import HedgingPolicy
+from podns.metrics import (
+    CACHE_HITS_TOTAL,
+    CACHE_MISSES_TOTAL,
+    LOOKUP_SECONDS,
+    LOOKUPS_TOTAL,
+    RESOLVE_SECONDS,
+    MetricsCollector,
+    get_metrics_collector,
+)
 from podns.parser import parse_pronoun_records
 from podns.pronouns import PronounsResponse
+from podns.ratelimit import RateLimiter, resolver_key
+from podns.scheduler import LookupPriority, LookupScheduler
+from podns.tracing import span
+from podns.wire import txt_records
 
 
 __all__: tuple[str, ...] = (
@@ -35,21 +64,353 @@ __all__: tuple[str, ...] = (
 )
 
 
-def fetch_pronouns_from_domain_sync(
-    domain: str, *, pedantic: bool = False
+# a lookup's response, and the TTL of the answer it came from. NXDOMAIN and
+# answers without one have no TTL, and cache hits have a TTL of 0, since how
+# long their entry has left is not known.
+type _Fetched = tuple[PronounsResponse | None, float | None]
+
+
+@dataclass(slots=True)
+class _Flight:
+    task: asyncio.Task[_Fetched]
+    waiters: int = 0
+
+
+# lookups in flight on each event loop, so concurrent lookups of the same domain
+# with the same options share one query.
+_flights: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[tuple[object, ...], _Flight]
+] = weakref.WeakKeyDictionary()
+
+
+def _deadline_exceeded(qname: str, deadline: float | None) -> PODNSLookupTimeout:
+    return PODNSLookupTimeout(f"Lookup exceeded its deadline: {qname=} {deadline=}")
+
+
+def _record_lookup(
+    collector: MetricsCollector | None, started: float, result: str
+) -> None:
+    if collector is None:
+        return
+    labels: dict[str, str] = {"result": result}
+    collector.increment(LOOKUPS_TOTAL, labels=labels)
+    collector.observe(LOOKUP_SECONDS, time.perf_counter() - started, labels=labels)
+
+
+def _record_cache(collector: MetricsCollector | None, cached: CacheResult) -> None:
+    if collector is not None:
+        collector.increment(
+            CACHE_MISSES_TOTAL if cached is CACHE_MISS else CACHE_HITS_TOTAL
+        )
+
+
+def _answer_ttl(dns_answers: dns.resolver.Answer) -> float | None:
+    rrset = getattr(dns_answers, "rrset", None)
+    return None if rrset is None else rrset.ttl
+
+
+def _parse_answers(
+    dns_answers: dns.resolver.Answer,
+    *,
+    pedantic: bool,
+    collector: MetricsCollector | None,
+    started: float,
+) -> PronounsResponse:
+    if collector is not None:
+        collector.observe(RESOLVE_SECONDS, time.perf_counter() - started)
+    try:
+        response = parse_pronoun_records(txt_records(dns_answers), pedantic=pedantic)
+    except PODNSParserError:
+        _record_lookup(collector, started, "invalid")
+        raise
+    _record_lookup(collector, started, "ok")
+    return response
+
+
+def _fetch_sync(
+    domain: str,
+    *,
+    pedantic: bool,
+    resolver: dns.resolver.Resolver,
+    deadline: float | None,
+    rate_limiter: RateLimiter | None,
+    cache: CacheBackend | None,
 ) -> PronounsResponse | None:
+    qname: str = f"pronouns.{domain}"
+    collector = get_metrics_collector()
+    key: str = cache_key(domain, pedantic=pedantic)
+    if cache is not None:
+        cached = cache.get_sync(key)
+        _record_cache(collector, cached)
+        if cached is not CACHE_MISS:
+            return cached
+
+    started: float = time.perf_counter()
     try:
-        dns_answers = dns.resolver.resolve(f"pronouns.{domain}", "TXT")
+        lifetime: float | None = deadline
+        if rate_limiter is not None:
+            with span("rate_limit"):
+                waited: float = rate_limiter.acquire_sync(resolver_key(resolver))
+            if lifetime is not None:
+                lifetime -= waited
+                if lifetime <= 0:
+                    raise _deadline_exceeded(qname, deadline)
+        with span("resolve"):
+            dns_answers = resolver.resolve(qname, "TXT", lifetime=lifetime)
     except dns.resolver.NXDOMAIN:
+        _record_lookup(collector, started, "nxdomain")
+        if cache is not None:
+            cache.set_sync(key, None)
         return None
-    return parse_pronoun_records([str(ans)[1:-1] for ans in dns_answers], pedantic=pedantic)
+    except (PODNSLookupTimeout, dns.resolver.LifetimeTimeout) as e:
+        _record_lookup(collector, started, "timeout")
+        if deadline is None or isinstance(e, PODNSLookupTimeout):
+            raise
+        raise _deadline_exceeded(qname, deadline) from e
+    except Exception:
+        _record_lookup(collector, started, "error")
+        raise
 
+    response = _parse_answers(
+        dns_answers, pedantic=pedantic, collector=collector, started=started
+    )
+    if cache is not None:
+        cache.set_sync(key, response, ttl=_answer_ttl(dns_answers))
+    return response
 
-async def fetch_pronouns_from_domain_async(
-    domain: str, *, pedantic: bool = False
+
+def fetch_pronouns_from_domain_sync(
+    domain: str,
+    *,
+    pedantic: bool = False,
+    resolver: dns.resolver.Resolver | None = None,
+    deadline: float | None = None,
+    rate_limiter: RateLimiter | None = None,
+    cache: CacheBackend | None = None,
 ) -> PronounsResponse | None:
+    if resolver is None:
+        resolver = dns.resolver.get_default_resolver()
+    domain = canonical_domain(domain)
+
+    with span("lookup", domain=domain):
+        return _fetch_sync(
+            domain,
+            pedantic=pedantic,
+            resolver=resolver,
+            deadline=deadline,
+            rate_limiter=rate_limiter,
+            cache=cache,
+        )
+
+
+async def _resolve_async(
+    qname: str,
+    *,
+    resolver: dns.asyncresolver.Resolver,
+    lifetime: float | None,
+    hedging: HedgingPolicy | None,
+    rate_limiter: RateLimiter | None,
+) -> dns.resolver.Answer:
+    if hedging is not None:
+        return await hedging.resolve(
+            qname, "TXT", lifetime=lifetime, rate_limiter=rate_limiter
+        )
+    if rate_limiter is not None:
+        with span("rate_limit"):
+            await rate_limiter.acquire(resolver_key(resolver))
+    with span("resolve"):
+        return await resolver.resolve(qname, "TXT", lifetime=lifetime)
+
+
+async def _fetch_async(
+    domain: str,
+    *,
+    pedantic: bool,
+    resolver: dns.asyncresolver.Resolver,
+    deadline: float | None,
+    hedging: HedgingPolicy | None,
+    rate_limiter: RateLimiter | None,
+    scheduler: LookupScheduler | None,
+    priority: LookupPriority,
+    cache: CacheBackend | None,
+) -> _Fetched:
+    qname: str = f"pronouns.{domain}"
+    collector = get_metrics_collector()
+    key: str = cache_key(domain, pedantic=pedantic)
+    if cache is not None:
+        cached = await cache.get(key)
+        _record_cache(collector, cached)
+        if cached is not CACHE_MISS:
+            return cached, 0.0
+
+    resolve = functools.partial(
+        _resolve_async,
+        qname,
+        resolver=resolver,
+        lifetime=deadline,
+        hedging=hedging,
+        rate_limiter=rate_limiter,
+    )
+    started: float = time.perf_counter()
     try:
-        dns_answers = await dns.asyncresolver.resolve(f"pronouns.{domain}", "TXT")
+        # the resolver's own lifetime stops retries at the deadline, and the
+        # timeout guards everything else (queueing, hedged queries) around it.
+        async with asyncio.timeout(deadline):
+            if scheduler is None:
+                dns_answers = await resolve()
+            else:
+                with span("queue", priority=priority.name.lower()):
+                    await scheduler.acquire(priority)
+                try:
+                    dns_answers = await resolve()
+                finally:
+                    scheduler.release()
     except dns.resolver.NXDOMAIN:
-        return None
-    return parse_pronoun_records([str(ans)[1:-1] for ans in dns_answers], pedantic=pedantic)
+        _record_lookup(collector, started, "nxdomain")
+        if cache is not None:
+            await cache.set(key, None)
+        return None, None
+    except (TimeoutError, dns.resolver.LifetimeTimeout) as e:
+        _record_lookup(collector, started, "timeout")
+        if deadline is None:
+            raise
+        raise _deadline_exceeded(qname, deadline) from e
+    except Exception:
+        _record_lookup(collector, started, "error")
+        raise
+
+    response = _parse_answers(
+        dns_answers, pedantic=pedantic, collector=collector, started=started
+    )
+    ttl: float | None = _answer_ttl(dns_answers)
+    if cache is not None:
+        await cache.set(key, response, ttl=ttl)
+    return response, ttl
+
+
+async def _lookup_async(
+    domain: str,
+    *,
+    pedantic: bool,
+    resolver: dns.asyncresolver.Resolver,
+    deadline: float | None,
+    hedging: HedgingPolicy | None,
+    rate_limiter: RateLimiter | None,
+    scheduler: LookupScheduler | None,
+    priority: LookupPriority,
+    cache: CacheBackend | None,
+) -> _Fetched:
+    with span("lookup", domain=domain):
+        return await _fetch_async(
+            domain,
+            pedantic=pedantic,
+            resolver=resolver,
+            deadline=deadline,
+            hedging=hedging,
+            rate_limiter=rate_limiter,
+            scheduler=scheduler,
+            priority=priority,
+            cache=cache,
+        )
+
+
+def _land(
+    flights: dict[tuple[object, ...], _Flight],
+    key: tuple[object, ...],
+    flight: _Flight,
+    _: asyncio.Task[_Fetched],
+) -> None:
+    if flights.get(key) is flight:
+        del flights[key]
+
+
+async def _fetch_with_ttl(
+    domain: str,
+    *,
+    pedantic: bool = False,
+    resolver: dns.asyncresolver.Resolver | None = None,
+    deadline: float | None = None,
+    hedging: HedgingPolicy | None = None,
+    rate_limiter: RateLimiter | None = None,
+    scheduler: LookupScheduler | None = None,
+    priority: LookupPriority = LookupPriority.INTERACTIVE,
+    cache: CacheBackend | None = None,
+) -> _Fetched:
+    if resolver is None:
+        resolver = dns.asyncresolver.get_default_resolver()
+    domain = canonical_domain(domain)
+
+    # the flight holds on to everything in its key until it lands, so their ids
+    # cannot be reused by other objects in the meantime.
+    key: tuple[object, ...] = (
+        domain,
+        pedantic,
+        deadline,
+        priority,
+        id(resolver),
+        id(hedging),
+        id(rate_limiter),
+        id(scheduler),
+        id(cache),
+    )
+    flights = _flights.setdefault(asyncio.get_running_loop(), {})
+    flight = flights.get(key)
+    # a lookup joining one already in flight gets a span of its own, as the
+    # query's spans are traced under the caller that started it.
+    joined: AbstractContextManager[None] = nullcontext()
+    if flight is not None:
+        joined = span("lookup", domain=domain, shared=True)
+    else:
+        flight = _Flight(
+            asyncio.create_task(
+                _lookup_async(
+                    domain,
+                    pedantic=pedantic,
+                    resolver=resolver,
+                    deadline=deadline,
+                    hedging=hedging,
+                    rate_limiter=rate_limiter,
+                    scheduler=scheduler,
+                    priority=priority,
+                    cache=cache,
+                )
+            )
+        )
+        flights[key] = flight
+        flight.task.add_done_callback(functools.partial(_land, flights, key, flight))
+
+    flight.waiters += 1
+    try:
+        with joined:
+            return await asyncio.shield(flight.task)
+    finally:
+        flight.waiters -= 1
+        # nobody is left waiting for the answer.
+        if flight.waiters == 0 and not flight.task.done():
+            flight.task.cancel()
+
+
+async def fetch_pronouns_from_domain_async(
+    domain: str,
+    *,
+    pedantic: bool = False,
+    resolver: dns.asyncresolver.Resolver | None = None,
+    deadline: float | None = None,
+    hedging: HedgingPolicy | None = None,
+    rate_limiter: RateLimiter | None = None,
+    scheduler: LookupScheduler | None = None,
+    priority: LookupPriority = LookupPriority.INTERACTIVE,
+    cache: CacheBackend | None = None,
+) -> PronounsResponse | None:
+    response, _ = await _fetch_with_ttl(
+        domain,
+        pedantic=pedantic,
+        resolver=resolver,
+        deadline=deadline,
+        hedging=hedging,
+        rate_limiter=rate_limiter,
+        scheduler=scheduler,
+        priority=priority,
+        cache=cache,
+    )
+    return response
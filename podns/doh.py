@@ -0,0 +1,309 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import base64
+import ssl
+import urllib.parse
+from typing import Literal, Sequence
+
+import dns.message
+import dns.nameserver
+
+from podns.error import PODNSLookupError
+from podns.selection import NameserverSelector
+from podns.transport import _PooledResolver
+
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.errors
+    import h2.events
+    import h2.exceptions
+except ImportError:  # pragma: no cover
+    h2 = None
+
+
+__all__: tuple[str, ...] = ("DoHResolver",)
+
+
+_CONTENT_TYPE: str = "application/dns-message"
+_READ_SIZE: int = 65_536
+
+
+class _Stream:
+    def __init__(self, future: asyncio.Future[tuple[int, bytes]]) -> None:
+        self.future = future
+        self.status: int = 0
+        self.body = bytearray()
+
+
+class _HTTP2Connection:
+    # one HTTP/2 connection carrying many requests at once, each on its own
+    # stream.
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        connection: h2.connection.H2Connection,
+    ) -> None:
+        self._reader = reader
+        self._writer = writer
+        self._h2 = connection
+        self._streams: dict[int, _Stream] = {}
+        self._closed: bool = False
+        self._settings: asyncio.Future[None] = (
+            asyncio.get_running_loop().create_future()
+        )
+        self._read_task = asyncio.create_task(self._read())
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def outstanding(self) -> int:
+        return len(self._streams)
+
+    @property
+    def capacity(self) -> int:
+        return self._h2.remote_settings.max_concurrent_streams
+
+    async def handshake(self) -> None:
+        # waits for the server's settings, so `capacity` is its own limit on
+        # streams before any are opened.
+        await self._settings
+
+    def _handle(self, event: h2.events.Event) -> None:
+        if isinstance(event, h2.events.RemoteSettingsChanged):
+            if not self._settings.done():
+                self._settings.set_result(None)
+        elif isinstance(event, h2.events.ResponseReceived):
+            stream = self._streams.get(event.stream_id)
+            if stream is not None:
+                stream.status = int(dict(event.headers).get(":status", 0))
+        elif isinstance(event, h2.events.DataReceived):
+            self._h2.acknowledge_received_data(
+                event.flow_controlled_length, event.stream_id
+            )
+            stream = self._streams.get(event.stream_id)
+            if stream is not None:
+                stream.body.extend(event.data)
+        elif isinstance(event, h2.events.StreamEnded):
+            stream = self._streams.get(event.stream_id)
+            if stream is not None and not stream.future.done():
+                stream.future.set_result((stream.status, bytes(stream.body)))
+        elif isinstance(event, h2.events.StreamReset):
+            stream = self._streams.get(event.stream_id)
+            if stream is not None and not stream.future.done():
+                stream.future.set_exception(
+                    PODNSLookupError(f"HTTP/2 stream reset: {event.error_code!r}")
+                )
+        elif isinstance(event, h2.events.ConnectionTerminated):
+            raise EOFError(f"HTTP/2 connection closed: {event.error_code!r}")
+
+    async def _read(self) -> None:
+        error: Exception = EOFError("Connection closed by the server.")
+        try:
+            while data := await self._reader.read(_READ_SIZE):
+                for event in self._h2.receive_data(data):
+                    self._handle(event)
+                self._writer.write(self._h2.data_to_send())
+        except (EOFError, OSError) as e:
+            error = e
+        except h2.exceptions.ProtocolError as e:
+            error = EOFError(f"HTTP/2 protocol error: {e}")
+        finally:
+            self._fail(error)
+
+    def _fail(self, error: Exception) -> None:
+        self._closed = True
+        self._writer.close()
+        if not self._settings.done():
+            self._settings.set_exception(error)
+        for stream in self._streams.values():
+            if not stream.future.done():
+                stream.future.set_exception(error)
+
+    async def request(
+        self, headers: list[tuple[str, str]], body: bytes
+    ) -> tuple[int, bytes]:
+        if self._closed:
+            raise EOFError("Connection closed.")
+        stream_id: int = self._h2.get_next_available_stream_id()
+        stream = _Stream(asyncio.get_running_loop().create_future())
+        self._streams[stream_id] = stream
+        try:
+            self._h2.send_headers(stream_id, headers, end_stream=not body)
+            if body:
+                self._h2.send_data(stream_id, body, end_stream=True)
+            self._writer.write(self._h2.data_to_send())
+            await self._writer.drain()
+            return await stream.future
+        except asyncio.CancelledError:
+            # tell the server to stop working on a request nobody is waiting
+            # for anymore.
+            if not self._closed and not stream.future.done():
+                self._h2.reset_stream(stream_id, h2.errors.ErrorCodes.CANCEL)
+                self._writer.write(self._h2.data_to_send())
+            raise
+        finally:
+            del self._streams[stream_id]
+
+    def close(self) -> None:
+        if not self._closed:
+            self._read_task.cancel()
+            self._fail(EOFError("Connection closed."))
+
+
+class DoHResolver(_PooledResolver[_HTTP2Connection]):
+    # sends queries as DNS-over-HTTPS (RFC 8484) requests to the given URLs,
+    # over HTTP/2 connections that are kept open and shared by every query in
+    # flight, each query on its own stream. a connection takes up to
+    # `max_outstanding` queries at once (or fewer, if the server says so), and
+    # up to `max_connections` are opened to each URL as they fill up. needs the
+    # optional `h2` dependency (`podns[doh]`).
+    #
+    # queries are POSTed by default; `method="GET"` sends them in the URL
+    # instead, which HTTP caches along the way can answer. `verify` may also
+    # be the path of a CA bundle to verify the servers against. plain http://
+    # URLs speak HTTP/2 from the start, without TLS.
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        *,
+        timeout: float = 2.0,
+        selector: NameserverSelector | None = None,
+        method: Literal["GET", "POST"] = "POST",
+        max_outstanding: int = 100,
+        max_connections: int = 4,
+        verify: bool | str = True,
+    ) -> None:
+        if h2 is None:
+            raise ImportError(
+                "DNS-over-HTTPS needs h2, install it with `pip install podns[doh]`."
+            )
+        if method not in ("GET", "POST"):
+            raise ValueError(f"method must be GET or POST: {method=}")
+        super().__init__(
+            [dns.nameserver.DoHNameserver(url, verify=verify) for url in urls],
+            timeout=timeout,
+            selector=selector,
+            max_outstanding=max_outstanding,
+            max_connections=max_connections,
+        )
+        self.method: Literal["GET", "POST"] = method
+        self.verify: bool | str = verify
+
+    def _ssl_context(self) -> ssl.SSLContext:
+        if isinstance(self.verify, str):
+            context = ssl.create_default_context(cafile=self.verify)
+        else:
+            context = ssl.create_default_context()
+            if not self.verify:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+        context.set_alpn_protocols(["h2"])
+        return context
+
+    async def _open(self, nameserver: dns.nameserver.Nameserver) -> _HTTP2Connection:
+        assert isinstance(nameserver, dns.nameserver.DoHNameserver)
+        url = urllib.parse.urlsplit(nameserver.url)
+        tls: bool = url.scheme == "https"
+        reader, writer = await asyncio.open_connection(
+            url.hostname,
+            url.port or (443 if tls else 80),
+            ssl=self._ssl_context() if tls else None,
+        )
+        if tls and writer.get_extra_info("ssl_object").selected_alpn_protocol() != "h2":
+            writer.close()
+            raise PODNSLookupError(f"Server does not speak HTTP/2: {nameserver.url=}")
+
+        connection = h2.connection.H2Connection(
+            h2.config.H2Configuration(
+                client_side=True,
+                header_encoding="utf-8",
+                # the request headers are built well-formed here, so checking
+                # them again on every request is wasted work.
+                validate_outbound_headers=False,
+                normalize_outbound_headers=False,
+            )
+        )
+        connection.initiate_connection()
+        writer.write(connection.data_to_send())
+        http2 = _HTTP2Connection(reader, writer, connection)
+        try:
+            await http2.handshake()
+        except BaseException:
+            http2.close()
+            raise
+        return http2
+
+    def _request(
+        self, nameserver: dns.nameserver.DoHNameserver, wire: bytes
+    ) -> tuple[list[tuple[str, str]], bytes]:
+        url = urllib.parse.urlsplit(nameserver.url)
+        path: str = url.path or "/"
+        headers: list[tuple[str, str]] = [
+            (":method", self.method),
+            (":scheme", url.scheme),
+            (":authority", url.netloc),
+        ]
+        if self.method == "GET":
+            encoded: str = base64.urlsafe_b64encode(wire).rstrip(b"=").decode()
+            query: str = f"{url.query}&dns={encoded}" if url.query else f"dns={encoded}"
+            headers += [(":path", f"{path}?{query}"), ("accept", _CONTENT_TYPE)]
+            return headers, b""
+
+        if url.query:
+            path = f"{path}?{url.query}"
+        headers += [
+            (":path", path),
+            ("accept", _CONTENT_TYPE),
+            ("content-type", _CONTENT_TYPE),
+            ("content-length", str(len(wire))),
+        ]
+        return headers, wire
+
+    async def _query(
+        self, query: dns.message.Message, nameserver: dns.nameserver.Nameserver
+    ) -> dns.message.Message:
+        assert isinstance(nameserver, dns.nameserver.DoHNameserver)
+        # the id is always 0, so identical queries make identical requests
+        # (RFC 8484 section 4.1).
+        query.id = 0
+        headers, body = self._request(nameserver, query.to_wire())
+        async with asyncio.timeout(self.timeout):
+            status, content = await self._on_connection(
+                nameserver, lambda connection: connection.request(headers, body)
+            )
+        if status != 200:
+            raise PODNSLookupError(f"DNS-over-HTTPS request failed: {status=}")
+        response = dns.message.from_wire(content)
+        if not query.is_response(response):
+            raise PODNSLookupError("DNS-over-HTTPS response does not match the query.")
+        return response
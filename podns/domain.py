@@ -0,0 +1,69 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import functools
+import re
+from typing import Final
+
+from podns.error import PODNSInvalidDomain
+
+
+__all__: tuple[str, ...] = ("canonical_domain",)
+
+
+# a name is at most 253 characters, and lookups prefix it with `pronouns.`.
+_MAX_LENGTH: Final[int] = 253 - len("pronouns.")
+_LABEL: Final[re.Pattern[str]] = re.compile(r"[a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9_])?")
+_CACHE_SIZE: Final[int] = 65_536
+
+
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def canonical_domain(domain: str) -> str:
+    # the form a domain is looked up and cached under: surrounding whitespace
+    # and one trailing dot removed, internationalised labels IDNA encoded
+    # (IDNA 2003, as Python's `idna` codec does) and everything lowercased. so
+    # `Abigail.SH`, `abigail.sh.` and ` abigail.sh ` are all `abigail.sh`.
+    # invalid domains raise `PODNSInvalidDomain`.
+    name: str = domain.strip()
+    if name.endswith("."):
+        name = name[:-1]
+    if not name.isascii():
+        try:
+            name = name.encode("idna").decode("ascii")
+        except UnicodeError as e:
+            raise PODNSInvalidDomain(
+                f"Invalid internationalised domain: {domain=}"
+            ) from e
+    name = name.lower()
+
+    if not name:
+        raise PODNSInvalidDomain(f"Empty domain: {domain=}")
+    if len(name) > _MAX_LENGTH:
+        raise PODNSInvalidDomain(
+            f"Domain is longer than {_MAX_LENGTH} characters: {domain=}"
+        )
+    for label in name.split("."):
+        if _LABEL.fullmatch(label) is None:
+            raise PODNSInvalidDomain(f"Invalid label {label!r} in domain: {domain=}")
+    return name
@@ -33,6 +33,14 @@ __all__: tuple[str, ...] = (
     "PODNSParserInsufficientPronounSetValues",
     "PODNSParserIllegalCharacterInPronouns",
     "PODNSParserTooManyPronounSetValues",
+    "PODNSStoreError",
+    "PODNSLookupError",
+    "PODNSLookupTimeout",
+    "PODNSCodecError",
+    "PODNSCacheError",
+    "PODNSZoneError",
+    "PODNSInvalidDomain",
+    "PODNSTemplateError",
 )
 
 
@@ -78,3 +86,35 @@ class PODNSParserTooManyPronounSetValues(PODNSParserError):
 
 class PODNSParserContentAfterMagicDeclaration(PODNSParserError):
     pass
+
+
+class PODNSStoreError(PODNSError):
+    pass
+
+
+class PODNSLookupError(PODNSError):
+    pass
+
+
+class PODNSLookupTimeout(PODNSLookupError, TimeoutError):
+    pass
+
+
+class PODNSCodecError(PODNSError):
+    pass
+
+
+class PODNSCacheError(PODNSError):
+    pass
+
+
+class PODNSZoneError(PODNSError):
+    pass
+
+
+class PODNSInvalidDomain(PODNSError, ValueError):
+    pass
+
+
+class PODNSTemplateError(PODNSError, ValueError):
+    pass
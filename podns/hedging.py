@@ -0,0 +1,165 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Sequence
+
+import dns.asyncresolver
+import dns.nameserver
+import dns.resolver
+
+from podns.ratelimit import RateLimiter, nameserver_key
+from podns.tracing import span
+
+
+__all__: tuple[str, ...] = ("HedgingPolicy",)
+
+
+class HedgingPolicy:
+    # queries the first nameserver, and if it has not answered once the given
+    # percentile of recently observed latencies has elapsed, sends the same
+    # query to the next nameserver as well. the first valid answer (including
+    # NXDOMAIN) wins and the remaining queries are cancelled.
+
+    def __init__(
+        self,
+        nameservers: Sequence[str | dns.nameserver.Nameserver],
+        *,
+        percentile: float = 95.0,
+        initial_delay: float = 0.1,
+        min_delay: float = 0.005,
+        window: int = 256,
+        min_samples: int = 16,
+    ) -> None:
+        if len(nameservers) < 2:
+            raise ValueError(f"Hedging needs at least two nameservers: {nameservers=}")
+        if not 0 < percentile <= 100:
+            raise ValueError(f"percentile must be within (0, 100]: {percentile=}")
+
+        self.percentile: float = percentile
+        self.initial_delay: float = initial_delay
+        self.min_delay: float = min_delay
+        self.min_samples: int = min_samples
+
+        self.queries: int = 0
+        self.hedged_queries: int = 0
+        self.hedge_wins: int = 0
+
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._keys: list[str] = [nameserver_key(n) for n in nameservers]
+        self._resolvers: list[dns.asyncresolver.Resolver] = []
+        for nameserver in nameservers:
+            resolver = dns.asyncresolver.Resolver(configure=False)
+            resolver.nameservers = [nameserver]
+            self._resolvers.append(resolver)
+
+    def record_latency(self, seconds: float) -> None:
+        self._latencies.append(seconds)
+
+    def hedge_delay(self) -> float:
+        if len(self._latencies) < self.min_samples:
+            return self.initial_delay
+        latencies: list[float] = sorted(self._latencies)
+        index: int = round(self.percentile / 100 * (len(latencies) - 1))
+        return max(latencies[index], self.min_delay)
+
+    async def _query(
+        self,
+        index: int,
+        qname: str,
+        rdtype: str,
+        lifetime: float | None,
+        rate_limiter: RateLimiter | None,
+    ) -> dns.resolver.Answer:
+        if rate_limiter is not None:
+            with span("rate_limit", nameserver=self._keys[index]):
+                await rate_limiter.acquire(self._keys[index])
+
+        started: float = time.perf_counter()
+        try:
+            with span("resolve", nameserver=self._keys[index], hedge=index > 0):
+                return await self._resolvers[index].resolve(
+                    qname, rdtype, lifetime=lifetime
+                )
+        finally:
+            # a query that failed, timed out or lost to a hedge took at least
+            # this long. leaving it out would keep only the fast samples, and
+            # the delay would keep shrinking.
+            self.record_latency(time.perf_counter() - started)
+
+    async def resolve(
+        self,
+        qname: str,
+        rdtype: str = "TXT",
+        *,
+        lifetime: float | None = None,
+        rate_limiter: RateLimiter | None = None,
+    ) -> dns.resolver.Answer:
+        self.queries += 1
+        delay: float = self.hedge_delay()
+        pending: dict[asyncio.Task[dns.resolver.Answer], int] = {
+            asyncio.create_task(
+                self._query(0, qname, rdtype, lifetime, rate_limiter)
+            ): 0
+        }
+        next_index: int = 1
+        first_error: BaseException | None = None
+
+        try:
+            while pending:
+                can_hedge: bool = next_index < len(self._resolvers)
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=delay if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+                for task in done:
+                    index: int = pending.pop(task)
+                    error = task.exception()
+                    if error is None or isinstance(error, dns.resolver.NXDOMAIN):
+                        if index > 0:
+                            self.hedge_wins += 1
+                        return task.result()
+                    first_error = first_error or error
+
+                # either the hedge delay elapsed, or every query sent so far
+                # failed, so move on to the next nameserver.
+                if can_hedge and (not done or not pending):
+                    task = asyncio.create_task(
+                        self._query(next_index, qname, rdtype, lifetime, rate_limiter)
+                    )
+                    pending[task] = next_index
+                    next_index += 1
+                    self.hedged_queries += 1
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        assert first_error is not None
+        raise first_error
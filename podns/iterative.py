@@ -0,0 +1,318 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Final, Sequence
+
+import dns.asyncquery
+import dns.asyncresolver
+import dns.exception
+import dns.flags
+import dns.message
+import dns.name
+import dns.nameserver
+import dns.rcode
+import dns.rdataclass
+import dns.rdatatype
+import dns.resolver
+
+from podns.error import PODNSLookupError
+from podns.ratelimit import RateLimiter
+from podns.tracing import span
+
+
+__all__: tuple[str, ...] = (
+    "ROOT_HINTS",
+    "IterativeResolver",
+)
+
+
+# the IPv4 addresses of a.root-servers.net through m.root-servers.net.
+ROOT_HINTS: Final[tuple[str, ...]] = (
+    "198.41.0.4",
+    "170.247.170.2",
+    "192.33.4.12",
+    "199.7.91.13",
+    "192.203.230.10",
+    "192.5.5.241",
+    "192.112.36.4",
+    "198.97.190.53",
+    "192.36.148.17",
+    "192.58.128.30",
+    "193.0.14.129",
+    "199.7.83.42",
+    "202.12.27.33",
+)
+
+_MAX_REFERRALS: Final[int] = 16
+_MAX_CNAMES: Final[int] = 8
+# how deep nameserver addresses missing from referrals are looked up.
+_MAX_GLUELESS_DEPTH: Final[int] = 3
+_FAILED_RCODES: Final[frozenset[dns.rcode.Rcode]] = frozenset(
+    {dns.rcode.SERVFAIL, dns.rcode.REFUSED, dns.rcode.NOTIMP, dns.rcode.FORMERR}
+)
+
+
+@dataclass(slots=True)
+class _Delegation:
+    # a zone's nameservers, with their addresses when known, until `expires`
+    # (on the monotonic clock).
+    nameservers: dict[dns.name.Name, list[str]]
+    expires: float
+
+
+class IterativeResolver(dns.asyncresolver.Resolver):
+    # resolves names itself, from the root hints down, instead of through a
+    # recursive resolver. the nameservers and glue of every zone it is referred
+    # to are cached (for their TTL, up to `max_ttl`), so lookups of many domains
+    # under the same TLDs only ask the root and TLD servers once.
+    #
+    # it can be passed as `resolver` wherever an async resolver is accepted.
+    # `rate_limiter` limits queries per authoritative server, and `port` is the
+    # port queried on every server (other than 53 only for tests).
+
+    def __init__(
+        self,
+        root_hints: Sequence[str] = ROOT_HINTS,
+        *,
+        port: int = 53,
+        timeout: float = 2.0,
+        max_ttl: float = 86_400.0,
+        max_zones: int = 100_000,
+        rate_limiter: RateLimiter | None = None,
+    ) -> None:
+        super().__init__(configure=False)
+        if not root_hints:
+            raise ValueError("At least one root hint is needed.")
+        if max_zones < 1:
+            raise ValueError(f"max_zones must be at least 1: {max_zones=}")
+        self.nameservers = [
+            dns.nameserver.Do53Nameserver(address, port) for address in root_hints
+        ]
+        self.port: int = port
+        self.timeout = timeout
+        self.max_ttl: float = max_ttl
+        self.max_zones: int = max_zones
+        self.rate_limiter: RateLimiter | None = rate_limiter
+
+        self.queries: int = 0
+        self.referrals: int = 0
+
+        self._root = _Delegation(
+            {dns.name.from_text(f"hint{i}."): [a] for i, a in enumerate(root_hints)},
+            float("inf"),
+        )
+        self._delegations: dict[dns.name.Name, _Delegation] = {}
+        self._rotation = itertools.count()
+
+    @property
+    def cached_zones(self) -> int:
+        return len(self._delegations)
+
+    def clear(self) -> None:
+        self._delegations.clear()
+
+    def _closest_zone(self, qname: dns.name.Name) -> tuple[dns.name.Name, _Delegation]:
+        now: float = time.monotonic()
+        zone: dns.name.Name = qname
+        while zone != dns.name.root:
+            delegation = self._delegations.get(zone)
+            if delegation is not None:
+                if delegation.expires > now:
+                    return zone, delegation
+                del self._delegations[zone]
+            zone = zone.parent()
+        return dns.name.root, self._root
+
+    def _cache(
+        self,
+        zone: dns.name.Name,
+        nameservers: dict[dns.name.Name, list[str]],
+        ttl: float,
+    ) -> _Delegation:
+        if zone not in self._delegations and len(self._delegations) >= self.max_zones:
+            # the oldest zone is evicted first.
+            del self._delegations[next(iter(self._delegations))]
+        delegation = _Delegation(nameservers, time.monotonic() + min(ttl, self.max_ttl))
+        self._delegations[zone] = delegation
+        return delegation
+
+    def _referral(
+        self, response: dns.message.Message, zone: dns.name.Name, qname: dns.name.Name
+    ) -> tuple[dns.name.Name, dict[dns.name.Name, list[str]], float] | None:
+        # a referral must move down towards the query name, or the server is
+        # lame (or the delegation loops).
+        for rrset in response.authority:
+            if (
+                rrset.rdtype == dns.rdatatype.NS
+                and rrset.name != zone
+                and rrset.name.is_subdomain(zone)
+                and qname.is_subdomain(rrset.name)
+            ):
+                nameservers: dict[dns.name.Name, list[str]] = {
+                    rdata.target: [] for rdata in rrset
+                }
+                # glue is only trusted for nameservers inside the delegated
+                # zone, where the referring server has the authority to give
+                # it. any other server could point them anywhere, so their
+                # addresses are looked up separately.
+                for glue in response.additional:
+                    if (
+                        glue.rdtype == dns.rdatatype.A
+                        and glue.name in nameservers
+                        and glue.name.is_subdomain(rrset.name)
+                    ):
+                        nameservers[glue.name].extend(rdata.address for rdata in glue)
+                return rrset.name, nameservers, rrset.ttl
+        return None
+
+    async def _addresses(self, delegation: _Delegation, depth: int) -> list[str]:
+        addresses: list[str] = [
+            address for known in delegation.nameservers.values() for address in known
+        ]
+        if addresses or depth >= _MAX_GLUELESS_DEPTH:
+            return addresses
+        # no glue was given, so the nameservers' own addresses are looked up
+        # until one resolves.
+        for name, known in delegation.nameservers.items():
+            try:
+                response = await self._walk(name, dns.rdatatype.A, depth + 1)
+                answer = response.resolve_chaining().answer
+            except (dns.exception.DNSException, PODNSLookupError):
+                continue
+            if answer is not None:
+                known.extend(rdata.address for rdata in answer)
+                return list(known)
+        return []
+
+    async def _ask(
+        self,
+        zone: dns.name.Name,
+        delegation: _Delegation,
+        query: dns.message.Message,
+        depth: int,
+    ) -> dns.message.Message:
+        addresses: list[str] = await self._addresses(delegation, depth)
+        # servers are taken in turn, so load spreads across a zone's servers.
+        start: int = next(self._rotation)
+        errors: list[
+            tuple[str, bool, int, Exception | str, dns.message.Message | None]
+        ] = []
+        for i in range(len(addresses)):
+            address: str = addresses[(start + i) % len(addresses)]
+            key: str = address if self.port == 53 else f"{address}@{self.port}"
+            if self.rate_limiter is not None:
+                with span("rate_limit", nameserver=key):
+                    await self.rate_limiter.acquire(key)
+            self.queries += 1
+            try:
+                with span("query", nameserver=key, zone=zone.to_text()):
+                    response, tcp = await dns.asyncquery.udp_with_fallback(
+                        query, address, timeout=self.timeout, port=self.port
+                    )
+            except (dns.exception.DNSException, OSError, ValueError) as e:
+                errors.append((address, False, self.port, e, None))
+                continue
+            if response.rcode() in _FAILED_RCODES:
+                errors.append(
+                    (
+                        address,
+                        tcp,
+                        self.port,
+                        dns.rcode.to_text(response.rcode()),
+                        response,
+                    )
+                )
+                continue
+            return response
+        raise dns.resolver.NoNameservers(request=query, errors=errors)
+
+    async def _walk(
+        self, qname: dns.name.Name, rdtype: dns.rdatatype.RdataType, depth: int = 0
+    ) -> dns.message.Message:
+        # follows referrals from the closest cached zone down to the server that
+        # answers for `qname`, and returns its response.
+        query = dns.message.make_query(qname, rdtype)
+        query.flags &= ~dns.flags.RD
+        zone, delegation = self._closest_zone(qname)
+        for _ in range(_MAX_REFERRALS):
+            response = await self._ask(zone, delegation, query, depth)
+            if (
+                response.rcode() == dns.rcode.NXDOMAIN
+                or response.answer
+                or response.flags & dns.flags.AA
+            ):
+                return response
+            referral = self._referral(response, zone, qname)
+            if referral is None:
+                return response
+            self.referrals += 1
+            zone, nameservers, ttl = referral
+            delegation = self._cache(zone, nameservers, ttl)
+        raise PODNSLookupError(f"Too many referrals: {qname=}")
+
+    async def resolve(
+        self,
+        qname: dns.name.Name | str,
+        rdtype: dns.rdatatype.RdataType | str = dns.rdatatype.A,
+        rdclass: dns.rdataclass.RdataClass | str = dns.rdataclass.IN,
+        tcp: bool = False,
+        source: str | None = None,
+        raise_on_no_answer: bool = True,
+        source_port: int = 0,
+        lifetime: float | None = None,
+        search: bool | None = None,
+        backend: object = None,
+    ) -> dns.resolver.Answer:
+        # the signature matches dnspython's, but only `qname`, `rdtype`,
+        # `raise_on_no_answer` and `lifetime` are used.
+        name: dns.name.Name = (
+            dns.name.from_text(qname) if isinstance(qname, str) else qname
+        )
+        rdtype = dns.rdatatype.RdataType.make(rdtype)
+        try:
+            async with asyncio.timeout(lifetime):
+                for _ in range(_MAX_CNAMES):
+                    response = await self._walk(name, rdtype)
+                    if response.rcode() == dns.rcode.NXDOMAIN:
+                        raise dns.resolver.NXDOMAIN(
+                            qnames=[name], responses={name: response}
+                        )
+                    chain = response.resolve_chaining()
+                    if chain.answer is None and chain.canonical_name != name:
+                        # an alias into another zone, which is resolved from the
+                        # top again.
+                        name = chain.canonical_name
+                        continue
+                    if chain.answer is None and raise_on_no_answer:
+                        raise dns.resolver.NoAnswer(response=response)
+                    return dns.resolver.Answer(
+                        name, rdtype, dns.rdataclass.IN, response
+                    )
+        except TimeoutError as e:
+            raise dns.resolver.LifetimeTimeout(timeout=lifetime, errors=[]) from e
+        raise PODNSLookupError(f"Too many aliases: {qname=}")
@@ -0,0 +1,129 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Callable
+
+
+__all__: tuple[str, ...] = ("AdaptiveLimiter",)
+
+
+class AdaptiveLimiter:
+    # an additive-increase/multiplicative-decrease concurrency limit. every
+    # healthy completion grows the limit by `increase / limit` (so roughly
+    # `increase` per window of `limit` lookups), and an overloaded completion
+    # (a timeout, SERVFAIL or a lookup slower than `latency_threshold`) scales
+    # it by `decrease`. only lookups started after the most recent decrease can
+    # trigger another one, so a single burst of failures is one congestion event.
+    # `clock` times lookups and congestion events, and defaults to the
+    # monotonic clock.
+
+    def __init__(
+        self,
+        *,
+        initial: int = 16,
+        minimum: int = 1,
+        maximum: int = 512,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_threshold: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not 1 <= minimum <= initial <= maximum:
+            raise ValueError(
+                f"Expected 1 <= minimum <= initial <= maximum: {minimum=} {initial=} {maximum=}"
+            )
+        if not 0 < decrease < 1:
+            raise ValueError(f"decrease must be within (0, 1): {decrease=}")
+
+        self.minimum: int = minimum
+        self.maximum: int = maximum
+        self.increase: float = increase
+        self.decrease: float = decrease
+        self.latency_threshold: float | None = latency_threshold
+        self._clock: Callable[[], float] = clock
+
+        self.limit: float = float(initial)
+        self.in_flight: int = 0
+        self.completed: int = 0
+        self.overloaded: int = 0
+        self.decreases: int = 0
+
+        self._last_decrease: float = float("-inf")
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    def _wake_waiters(self) -> None:
+        while self._waiters and self._has_capacity():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    async def acquire(self) -> float:
+        # returns a token (the start time) that must be passed back to release.
+        if not self._waiters and self._has_capacity():
+            self.in_flight += 1
+            return self._clock()
+
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # capacity was handed to us just before the cancellation.
+                self.in_flight -= 1
+                self._wake_waiters()
+            raise
+        return self._clock()
+
+    def release(
+        self, token: float, *, latency: float | None = None, overloaded: bool = False
+    ) -> None:
+        now: float = self._clock()
+        self.in_flight -= 1
+        self.completed += 1
+
+        if latency is None:
+            latency = now - token
+        if self.latency_threshold is not None and latency > self.latency_threshold:
+            overloaded = True
+
+        if overloaded:
+            self.overloaded += 1
+            if token > self._last_decrease:
+                self._last_decrease = now
+                self.decreases += 1
+                self.limit = max(float(self.minimum), self.limit * self.decrease)
+        else:
+            self.limit = min(
+                float(self.maximum), self.limit + self.increase / self.limit
+            )
+
+        self._wake_waiters()
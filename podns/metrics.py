@@ -0,0 +1,218 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import bisect
+import math
+import threading
+from typing import (
+    Final,
+    Mapping,
+    Protocol,
+)
+
+
+__all__: tuple[str, ...] = (
+    "MetricsCollector",
+    "InMemoryCollector",
+    "get_metrics_collector",
+    "set_metrics_collector",
+)
+
+
+LOOKUPS_TOTAL: Final[str] = "podns_lookups_total"
+LOOKUP_SECONDS: Final[str] = "podns_lookup_duration_seconds"
+RESOLVE_SECONDS: Final[str] = "podns_resolve_duration_seconds"
+CACHE_HITS_TOTAL: Final[str] = "podns_cache_hits_total"
+CACHE_MISSES_TOTAL: Final[str] = "podns_cache_misses_total"
+PARSE_SECONDS: Final[str] = "podns_parse_duration_seconds"
+PARSE_STAGE_SECONDS: Final[str] = "podns_parse_stage_duration_seconds"
+PARSE_ERRORS_TOTAL: Final[str] = "podns_parse_errors_total"
+
+METRIC_DESCRIPTIONS: Final[dict[str, str]] = {
+    LOOKUPS_TOTAL: "Pronoun lookups by result.",
+    LOOKUP_SECONDS: "Time taken by pronoun lookups, end to end.",
+    RESOLVE_SECONDS: "Time spent waiting on DNS for pronoun lookups.",
+    CACHE_HITS_TOTAL: "Pronoun lookups answered from cache.",
+    CACHE_MISSES_TOTAL: "Pronoun lookups not found in cache.",
+    PARSE_SECONDS: "Time taken to parse a set of pronoun records.",
+    PARSE_STAGE_SECONDS: "Time taken by each stage of parsing pronoun records.",
+    PARSE_ERRORS_TOTAL: "Pronoun record parse errors by error class.",
+}
+
+DEFAULT_BUCKETS: Final[tuple[float, ...]] = (
+    0.00001,
+    0.0001,
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+type Labels = Mapping[str, str]
+type _LabelKey = tuple[tuple[str, str], ...]
+
+
+class MetricsCollector(Protocol):
+    def increment(
+        self, name: str, value: float = 1, *, labels: Labels | None = None
+    ) -> None: ...
+
+    def observe(
+        self, name: str, value: float, *, labels: Labels | None = None
+    ) -> None: ...
+
+
+# metrics are only recorded while a collector is installed. when there is none,
+# instrumented code paths check for it once and otherwise run unchanged.
+_collector: MetricsCollector | None = None
+
+
+def set_metrics_collector(collector: MetricsCollector | None) -> None:
+    global _collector
+    _collector = collector
+
+
+def get_metrics_collector() -> MetricsCollector | None:
+    return _collector
+
+
+def _label_key(labels: Labels | None) -> _LabelKey:
+    return () if not labels else tuple(sorted(labels.items()))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: _LabelKey) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label_value(v)}"' for k, v in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, bucket_count: int) -> None:
+        self.counts: list[int] = [0] * bucket_count
+        self.sum: float = 0.0
+        self.count: int = 0
+
+
+class InMemoryCollector:
+    def __init__(self, *, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets))
+        self._counters: dict[str, dict[_LabelKey, float]] = {}
+        self._histograms: dict[str, dict[_LabelKey, _Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def increment(
+        self, name: str, value: float = 1, *, labels: Labels | None = None
+    ) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, *, labels: Labels | None = None) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(len(self.buckets))
+            index: int = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                histogram.counts[index] += 1
+            histogram.sum += value
+            histogram.count += 1
+
+    def counter(self, name: str, labels: Labels | None = None) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_label_key(labels), 0)
+
+    def histogram_count(self, name: str, labels: Labels | None = None) -> int:
+        with self._lock:
+            histogram = self._histograms.get(name, {}).get(_label_key(labels))
+            return 0 if histogram is None else histogram.count
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render_prometheus(self) -> str:
+        lines: list[str] = []
+
+        def header(name: str, kind: str) -> None:
+            description = METRIC_DESCRIPTIONS.get(name)
+            if description is not None:
+                lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            for name in sorted(self._counters):
+                header(name, "counter")
+                for labels, value in sorted(self._counters[name].items()):
+                    lines.append(
+                        f"{name}{_format_labels(labels)} {_format_value(value)}"
+                    )
+
+            for name in sorted(self._histograms):
+                header(name, "histogram")
+                for labels, histogram in sorted(self._histograms[name].items()):
+                    cumulative: int = 0
+                    for bound, count in zip(self.buckets, histogram.counts):
+                        cumulative += count
+                        bucket_labels = labels + (("le", _format_value(bound)),)
+                        lines.append(
+                            f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}"
+                        )
+                    inf_labels = labels + (("le", "+Inf"),)
+                    lines.append(
+                        f"{name}_bucket{_format_labels(inf_labels)} {histogram.count}"
+                    )
+                    lines.append(
+                        f"{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}"
+                    )
+                    lines.append(
+                        f"{name}_count{_format_labels(labels)} {histogram.count}"
+                    )
+
+        return "\n".join(lines) + "\n" if lines else ""
@@ -22,7 +22,9 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import time
 from typing import (
+    Callable,
     Final,
     Iterable,
     Literal,
@@ -31,6 +33,7 @@ from typing import (
 from podns.error import (
     PODNSParserContentAfterMagicDeclaration,
     PODNSParserEmptySegmentInPronounSet,
+    PODNSParserError,
     PODNSParserIllegalCharacterInPronouns,
     PODNSParserInsufficientPronounSetValues,
     PODNSParserInvalidTag,
@@ -39,12 +42,20 @@ from podns.error import (
     PODNSParserTooManyPronounSetValues,
     PODNSParserTrailingSlash,
 )
+from podns.metrics import (
+    PARSE_ERRORS_TOTAL,
+    PARSE_SECONDS,
+    PARSE_STAGE_SECONDS,
+    MetricsCollector,
+    get_metrics_collector,
+)
 from podns.pronouns import (
     PronounRecord,
     Pronouns,
     PronounsResponse,
     PronounTag,
 )
+from podns.tracing import get_tracer, span
 
 
 __all__: tuple[str, ...] = ("parse_pronoun_records",)
@@ -215,17 +226,20 @@ def _deduplicate_records(records: set[PronounRecord]) -> set[PronounRecord]:
     return bubbled_super_set_records
 
 
-def parse_pronoun_records(
+def _parse_pronoun_records(
     pronoun_records: Iterable[str],
     *,
-    pedantic: bool = False,
+    pedantic: bool,
+    normalise_record: Callable[[str], str],
+    parse_record: Callable[..., PronounRecord],
+    deduplicate_records: Callable[[set[PronounRecord]], set[PronounRecord]],
 ) -> PronounsResponse:
     uses_any_pronouns: bool = False
     uses_name_only: bool = False
     records: set[PronounRecord] = set()
 
     for record in pronoun_records:
-        normalised_record: str = _normalise_record(record)
+        normalised_record: str = normalise_record(record)
         if len(normalised_record) == 0:  # empty record (maybe a fully comment record)
             continue
         elif normalised_record.startswith("!"):  # none; use name only declarator
@@ -243,12 +257,12 @@ def parse_pronoun_records(
             uses_any_pronouns = True
             continue
         else:  # pronoun set
-            parsed_record: PronounRecord = _parse_record(
+            parsed_record: PronounRecord = parse_record(
                 normalised_record, pedantic=pedantic
             )
             records.add(parsed_record)
 
-    records = _deduplicate_records(records)
+    records = deduplicate_records(records)
 
     if uses_name_only:
         if pedantic and uses_any_pronouns:
@@ -269,3 +283,84 @@ def parse_pronoun_records(
         uses_name_only=uses_name_only,
         records=frozenset() if uses_name_only else frozenset(records),
     )
+
+
+def _timed[**P, R](
+    function: Callable[P, R], timings: dict[str, float], stage: str
+) -> Callable[P, R]:
+    def timed(*args: P.args, **kwargs: P.kwargs) -> R:
+        started: float = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            timings[stage] += time.perf_counter() - started
+
+    return timed
+
+
+def _traced[**P, R](function: Callable[P, R], phase: str) -> Callable[P, R]:
+    def traced(*args: P.args, **kwargs: P.kwargs) -> R:
+        with span(phase):
+            return function(*args, **kwargs)
+
+    return traced
+
+
+def _parse_pronoun_records_instrumented(
+    pronoun_records: Iterable[str],
+    *,
+    pedantic: bool,
+    collector: MetricsCollector | None,
+    tracing: bool,
+) -> PronounsResponse:
+    normalise_record = _normalise_record
+    parse_record = _parse_record
+    deduplicate_records = _deduplicate_records
+
+    timings: dict[str, float] = dict.fromkeys(("normalise", "parse", "dedup"), 0.0)
+    if collector is not None:
+        normalise_record = _timed(normalise_record, timings, "normalise")
+        parse_record = _timed(parse_record, timings, "parse")
+        deduplicate_records = _timed(deduplicate_records, timings, "dedup")
+    if tracing:
+        deduplicate_records = _traced(deduplicate_records, "dedup")
+
+    started: float = time.perf_counter()
+    try:
+        with span("parse"):
+            return _parse_pronoun_records(
+                pronoun_records,
+                pedantic=pedantic,
+                normalise_record=normalise_record,
+                parse_record=parse_record,
+                deduplicate_records=deduplicate_records,
+            )
+    except PODNSParserError as e:
+        if collector is not None:
+            collector.increment(PARSE_ERRORS_TOTAL, labels={"error": type(e).__name__})
+        raise
+    finally:
+        if collector is not None:
+            collector.observe(PARSE_SECONDS, time.perf_counter() - started)
+            for stage, seconds in timings.items():
+                collector.observe(PARSE_STAGE_SECONDS, seconds, labels={"stage": stage})
+
+
+def parse_pronoun_records(
+    pronoun_records: Iterable[str],
+    *,
+    pedantic: bool = False,
+) -> PronounsResponse:
+    collector = get_metrics_collector()
+    tracing: bool = get_tracer() is not None
+    if collector is not None or tracing:
+        return _parse_pronoun_records_instrumented(
+            pronoun_records, pedantic=pedantic, collector=collector, tracing=tracing
+        )
+    return _parse_pronoun_records(
+        pronoun_records,
+        pedantic=pedantic,
+        normalise_record=_normalise_record,
+        parse_record=_parse_record,
+        deduplicate_records=_deduplicate_records,
+    )
@@ -22,14 +22,27 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import functools
+import operator
+import re
 from dataclasses import dataclass
 from enum import StrEnum
+from typing import (
+    Any,
+    Callable,
+    Final,
+)
+
+from podns.error import PODNSTemplateError
 
 
 __all__: tuple[str, ...] = (
     "PronounsResponse",
     "PronounTag",
     "Pronouns",
+    "PronounsDiff",
+    "diff",
+    "PronounTemplate",
 )
 
 
@@ -55,6 +68,15 @@ class Pronouns:
             self.reflexive,
         ]
 
+    def to_dict(self) -> dict[str, str | None]:
+        return {
+            "subject": self.subject,
+            "object": self.object,
+            "possessive_determiner": self.possessive_determiner,
+            "possessive_pronoun": self.possessive_pronoun,
+            "reflexive": self.reflexive,
+        }
+
     def is_strict_subset_of(self, other: Pronouns) -> bool:
         assert len(set(self.to_list()).difference({None})) >= 2
         assert len(set(other.to_list()).difference({None})) >= 2
@@ -82,6 +104,12 @@ class PronounRecord:
     pronouns: Pronouns
     tags: frozenset[PronounTag]
 
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "pronouns": self.pronouns.to_dict(),
+            "tags": sorted(t.value for t in self.tags),
+        }
+
     def __repr__(self) -> str:
         if not self.tags:
             return str(self.pronouns)
@@ -95,6 +123,13 @@ class PronounsResponse:
     uses_name_only: bool
     records: frozenset[PronounRecord]
 
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "uses_any_pronouns": self.uses_any_pronouns,
+            "uses_name_only": self.uses_name_only,
+            "records": [r.to_dict() for r in sorted(self.records, key=str)],
+        }
+
     def __repr__(self) -> str:
         if not self.records:
             return (
@@ -128,3 +163,271 @@ class PronounsResponse:
             ")",
         ]
         return "\n".join(lines)
+
+
+@dataclass(slots=True, frozen=True)
+class PronounsDiff:
+    # records are matched by their pronouns, so a record whose tags changed is
+    # `retagged` (as its old and new form) rather than removed and added.
+    added: frozenset[PronounRecord]
+    removed: frozenset[PronounRecord]
+    retagged: tuple[tuple[PronounRecord, PronounRecord], ...]
+    uses_any_pronouns_changed: bool
+    uses_name_only_changed: bool
+
+    def __bool__(self) -> bool:
+        return bool(
+            self.added
+            or self.removed
+            or self.retagged
+            or self.uses_any_pronouns_changed
+            or self.uses_name_only_changed
+        )
+
+    def apply(self, response: PronounsResponse | None) -> PronounsResponse:
+        old = response if response is not None else _EMPTY_RESPONSE
+        retagged_from = {old_record for old_record, _ in self.retagged}
+        records = (old.records - self.removed - retagged_from) | self.added
+        return PronounsResponse(
+            uses_any_pronouns=old.uses_any_pronouns ^ self.uses_any_pronouns_changed,
+            uses_name_only=old.uses_name_only ^ self.uses_name_only_changed,
+            records=records | {new_record for _, new_record in self.retagged},
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "added": [r.to_dict() for r in sorted(self.added, key=str)],
+            "removed": [r.to_dict() for r in sorted(self.removed, key=str)],
+            "retagged": [
+                {"old": old.to_dict(), "new": new.to_dict()}
+                for old, new in self.retagged
+            ],
+            "uses_any_pronouns_changed": self.uses_any_pronouns_changed,
+            "uses_name_only_changed": self.uses_name_only_changed,
+        }
+
+
+_EMPTY_RESPONSE: PronounsResponse = PronounsResponse(
+    uses_any_pronouns=False, uses_name_only=False, records=frozenset()
+)
+
+
+def diff(old: PronounsResponse | None, new: PronounsResponse | None) -> PronounsDiff:
+    # `None` (NXDOMAIN) compares as a response with no records. runs in linear
+    # time, matching records through a dict keyed by their pronouns.
+    if old is None:
+        old = _EMPTY_RESPONSE
+    if new is None:
+        new = _EMPTY_RESPONSE
+
+    old_by_pronouns = {record.pronouns: record for record in old.records}
+    added: set[PronounRecord] = set()
+    retagged: list[tuple[PronounRecord, PronounRecord]] = []
+    for record in new.records:
+        previous = old_by_pronouns.pop(record.pronouns, None)
+        if previous is None:
+            added.add(record)
+        elif previous.tags != record.tags:
+            retagged.append((previous, record))
+
+    return PronounsDiff(
+        added=frozenset(added),
+        removed=frozenset(old_by_pronouns.values()),
+        # sorted, so equal inputs always give equal (and equally printed) diffs.
+        retagged=tuple(sorted(retagged, key=lambda pair: str(pair[0]))),
+        uses_any_pronouns_changed=old.uses_any_pronouns != new.uses_any_pronouns,
+        uses_name_only_changed=old.uses_name_only != new.uses_name_only,
+    )
+
+
+_FORMS: Final[tuple[str, ...]] = (
+    "subject",
+    "object",
+    "possessive_determiner",
+    "possessive_pronoun",
+    "reflexive",
+)
+# the forms records of common sets may leave out, by subject and object.
+_COMMON_FORMS: Final[dict[tuple[str, str], tuple[str, str, str]]] = {
+    ("she", "her"): ("her", "hers", "herself"),
+    ("he", "him"): ("his", "his", "himself"),
+    ("they", "them"): ("their", "theirs", "themselves"),
+    ("it", "it"): ("its", "its", "itself"),
+}
+_THEY_THEM: Final[tuple[str, ...]] = (
+    "they",
+    "them",
+    "their",
+    "theirs",
+    "themselves",
+    "They",
+    "Them",
+    "Their",
+    "Theirs",
+    "Themselves",
+)
+_PLACEHOLDER: Final[re.Pattern[str]] = re.compile(r"\{\{|\}\}|\{([^{}]*)\}|[{}]")
+_CHOICE_CACHE_SIZE: Final[int] = 4096
+
+type _Forms = tuple[str | None, ...]
+
+
+def _with_capitalised(forms: _Forms) -> _Forms:
+    # the forms followed by their capitalised versions, which is how templates
+    # index them.
+    return forms + tuple(
+        None if form is None else form[:1].upper() + form[1:] for form in forms
+    )
+
+
+@functools.lru_cache(maxsize=_CHOICE_CACHE_SIZE)
+def _complete_forms(pronouns: Pronouns) -> _Forms:
+    forms: _Forms = tuple(pronouns.to_list())
+    common = _COMMON_FORMS.get((pronouns.subject.lower(), pronouns.object.lower()))
+    if common is None:
+        return forms
+    return (
+        forms[0],
+        forms[1],
+        *(
+            form if form is not None else known
+            for form, known in zip(forms[2:], common)
+        ),
+    )
+
+
+@functools.lru_cache(maxsize=_CHOICE_CACHE_SIZE)
+def _choose_record(
+    response: PronounsResponse, required: tuple[int, ...]
+) -> tuple[_Forms, bool] | None:
+    # the preferred record with every form the template uses, or failing that
+    # any record with them. ties go to the first record by text, so the choice
+    # does not depend on set order.
+    best: tuple[bool, str] | None = None
+    chosen: tuple[_Forms, bool] | None = None
+    for record in response.records:
+        forms = _complete_forms(record.pronouns)
+        if any(forms[i] is None for i in required):
+            continue
+        rank: tuple[bool, str] = (PronounTag.PREFERRED not in record.tags, repr(record))
+        if best is None or rank < best:
+            best = rank
+            chosen = (_with_capitalised(forms), PronounTag.PLURAL in record.tags)
+    return chosen
+
+
+def _render_plan(indices: list[int]) -> Callable[[tuple[str | None, ...]], str]:
+    if not indices:
+        return lambda values: ""
+    getter = operator.itemgetter(*indices)
+    if len(indices) == 1:
+        return getter
+    return lambda values: "".join(getter(values))
+
+
+class PronounTemplate:
+    # text with placeholders filled in from someone's pronouns, compiled once
+    # into a plan that `render` runs without looking at the text again.
+    #
+    # `{subject}`, `{object}`, `{possessive_determiner}`, `{possessive_pronoun}`
+    # and `{reflexive}` are replaced by that form, capitalised when the
+    # placeholder is (`{Subject}`). `{singular|plural}` picks a word by verb
+    # agreement, such as `{updates|update}`. `{{` and `}}` are literal braces.
+    #
+    # the preferred record is used when a response has several, and the plural
+    # word when it is tagged plural. forms missing from a record (`she/her`) are
+    # filled in for common sets; a record still missing a form the template
+    # uses is passed over. with no usable record (or a response that uses their
+    # name only), `name` and `name's` are used when given, and otherwise
+    # they/them.
+
+    def __init__(self, template: str) -> None:
+        self.template: str = template
+
+        literals: list[str] = []
+        singular: list[int | str] = []
+        plural: list[int | str] = []
+        required: set[int] = set()
+
+        def literal(text: str, plans: tuple[list[int | str], ...]) -> None:
+            for plan in plans:
+                if plan and isinstance(plan[-1], str):
+                    plan[-1] += text
+                else:
+                    plan.append(text)
+
+        position: int = 0
+        for match in _PLACEHOLDER.finditer(template):
+            literal(template[position : match.start()], (singular, plural))
+            position = match.end()
+            token: str = match.group(0)
+            if token in ("{{", "}}"):
+                literal(token[0], (singular, plural))
+                continue
+            field = match.group(1)
+            if field is None:
+                raise PODNSTemplateError(
+                    f"Unmatched {token!r} at {match.start()}: {template=}"
+                )
+
+            if "|" in field:
+                words = field.split("|")
+                if len(words) != 2:
+                    raise PODNSTemplateError(
+                        f"Expected {{singular|plural}}: {field=} {template=}"
+                    )
+                literal(words[0], (singular,))
+                literal(words[1], (plural,))
+                continue
+
+            form: str = field.lower()
+            if form not in _FORMS or field not in (form, form.capitalize()):
+                raise PODNSTemplateError(f"Unknown placeholder: {field=} {template=}")
+            index: int = _FORMS.index(form)
+            required.add(index)
+            if field != form:
+                index += len(_FORMS)
+            for plan in (singular, plural):
+                plan.append(index)
+        literal(template[position:], (singular, plural))
+
+        self._required: tuple[int, ...] = tuple(sorted(required))
+
+        # forms come first in the values a plan picks from, then their
+        # capitalised versions, then the literal text.
+        offset: int = 2 * len(_FORMS)
+
+        def compile_plan(plan: list[int | str]) -> list[int]:
+            indices: list[int] = []
+            for part in plan:
+                if isinstance(part, str):
+                    if not part:
+                        continue
+                    literals.append(part)
+                    indices.append(offset + len(literals) - 1)
+                else:
+                    indices.append(part)
+            return indices
+
+        self._singular = _render_plan(compile_plan(singular))
+        self._plural = _render_plan(compile_plan(plural))
+        self._literals: tuple[str, ...] = tuple(literals)
+
+    def render(
+        self, response: PronounsResponse | None, *, name: str | None = None
+    ) -> str:
+        chosen: tuple[_Forms, bool] | None = None
+        if response is not None and not (response.uses_name_only and name is not None):
+            chosen = _choose_record(response, self._required)
+        if chosen is not None:
+            forms, plural = chosen
+        elif name is not None:
+            possessive: str = f"{name}'s"
+            forms = (name, name, possessive, possessive, name) * 2
+            plural = False
+        else:
+            forms, plural = _THEY_THEM, True
+        return (self._plural if plural else self._singular)(forms + self._literals)
+
+    def __repr__(self) -> str:
+        return f"PronounTemplate({self.template!r})"
@@ -0,0 +1,183 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Mapping, Protocol
+
+import dns.nameserver
+import dns.resolver
+
+
+__all__: tuple[str, ...] = (
+    "RateLimiter",
+    "TokenBucket",
+    "NameserverRateLimiter",
+    "nameserver_key",
+    "resolver_key",
+)
+
+
+def nameserver_key(nameserver: str | dns.nameserver.Nameserver) -> str:
+    # the key rate limits are configured under: the address, plus `@port` when
+    # it is not the default port (the same notation dnspython uses), or the URL
+    # of a DNS-over-HTTPS server.
+    if isinstance(nameserver, str):
+        return nameserver
+    if isinstance(nameserver, dns.nameserver.DoHNameserver):
+        return nameserver.url
+    address: str = nameserver.answer_nameserver()
+    port: int = nameserver.answer_port()
+    return address if port == 53 else f"{address}@{port}"
+
+
+def resolver_key(resolver: dns.resolver.BaseResolver) -> str:
+    # the key a whole resolver is limited under. dnspython picks which of its
+    # nameservers each query goes to (and retries against the others), so a
+    # fetcher cannot charge the nameserver actually queried. a resolver with
+    # one nameserver is keyed by it, and one with several by all of them,
+    # joined with commas.
+    return ",".join(nameserver_key(nameserver) for nameserver in resolver.nameservers)
+
+
+class RateLimiter(Protocol):
+    # both return the number of seconds the caller spent queued.
+    async def acquire(self, upstream: str) -> float: ...
+
+    def acquire_sync(self, upstream: str) -> float: ...
+
+
+class TokenBucket:
+    # a token bucket that never rejects: callers that find it empty reserve the
+    # next token to be refilled and wait for it. reservations are handed out in
+    # arrival order, so waiting callers are served first-come, first-served.
+    # the bucket is thread safe, so sync and async lookups can share it.
+
+    def __init__(self, rate: float, *, burst: int = 1) -> None:
+        if rate <= 0:
+            raise ValueError(f"rate must be positive: {rate=}")
+        if burst < 1:
+            raise ValueError(f"burst must be at least 1: {burst=}")
+
+        self.rate: float = rate
+        self.burst: int = burst
+
+        self.acquired: int = 0
+        self.queued: int = 0
+        self.total_wait: float = 0.0
+        self.max_wait: float = 0.0
+
+        self._tokens: float = float(burst)
+        self._updated: float = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.acquired if self.acquired else 0.0
+
+    def _refill(self) -> float:
+        now: float = time.monotonic()
+        self._tokens = min(
+            float(self.burst), self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+        return now
+
+    def reserve(self) -> float:
+        # takes a token, returning how long to wait before it may be used.
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+
+            wait: float = max(0.0, -self._tokens / self.rate)
+            self.acquired += 1
+            if wait > 0:
+                self.queued += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            return wait
+
+    def _refund(self, due: float) -> None:
+        # gives back what is left of a token reserved for `due`. a waiter only
+        # gave up the part that had not been refilled by the time it left, so
+        # the bucket never ends up with more than it had without the waiter.
+        with self._lock:
+            now: float = self._refill()
+            unrefilled: float = min(1.0, max(0.0, due - now) * self.rate)
+            self._tokens = min(float(self.burst), self._tokens + unrefilled)
+
+    async def acquire(self) -> float:
+        wait: float = self.reserve()
+        if wait > 0:
+            due: float = time.monotonic() + wait
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self._refund(due)
+                raise
+        return wait
+
+    def acquire_sync(self) -> float:
+        wait: float = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class NameserverRateLimiter:
+    # one token bucket per nameserver (keyed by `nameserver_key`). nameservers
+    # without a configured bucket get one at `default_rate` / `default_burst`,
+    # or are not limited at all when there is no default rate.
+
+    def __init__(
+        self,
+        limits: Mapping[str, TokenBucket] | None = None,
+        *,
+        default_rate: float | None = None,
+        default_burst: int = 1,
+    ) -> None:
+        self.default_rate: float | None = default_rate
+        self.default_burst: int = default_burst
+        self.buckets: dict[str, TokenBucket] = dict(limits or {})
+        self._lock = threading.Lock()
+
+    def bucket_for(self, upstream: str) -> TokenBucket | None:
+        bucket = self.buckets.get(upstream)
+        if bucket is None and self.default_rate is not None:
+            with self._lock:
+                bucket = self.buckets.get(upstream)
+                if bucket is None:
+                    bucket = self.buckets[upstream] = TokenBucket(
+                        self.default_rate, burst=self.default_burst
+                    )
+        return bucket
+
+    async def acquire(self, upstream: str) -> float:
+        bucket = self.bucket_for(upstream)
+        return 0.0 if bucket is None else await bucket.acquire()
+
+    def acquire_sync(self, upstream: str) -> float:
+        bucket = self.bucket_for(upstream)
+        return 0.0 if bucket is None else bucket.acquire_sync()
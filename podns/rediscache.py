@@ -0,0 +1,382 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import socket
+import threading
+from typing import (
+    BinaryIO,
+    Iterable,
+    Sequence,
+)
+
+from podns.cache import (
+    CACHE_MISS,
+    CachedLookup,
+    CacheResult,
+)
+from podns.codec import decode_response, encode_response
+from podns.error import PODNSCacheError, PODNSCodecError
+
+
+__all__: tuple[str, ...] = ("RedisCache",)
+
+
+type _Reply = bytes | int | list[_Reply] | None
+
+# failures that leave a connection in an unknown state. the cache treats them
+# as misses, so lookups fall through to DNS while the server is unavailable.
+_CONNECTION_ERRORS: tuple[type[BaseException], ...] = (
+    OSError,
+    EOFError,
+    TimeoutError,
+    ValueError,
+    PODNSCacheError,
+)
+
+
+def _pack_command(*args: bytes | str | int) -> bytes:
+    parts: list[bytes] = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif isinstance(arg, int):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+def _parse_line(line: bytes) -> tuple[bytes, bytes]:
+    if not line.endswith(b"\r\n"):
+        raise PODNSCacheError("Connection closed mid-reply")
+    return line[:1], line[1:-2]
+
+
+def _read_reply(stream: BinaryIO) -> _Reply:
+    kind, body = _parse_line(stream.readline())
+    match kind:
+        case b"+":
+            return body
+        case b"-":
+            raise PODNSCacheError(f"Redis error: {body.decode(errors='replace')}")
+        case b":":
+            return int(body)
+        case b"$":
+            length: int = int(body)
+            if length < 0:
+                return None
+            data: bytes = stream.read(length + 2)
+            if len(data) != length + 2:
+                raise PODNSCacheError("Connection closed mid-reply")
+            return data[:-2]
+        case b"*":
+            count: int = int(body)
+            if count < 0:
+                return None
+            return [_read_reply(stream) for _ in range(count)]
+    raise PODNSCacheError(f"Unexpected reply type: {kind=}")
+
+
+async def _read_reply_async(reader: asyncio.StreamReader) -> _Reply:
+    kind, body = _parse_line(await reader.readline())
+    match kind:
+        case b"+":
+            return body
+        case b"-":
+            raise PODNSCacheError(f"Redis error: {body.decode(errors='replace')}")
+        case b":":
+            return int(body)
+        case b"$":
+            length: int = int(body)
+            if length < 0:
+                return None
+            return (await reader.readexactly(length + 2))[:-2]
+        case b"*":
+            count: int = int(body)
+            if count < 0:
+                return None
+            return [await _read_reply_async(reader) for _ in range(count)]
+    raise PODNSCacheError(f"Unexpected reply type: {kind=}")
+
+
+def _encode_value(value: CachedLookup) -> bytes:
+    # NXDOMAIN is stored as an empty value, as no encoded response is empty.
+    return b"" if value is None else encode_response(value)
+
+
+def _decode_value(data: _Reply) -> CacheResult:
+    if data is None:
+        return CACHE_MISS
+    if not isinstance(data, bytes):
+        raise PODNSCacheError(f"Unexpected value type: {type(data)=}")
+    return None if data == b"" else decode_response(data)
+
+
+class _Connection:
+    __slots__ = ("socket", "stream")
+
+    def __init__(self, sock: socket.socket) -> None:
+        self.socket = sock
+        self.stream: BinaryIO = sock.makefile("rb")
+
+    def close(self) -> None:
+        self.stream.close()
+        self.socket.close()
+
+
+class _AsyncConnection:
+    __slots__ = ("reader", "writer")
+
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+# a `CacheBackend` storing lookups on a Redis (or Redis-protocol) server, so
+# that many processes share one cache. values are the compact encoding from
+# `podns.codec`, set to expire with the cache's `ttl` (`negative_ttl` for
+# NXDOMAIN), and keys are prefixed by `prefix`.
+#
+# both interfaces keep up to `max_connections` idle connections for reuse.
+# the cache is an optimisation, so a server that is down, slow (past
+# `timeout`) or holding unreadable values makes lookups miss instead of fail;
+# such failures are counted in `errors`.
+class RedisCache:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 6379,
+        *,
+        db: int = 0,
+        password: str | None = None,
+        prefix: str = "podns:",
+        ttl: float = 300.0,
+        negative_ttl: float = 60.0,
+        timeout: float = 1.0,
+        max_connections: int = 8,
+    ) -> None:
+        self.host: str = host
+        self.port: int = port
+        self.db: int = db
+        self.password: str | None = password
+        self.prefix: str = prefix
+        self.ttl: float = ttl
+        self.negative_ttl: float = negative_ttl
+        self.timeout: float = timeout
+        self.max_connections: int = max_connections
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.errors: int = 0
+
+        self._idle: list[_Connection] = []
+        self._lock = threading.Lock()
+        self._async_idle: list[_AsyncConnection] = []
+        self._async_loop: asyncio.AbstractEventLoop | None = None
+
+    def _setup_commands(self) -> list[bytes]:
+        commands: list[bytes] = []
+        if self.password is not None:
+            commands.append(_pack_command("AUTH", self.password))
+        if self.db != 0:
+            commands.append(_pack_command("SELECT", self.db))
+        return commands
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    def _expiry_ms(self, value: CachedLookup, ttl: float | None) -> int:
+        limit: float = self.ttl if value is not None else self.negative_ttl
+        return int(min(limit, ttl if ttl is not None else limit) * 1000)
+
+    def _count(self, results: Iterable[CacheResult]) -> None:
+        for result in results:
+            if result is CACHE_MISS:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+    def _checkout(self) -> _Connection:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        connection = _Connection(sock)
+        try:
+            for command in self._setup_commands():
+                sock.sendall(command)
+                _read_reply(connection.stream)
+        except BaseException:
+            connection.close()
+            raise
+        return connection
+
+    def _checkin(self, connection: _Connection) -> None:
+        with self._lock:
+            if len(self._idle) < self.max_connections:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def _execute(self, *commands: bytes) -> list[_Reply]:
+        # sends the commands as one pipeline, returning every reply.
+        connection = self._checkout()
+        try:
+            connection.socket.sendall(b"".join(commands))
+            replies: list[_Reply] = [_read_reply(connection.stream) for _ in commands]
+        except BaseException:
+            connection.close()
+            raise
+        self._checkin(connection)
+        return replies
+
+    async def _checkout_async(self) -> _AsyncConnection:
+        loop = asyncio.get_running_loop()
+        if loop is not self._async_loop:
+            # connections belong to the loop that opened them.
+            self._async_loop = loop
+            self._async_idle = []
+        if self._async_idle:
+            return self._async_idle.pop()
+
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        connection = _AsyncConnection(reader, writer)
+        try:
+            for command in self._setup_commands():
+                writer.write(command)
+                await _read_reply_async(reader)
+        except BaseException:
+            connection.close()
+            raise
+        return connection
+
+    async def _execute_async(self, *commands: bytes) -> list[_Reply]:
+        connection: _AsyncConnection | None = None
+        try:
+            async with asyncio.timeout(self.timeout):
+                connection = await self._checkout_async()
+                connection.writer.write(b"".join(commands))
+                await connection.writer.drain()
+                replies: list[_Reply] = [
+                    await _read_reply_async(connection.reader) for _ in commands
+                ]
+        except BaseException:
+            if connection is not None:
+                connection.close()
+            raise
+        if len(self._async_idle) < self.max_connections:
+            self._async_idle.append(connection)
+        else:
+            connection.close()
+        return replies
+
+    def _decode_many(self, replies: _Reply) -> list[CacheResult]:
+        if not isinstance(replies, list):
+            raise PODNSCacheError(f"Unexpected MGET reply: {type(replies)=}")
+        results: list[CacheResult] = []
+        for reply in replies:
+            try:
+                results.append(_decode_value(reply))
+            except PODNSCodecError:
+                self.errors += 1
+                results.append(CACHE_MISS)
+        self._count(results)
+        return results
+
+    def _set_command(self, key: str, value: CachedLookup, ttl: float | None) -> bytes:
+        return _pack_command(
+            "SET",
+            self._key(key),
+            _encode_value(value),
+            "PX",
+            max(1, self._expiry_ms(value, ttl)),
+        )
+
+    async def get(self, key: str) -> CacheResult:
+        return (await self.get_many([key]))[0]
+
+    async def get_many(self, keys: Sequence[str]) -> list[CacheResult]:
+        if not keys:
+            return []
+        try:
+            (replies,) = await self._execute_async(
+                _pack_command("MGET", *map(self._key, keys))
+            )
+        except _CONNECTION_ERRORS:
+            self.errors += 1
+            self.misses += len(keys)
+            return [CACHE_MISS] * len(keys)
+        return self._decode_many(replies)
+
+    async def set(
+        self, key: str, value: CachedLookup, *, ttl: float | None = None
+    ) -> None:
+        if self._expiry_ms(value, ttl) <= 0:
+            return
+        try:
+            await self._execute_async(self._set_command(key, value, ttl))
+        except _CONNECTION_ERRORS:
+            self.errors += 1
+
+    def get_sync(self, key: str) -> CacheResult:
+        return self.get_many_sync([key])[0]
+
+    def get_many_sync(self, keys: Sequence[str]) -> list[CacheResult]:
+        if not keys:
+            return []
+        try:
+            (replies,) = self._execute(_pack_command("MGET", *map(self._key, keys)))
+        except _CONNECTION_ERRORS:
+            self.errors += 1
+            self.misses += len(keys)
+            return [CACHE_MISS] * len(keys)
+        return self._decode_many(replies)
+
+    def set_sync(
+        self, key: str, value: CachedLookup, *, ttl: float | None = None
+    ) -> None:
+        if self._expiry_ms(value, ttl) <= 0:
+            return
+        try:
+            self._execute(self._set_command(key, value, ttl))
+        except _CONNECTION_ERRORS:
+            self.errors += 1
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    async def aclose(self) -> None:
+        idle, self._async_idle = self._async_idle, []
+        for connection in idle:
+            connection.close()
+            await connection.writer.wait_closed()
@@ -0,0 +1,124 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import AsyncIterator
+
+
+__all__: tuple[str, ...] = (
+    "LookupPriority",
+    "LookupScheduler",
+)
+
+
+class LookupPriority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class LookupScheduler:
+    # shares a fixed number of in-flight lookups between priority classes.
+    # whenever a slot frees up it goes to the highest priority waiter (and in
+    # arrival order within a class), so interactive lookups are never queued
+    # behind background work. `reserved` slots are only ever handed to
+    # interactive lookups, keeping headroom for them during a crawl.
+
+    def __init__(self, capacity: int, *, reserved: int = 0) -> None:
+        if capacity < 1:
+            raise ValueError(f"capacity must be at least 1: {capacity=}")
+        if not 0 <= reserved < capacity:
+            raise ValueError(f"reserved must be within [0, capacity): {reserved=}")
+
+        self.capacity: int = capacity
+        self.reserved: int = reserved
+        self.in_flight: int = 0
+
+        self.dispatched: dict[LookupPriority, int] = dict.fromkeys(LookupPriority, 0)
+        self.total_wait: dict[LookupPriority, float] = dict.fromkeys(
+            LookupPriority, 0.0
+        )
+
+        self._sequence = itertools.count()
+        self._waiters: list[tuple[LookupPriority, int, asyncio.Future[None]]] = []
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for *_, waiter in self._waiters if not waiter.done())
+
+    def _limit_for(self, priority: LookupPriority) -> int:
+        if priority == LookupPriority.INTERACTIVE:
+            return self.capacity
+        return self.capacity - self.reserved
+
+    def _dispatch(self) -> None:
+        while self._waiters:
+            priority, _, waiter = self._waiters[0]
+            if waiter.done():  # cancelled while queued
+                heapq.heappop(self._waiters)
+                continue
+            if self.in_flight >= self._limit_for(priority):
+                return
+            heapq.heappop(self._waiters)
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    async def acquire(
+        self, priority: LookupPriority = LookupPriority.INTERACTIVE
+    ) -> float:
+        # returns the number of seconds spent queued.
+        started: float = time.monotonic()
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # a slot was handed to us just before the cancellation.
+                self.release()
+            raise
+
+        waited: float = time.monotonic() - started
+        self.dispatched[priority] += 1
+        self.total_wait[priority] += waited
+        return waited
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(
+        self, priority: LookupPriority = LookupPriority.INTERACTIVE
+    ) -> AsyncIterator[float]:
+        waited: float = await self.acquire(priority)
+        try:
+            yield waited
+        finally:
+            self.release()
@@ -0,0 +1,153 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import random
+import time
+from dataclasses import dataclass
+from typing import Sequence
+
+import dns.nameserver
+
+from podns.ratelimit import nameserver_key
+
+
+__all__: tuple[str, ...] = (
+    "UpstreamHealth",
+    "NameserverSelector",
+)
+
+
+@dataclass(slots=True)
+class UpstreamHealth:
+    # smoothed round-trip time, or None until the first answer.
+    rtt: float | None = None
+    # smoothed fraction of queries that failed.
+    failure_score: float = 0.0
+    consecutive_failures: int = 0
+    # set while the circuit breaker holds the upstream out of rotation.
+    open_until: float | None = None
+
+
+class NameserverSelector:
+    # orders nameservers for each query, fastest healthy one first. every
+    # upstream's round-trip time and failure rate are smoothed with weight
+    # `smoothing` per sample, and an upstream is ranked by its expected cost:
+    # its round-trip time plus its failure rate times `failure_penalty` (what a
+    # failed query costs before the next upstream is tried). upstreams not yet
+    # heard from are tried first, and with probability `probe_rate` a query
+    # goes to a random other healthy upstream first, so a recovered or newly
+    # fast one is noticed.
+    #
+    # after `failure_threshold` failures in a row the circuit breaker takes an
+    # upstream out of rotation for `cooldown` seconds: it is only tried once
+    # the others have failed. once the cooldown is over, one query is sent to
+    # it first, closing the breaker if it succeeds and restarting the cooldown
+    # if not.
+
+    def __init__(
+        self,
+        *,
+        smoothing: float = 0.125,
+        failure_penalty: float = 1.0,
+        probe_rate: float = 0.05,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+    ) -> None:
+        if not 0 < smoothing <= 1:
+            raise ValueError(f"smoothing must be within (0, 1]: {smoothing=}")
+        if not 0 <= probe_rate <= 1:
+            raise ValueError(f"probe_rate must be within [0, 1]: {probe_rate=}")
+        if failure_threshold < 1:
+            raise ValueError(
+                f"failure_threshold must be at least 1: {failure_threshold=}"
+            )
+
+        self.smoothing: float = smoothing
+        self.failure_penalty: float = failure_penalty
+        self.probe_rate: float = probe_rate
+        self.failure_threshold: int = failure_threshold
+        self.cooldown: float = cooldown
+
+        self.probes: int = 0
+        self.breaker_trips: int = 0
+
+        self.upstreams: dict[str, UpstreamHealth] = {}
+
+    def health(self, nameserver: str | dns.nameserver.Nameserver) -> UpstreamHealth:
+        key: str = nameserver_key(nameserver)
+        health = self.upstreams.get(key)
+        if health is None:
+            health = self.upstreams[key] = UpstreamHealth()
+        return health
+
+    def _cost(self, health: UpstreamHealth) -> float:
+        if health.rtt is None:
+            return float("-inf")
+        return health.rtt + health.failure_score * self.failure_penalty
+
+    def order[N: str | dns.nameserver.Nameserver](
+        self, nameservers: Sequence[N]
+    ) -> list[N]:
+        now: float = time.monotonic()
+        healthy: list[tuple[float, N]] = []
+        recovering: list[N] = []
+        tripped: list[N] = []
+        for nameserver in nameservers:
+            health = self.health(nameserver)
+            if health.open_until is None:
+                healthy.append((self._cost(health), nameserver))
+            elif health.open_until <= now:
+                # only one query at a time gets to find out if it recovered.
+                health.open_until = now + self.cooldown
+                recovering.append(nameserver)
+            else:
+                tripped.append(nameserver)
+
+        healthy.sort(key=lambda item: item[0])
+        ordered: list[N] = [nameserver for _, nameserver in healthy]
+        if len(ordered) > 1 and random.random() < self.probe_rate:
+            self.probes += 1
+            ordered.insert(0, ordered.pop(random.randrange(1, len(ordered))))
+        return recovering + ordered + tripped
+
+    def record_success(
+        self, nameserver: str | dns.nameserver.Nameserver, rtt: float
+    ) -> None:
+        health = self.health(nameserver)
+        if health.rtt is None:
+            health.rtt = rtt
+        else:
+            health.rtt += self.smoothing * (rtt - health.rtt)
+        health.failure_score -= self.smoothing * health.failure_score
+        health.consecutive_failures = 0
+        health.open_until = None
+
+    def record_failure(self, nameserver: str | dns.nameserver.Nameserver) -> None:
+        health = self.health(nameserver)
+        health.failure_score += self.smoothing * (1.0 - health.failure_score)
+        health.consecutive_failures += 1
+        if health.consecutive_failures >= self.failure_threshold:
+            if health.open_until is None:
+                self.breaker_trips += 1
+            health.open_until = time.monotonic() + self.cooldown
@@ -0,0 +1,361 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+from typing import (
+    Final,
+    Iterable,
+    Iterator,
+    Mapping,
+)
+
+from podns.error import PODNSStoreError
+from podns.pronouns import (
+    PronounRecord,
+    Pronouns,
+    PronounsResponse,
+    PronounTag,
+)
+
+
+__all__: tuple[str, ...] = (
+    "ResultStore",
+    "write_result_store",
+)
+
+
+# file layout (all integers little endian):
+#   header
+#   string table: (string_count + 1) u64 offsets, followed by the utf-8 blob
+#   entries: domain string id, flags, record count, then each record
+#   index: open addressed (hash, entry offset + 1) buckets, 0 marks empty
+STORE_MAGIC: Final[bytes] = b"PODNSRS\x00"
+STORE_VERSION: Final[int] = 1
+
+_HEADER: Final[struct.Struct] = struct.Struct("<8sIIIIQQQ")
+_STRING_OFFSET: Final[struct.Struct] = struct.Struct("<Q")
+_ENTRY: Final[struct.Struct] = struct.Struct("<IBH")
+_RECORD: Final[struct.Struct] = struct.Struct("<IIIIIB")
+_BUCKET: Final[struct.Struct] = struct.Struct("<QQ")
+
+_NO_STRING: Final[int] = 0xFFFFFFFF
+_MAX_RECORDS: Final[int] = 0xFFFF
+_FLAG_ANY_PRONOUNS: Final[int] = 0b01
+_FLAG_NAME_ONLY: Final[int] = 0b10
+_TAGS: Final[tuple[PronounTag, ...]] = tuple(PronounTag)
+
+
+def _hash_domain(domain: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(domain, digest_size=8).digest(), "little")
+
+
+def _bucket_count_for(entry_count: int) -> int:
+    # keep the load factor at or below 0.5 so probe chains stay short.
+    bucket_count: int = 1
+    while bucket_count < entry_count * 2:
+        bucket_count <<= 1
+    return bucket_count
+
+
+def write_result_store(
+    path: str | os.PathLike[str],
+    results: Mapping[str, PronounsResponse] | Iterable[tuple[str, PronounsResponse]],
+) -> None:
+    items = results.items() if isinstance(results, Mapping) else results
+
+    string_ids: dict[str, int] = {}
+
+    def intern(value: str | None) -> int:
+        if value is None:
+            return _NO_STRING
+        string_id = string_ids.get(value)
+        if string_id is None:
+            string_id = string_ids[value] = len(string_ids)
+        return string_id
+
+    entries = bytearray()
+    entry_offsets: dict[str, int] = {}
+    for domain, response in items:
+        if domain in entry_offsets:
+            raise PODNSStoreError(f"Duplicate domain in result store: {domain=}")
+        entry_offsets[domain] = len(entries)
+        if len(response.records) > _MAX_RECORDS:
+            raise PODNSStoreError(
+                f"Too many records for one domain: {domain=} {len(response.records)=}"
+            )
+
+        flags: int = 0
+        if response.uses_any_pronouns:
+            flags |= _FLAG_ANY_PRONOUNS
+        if response.uses_name_only:
+            flags |= _FLAG_NAME_ONLY
+        entries += _ENTRY.pack(intern(domain), flags, len(response.records))
+
+        for record in response.records:
+            tag_mask: int = 0
+            for tag in record.tags:
+                tag_mask |= 1 << _TAGS.index(tag)
+            entries += _RECORD.pack(
+                *(intern(p) for p in record.pronouns.to_list()),
+                tag_mask,
+            )
+
+    if len(string_ids) >= _NO_STRING:
+        raise PODNSStoreError(f"Too many distinct strings: {len(string_ids)=}")
+
+    string_offsets = bytearray()
+    string_blob = bytearray()
+    for value in string_ids:
+        string_offsets += _STRING_OFFSET.pack(len(string_blob))
+        string_blob += value.encode()
+    string_offsets += _STRING_OFFSET.pack(len(string_blob))
+
+    strings_offset: int = _HEADER.size
+    entries_offset: int = strings_offset + len(string_offsets) + len(string_blob)
+    index_offset: int = entries_offset + len(entries)
+
+    bucket_count: int = _bucket_count_for(len(entry_offsets))
+    buckets: list[tuple[int, int]] = [(0, 0)] * bucket_count
+    for domain, entry_offset in entry_offsets.items():
+        domain_hash: int = _hash_domain(domain.encode())
+        slot: int = domain_hash & (bucket_count - 1)
+        while buckets[slot][1] != 0:
+            slot = (slot + 1) & (bucket_count - 1)
+        buckets[slot] = (domain_hash, entry_offset + 1)
+
+    header: bytes = _HEADER.pack(
+        STORE_MAGIC,
+        STORE_VERSION,
+        len(entry_offsets),
+        bucket_count,
+        len(string_ids),
+        strings_offset,
+        entries_offset,
+        index_offset,
+    )
+
+    # write next to the target and swap it in, so readers that still have the
+    # previous snapshot mapped keep a consistent view of it.
+    temporary_path: str = f"{os.fspath(path)}.tmp"
+    with open(temporary_path, "wb") as f:
+        f.write(header)
+        f.write(string_offsets)
+        f.write(string_blob)
+        f.write(entries)
+        for bucket in buckets:
+            f.write(_BUCKET.pack(*bucket))
+    os.replace(temporary_path, path)
+
+
+class ResultStore:
+    __slots__ = (
+        "_mmap",
+        "_entry_count",
+        "_bucket_count",
+        "_string_count",
+        "_strings_offset",
+        "_blob_offset",
+        "_entries_offset",
+        "_index_offset",
+    )
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        with open(path, "rb") as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:  # empty file
+                raise PODNSStoreError(f"Not a result store: {path=}") from e
+
+        if len(self._mmap) < _HEADER.size:
+            self._mmap.close()
+            raise PODNSStoreError(f"Not a result store: {path=}")
+
+        (
+            magic,
+            version,
+            self._entry_count,
+            self._bucket_count,
+            self._string_count,
+            self._strings_offset,
+            self._entries_offset,
+            self._index_offset,
+        ) = _HEADER.unpack_from(self._mmap, 0)
+
+        if magic != STORE_MAGIC:
+            self._mmap.close()
+            raise PODNSStoreError(f"Not a result store: {path=}")
+        if version != STORE_VERSION:
+            self._mmap.close()
+            raise PODNSStoreError(f"Unsupported result store version: {version=}")
+        if self._index_offset + self._bucket_count * _BUCKET.size != len(self._mmap):
+            self._mmap.close()
+            raise PODNSStoreError(f"Truncated result store: {path=}")
+
+        self._blob_offset: int = (
+            self._strings_offset + (self._string_count + 1) * _STRING_OFFSET.size
+        )
+        # the sections must follow each other in order, and the index is probed
+        # with a mask, so its size must be a power of two.
+        if not (
+            _HEADER.size <= self._strings_offset
+            and self._blob_offset <= self._entries_offset <= self._index_offset
+            and self._bucket_count > 0
+            and self._bucket_count & (self._bucket_count - 1) == 0
+        ):
+            self._mmap.close()
+            raise PODNSStoreError(f"Corrupt result store: {path=}")
+
+    def _check_span(
+        self, start: int, end: int, limit_start: int, limit_end: int
+    ) -> None:
+        # offsets read from the file are checked against the section they point
+        # into, so a corrupt store raises instead of reading past it.
+        if not limit_start <= start <= end <= limit_end:
+            raise PODNSStoreError(
+                f"Corrupt result store: {start=} {end=} outside {limit_start}..{limit_end}"
+            )
+
+    def _string_bytes(self, string_id: int) -> bytes:
+        if string_id >= self._string_count:
+            raise PODNSStoreError(f"Corrupt result store: {string_id=} out of range")
+        position: int = self._strings_offset + string_id * _STRING_OFFSET.size
+        (start,) = _STRING_OFFSET.unpack_from(self._mmap, position)
+        (end,) = _STRING_OFFSET.unpack_from(self._mmap, position + _STRING_OFFSET.size)
+        start += self._blob_offset
+        end += self._blob_offset
+        self._check_span(start, end, self._blob_offset, self._entries_offset)
+        return self._mmap[start:end]
+
+    def _entry_position(self, entry_offset: int) -> int:
+        position: int = self._entries_offset + entry_offset - 1
+        self._check_span(
+            position, position + _ENTRY.size, self._entries_offset, self._index_offset
+        )
+        return position
+
+    def _string(self, string_id: int) -> str | None:
+        if string_id == _NO_STRING:
+            return None
+        return self._string_bytes(string_id).decode()
+
+    def _find_entry(self, domain: str) -> int | None:
+        encoded: bytes = domain.encode()
+        domain_hash: int = _hash_domain(encoded)
+        mask: int = self._bucket_count - 1
+        slot: int = domain_hash & mask
+        # the writer always leaves empty buckets, so a probe visiting every
+        # bucket without reaching one is reading a corrupt index.
+        for _ in range(self._bucket_count):
+            bucket_hash, entry_offset = _BUCKET.unpack_from(
+                self._mmap, self._index_offset + slot * _BUCKET.size
+            )
+            if entry_offset == 0:
+                return None
+            if bucket_hash == domain_hash:
+                position: int = self._entry_position(entry_offset)
+                domain_id, _, _ = _ENTRY.unpack_from(self._mmap, position)
+                if self._string_bytes(domain_id) == encoded:
+                    return position
+            slot = (slot + 1) & mask
+        raise PODNSStoreError("Corrupt result store: index has no empty bucket")
+
+    def _decode_entry(self, position: int) -> PronounsResponse:
+        _, flags, record_count = _ENTRY.unpack_from(self._mmap, position)
+        position += _ENTRY.size
+        self._check_span(
+            position,
+            position + record_count * _RECORD.size,
+            self._entries_offset,
+            self._index_offset,
+        )
+
+        records: set[PronounRecord] = set()
+        for _ in range(record_count):
+            *string_ids, tag_mask = _RECORD.unpack_from(self._mmap, position)
+            position += _RECORD.size
+            subject, object_, possessive_determiner, possessive_pronoun, reflexive = (
+                self._string(string_id) for string_id in string_ids
+            )
+            records.add(
+                PronounRecord(
+                    pronouns=Pronouns(
+                        subject=subject,
+                        object=object_,
+                        possessive_determiner=possessive_determiner,
+                        possessive_pronoun=possessive_pronoun,
+                        reflexive=reflexive,
+                    ),
+                    tags=frozenset(
+                        tag for i, tag in enumerate(_TAGS) if tag_mask & (1 << i)
+                    ),
+                )
+            )
+
+        return PronounsResponse(
+            uses_any_pronouns=bool(flags & _FLAG_ANY_PRONOUNS),
+            uses_name_only=bool(flags & _FLAG_NAME_ONLY),
+            records=frozenset(records),
+        )
+
+    def get(
+        self, domain: str, default: PronounsResponse | None = None
+    ) -> PronounsResponse | None:
+        position = self._find_entry(domain)
+        if position is None:
+            return default
+        return self._decode_entry(position)
+
+    def __getitem__(self, domain: str) -> PronounsResponse:
+        position = self._find_entry(domain)
+        if position is None:
+            raise KeyError(domain)
+        return self._decode_entry(position)
+
+    def __contains__(self, domain: object) -> bool:
+        return isinstance(domain, str) and self._find_entry(domain) is not None
+
+    def __len__(self) -> int:
+        return self._entry_count
+
+    def __iter__(self) -> Iterator[str]:
+        for slot in range(self._bucket_count):
+            _, entry_offset = _BUCKET.unpack_from(
+                self._mmap, self._index_offset + slot * _BUCKET.size
+            )
+            if entry_offset != 0:
+                position: int = self._entry_position(entry_offset)
+                domain_id, _, _ = _ENTRY.unpack_from(self._mmap, position)
+                yield self._string_bytes(domain_id).decode()
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def __enter__(self) -> ResultStore:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
@@ -0,0 +1,734 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import abc
+import asyncio
+import base64
+import random
+import struct
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from typing import (
+    Any,
+    Mapping,
+    Self,
+    Sequence,
+)
+
+import dns.asyncresolver
+import dns.flags
+import dns.message
+import dns.name
+import dns.nameserver
+import dns.rcode
+import dns.rdataclass
+import dns.rdatatype
+import dns.rdtypes.ANY.TXT
+import dns.resolver
+import dns.rrset
+
+from podns.doh import DoHResolver
+from podns.rediscache import RedisCache
+
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+    import h2.exceptions
+    import h2.settings
+except ImportError:  # pragma: no cover
+    h2 = None
+
+
+__all__: tuple[str, ...] = (
+    "StubDNSServer",
+    "StubDoHServer",
+    "StubRedisServer",
+    "synthetic_zones",
+)
+
+
+_TXT_STRING_LIMIT: int = 255
+_BIND_ATTEMPTS: int = 10
+_SYNTHETIC_RECORDS: tuple[tuple[str, ...], ...] = (
+    ("she/her",),
+    ("he/him",),
+    ("they/them",),
+    ("she/her;preferred", "they/them"),
+    ("he/him/his/his/himself;preferred", "they/them/their/theirs/themself"),
+    ("xe/xem/xyr/xyrs/xemself",),
+    ("it/its",),
+    ("*",),
+    ("!",),
+)
+
+
+def _zone_key(domain: str) -> str:
+    return domain.strip().rstrip(".").lower()
+
+
+class _BackgroundServer(abc.ABC):
+    # runs a server on its own event loop on a background thread, so it can be
+    # used from both sync and async code.
+    _thread_name: str = "podns-stub"
+
+    def __init__(self) -> None:
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._error: BaseException | None = None
+
+    @abc.abstractmethod
+    async def _serve(self) -> None: ...
+
+    @abc.abstractmethod
+    async def _shutdown(self) -> None: ...
+
+    def _run(self, started: threading.Event) -> None:
+        assert self._loop is not None
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._serve())
+        except BaseException as e:
+            self._error = e
+            started.set()
+            self._loop.close()
+            return
+        started.set()
+        self._loop.run_forever()
+
+        self._loop.run_until_complete(self._shutdown())
+        self._loop.close()
+
+    def start(self) -> None:
+        started = threading.Event()
+        self._error = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run, args=(started,), name=self._thread_name, daemon=True
+        )
+        self._thread.start()
+        started.wait()
+        if self._error is not None:
+            self._thread.join()
+            self._loop = None
+            self._thread = None
+            raise self._error
+
+    def stop(self) -> None:
+        if self._loop is None or self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop = None
+        self._thread = None
+
+    def __enter__(self) -> Self:
+        self.start()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.stop()
+
+
+class _StubDatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server: StubDNSServer) -> None:
+        self._server = server
+        self._transport: asyncio.DatagramTransport | None = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self._transport = transport  # type: ignore[assignment]
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        server = self._server
+        if server._should_drop():
+            return
+        response = server._respond(data, tcp=False)
+        if response is None or self._transport is None:
+            return
+
+        server._in_flight += 1
+        delay: float = server._delay()
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, self._send, response, addr)
+        else:
+            self._send(response, addr)
+
+    def _send(self, response: bytes, addr: tuple[str, int]) -> None:
+        self._server._in_flight -= 1
+        if self._transport is not None and not self._transport.is_closing():
+            self._transport.sendto(response, addr)
+
+
+# an authoritative server for `pronouns.` TXT records listening on localhost, for
+# tests and benchmarks that must not touch the real network. `zones` maps a domain
+# to the records served at `pronouns.<domain>`.
+#
+# faults can be injected for load and resilience testing: `latency` delays every
+# response (plus up to `jitter` seconds more, at random), `drop_rate` and
+# `servfail_rate` drop or fail that share of queries (reproducibly, given a
+# `seed`), and `max_in_flight` drops queries arriving while that many responses
+# are still pending, like an overloaded upstream.
+# `truncation_rate` answers that share of UDP queries with an empty, truncated
+# response, sending the client over to TCP, and `nxdomain_rate` answers that
+# share of queries for served domains with NXDOMAIN.
+#
+# for a hierarchy of servers (to test iterative resolution), `delegations` maps
+# a zone to its nameservers and their glue addresses (None for no glue), and
+# names under it are answered with a referral. `hosts` maps names to the IPv4
+# address served as their A record.
+class StubDNSServer(_BackgroundServer):
+    _thread_name = "podns-stub-dns"
+
+    def __init__(
+        self,
+        zones: Mapping[str, Sequence[str]] | None = None,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        ttl: int = 300,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        drop_rate: float = 0.0,
+        servfail_rate: float = 0.0,
+        truncation_rate: float = 0.0,
+        nxdomain_rate: float = 0.0,
+        max_in_flight: int | None = None,
+        delegations: Mapping[str, Mapping[str, str | None]] | None = None,
+        hosts: Mapping[str, str] | None = None,
+        seed: int | None = None,
+    ) -> None:
+        super().__init__()
+        self.zones: dict[str, list[str]] = {
+            _zone_key(domain): list(records)
+            for domain, records in (zones or {}).items()
+        }
+        self.delegations: dict[dns.name.Name, dict[dns.name.Name, str | None]] = {
+            dns.name.from_text(zone): {
+                dns.name.from_text(nameserver): address
+                for nameserver, address in nameservers.items()
+            }
+            for zone, nameservers in (delegations or {}).items()
+        }
+        self.hosts: dict[dns.name.Name, str] = {
+            dns.name.from_text(name): address for name, address in (hosts or {}).items()
+        }
+        self.host: str = host
+        self.port: int = port
+        self.ttl: int = ttl
+        self.latency: float = latency
+        self.jitter: float = jitter
+        self.drop_rate: float = drop_rate
+        self.servfail_rate: float = servfail_rate
+        self.truncation_rate: float = truncation_rate
+        self.nxdomain_rate: float = nxdomain_rate
+        self.max_in_flight: int | None = max_in_flight
+        self.queries: int = 0
+        self.dropped: int = 0
+        self.truncated: int = 0
+        self.connections: int = 0
+
+        self._random = random.Random(seed)
+        self._in_flight: int = 0
+
+        self._udp_transport: asyncio.DatagramTransport | None = None
+        self._tcp_server: asyncio.Server | None = None
+        self._tcp_writers: set[asyncio.StreamWriter] = set()
+
+    def _should_drop(self) -> bool:
+        if (
+            self.max_in_flight is not None and self._in_flight >= self.max_in_flight
+        ) or self._roll(self.drop_rate):
+            self.dropped += 1
+            return True
+        return False
+
+    def _delay(self) -> float:
+        if self.jitter > 0:
+            return self.latency + self._random.uniform(0, self.jitter)
+        return self.latency
+
+    def _roll(self, rate: float) -> bool:
+        return rate > 0 and self._random.random() < rate
+
+    def _refer(self, response: dns.message.Message, name: dns.name.Name) -> bool:
+        # answers with a referral to the closest zone delegated above `name`.
+        for depth in range(len(name)):
+            zone: dns.name.Name = name.split(len(name) - depth)[1]
+            nameservers = self.delegations.get(zone)
+            if nameservers is None:
+                continue
+            response.flags &= ~dns.flags.AA
+            response.authority.append(
+                dns.rrset.from_text_list(
+                    zone, self.ttl, "IN", "NS", [n.to_text() for n in nameservers]
+                )
+            )
+            for nameserver, address in nameservers.items():
+                if address is not None:
+                    response.additional.append(
+                        dns.rrset.from_text(nameserver, self.ttl, "IN", "A", address)
+                    )
+            return True
+        return False
+
+    def _respond(self, data: bytes, *, tcp: bool) -> bytes | None:
+        try:
+            query = dns.message.from_wire(data)
+        except Exception:
+            return None
+
+        if len(query.question) != 1:
+            return None
+
+        self.queries += 1
+        response = dns.message.make_response(query)
+        response.flags |= dns.flags.AA
+
+        if self._roll(self.servfail_rate):
+            response.set_rcode(dns.rcode.SERVFAIL)
+            return response.to_wire()
+        if not tcp and self._roll(self.truncation_rate):
+            self.truncated += 1
+            response.flags |= dns.flags.TC
+            return response.to_wire()
+
+        question = query.question[0]
+        labels = question.name.to_text(omit_final_dot=True).lower().split(".", 1)
+        records = None
+        if len(labels) == 2 and labels[0] == "pronouns":
+            records = self.zones.get(labels[1])
+        if records is not None and self._roll(self.nxdomain_rate):
+            records = None
+
+        if records is None and question.name in self.hosts:
+            if question.rdtype == dns.rdatatype.A:
+                response.answer.append(
+                    dns.rrset.from_text(
+                        question.name, self.ttl, "IN", "A", self.hosts[question.name]
+                    )
+                )
+        elif records is None:
+            if not self._refer(response, question.name):
+                response.set_rcode(dns.rcode.NXDOMAIN)
+        elif question.rdtype == dns.rdatatype.TXT and records:
+            rdatas = [
+                dns.rdtypes.ANY.TXT.TXT(
+                    dns.rdataclass.IN,
+                    dns.rdatatype.TXT,
+                    [
+                        encoded[i : i + _TXT_STRING_LIMIT]
+                        for i in range(0, max(len(encoded), 1), _TXT_STRING_LIMIT)
+                    ],
+                )
+                for encoded in (record.encode() for record in records)
+            ]
+            response.answer.append(
+                dns.rrset.from_rdata_list(question.name, self.ttl, rdatas)
+            )
+
+        return response.to_wire()
+
+    async def _handle_tcp(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        # queries on one connection are answered concurrently, so with jitter
+        # their responses can come back out of order.
+        self.connections += 1
+        self._tcp_writers.add(writer)
+        replies: set[asyncio.Task[None]] = set()
+        try:
+            while True:
+                (length,) = struct.unpack("!H", await reader.readexactly(2))
+                response = self._respond(await reader.readexactly(length), tcp=True)
+                if response is None:
+                    break
+                reply = asyncio.create_task(self._reply_tcp(writer, response))
+                replies.add(reply)
+                reply.add_done_callback(replies.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if replies:
+                await asyncio.gather(*replies, return_exceptions=True)
+            self._tcp_writers.discard(writer)
+            writer.close()
+
+    async def _reply_tcp(self, writer: asyncio.StreamWriter, response: bytes) -> None:
+        delay: float = self._delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if not writer.is_closing():
+            writer.write(struct.pack("!H", len(response)) + response)
+            await writer.drain()
+
+    async def _serve(self) -> None:
+        # an ephemeral UDP port may already be taken for TCP, in which case
+        # another is tried.
+        loop = asyncio.get_running_loop()
+        attempts: int = 1 if self.port else _BIND_ATTEMPTS
+        for attempt in range(attempts):
+            self._udp_transport, _ = await loop.create_datagram_endpoint(
+                lambda: _StubDatagramProtocol(self),
+                local_addr=(self.host, self.port),
+            )
+            port: int = self._udp_transport.get_extra_info("sockname")[1]
+            try:
+                self._tcp_server = await asyncio.start_server(
+                    self._handle_tcp, self.host, port
+                )
+            except OSError:
+                self._udp_transport.close()
+                if attempt == attempts - 1:
+                    raise
+                continue
+            self.port = port
+            return
+
+    async def _shutdown(self) -> None:
+        if self._udp_transport is not None:
+            self._udp_transport.close()
+        if self._tcp_server is not None:
+            self._tcp_server.close()
+            for writer in list(self._tcp_writers):
+                writer.close()
+            await self._tcp_server.wait_closed()
+
+    @property
+    def nameserver(self) -> dns.nameserver.Do53Nameserver:
+        return dns.nameserver.Do53Nameserver(self.host, self.port)
+
+    def resolver(self) -> dns.resolver.Resolver:
+        resolver = dns.resolver.Resolver(configure=False)
+        resolver.nameservers = [self.nameserver]
+        return resolver
+
+    def async_resolver(self) -> dns.asyncresolver.Resolver:
+        resolver = dns.asyncresolver.Resolver(configure=False)
+        resolver.nameservers = [self.nameserver]
+        return resolver
+
+
+def synthetic_zones(
+    count: int, *, suffix: str = "example", seed: int | None = None
+) -> dict[str, list[str]]:
+    # `count` zones named `domain<n>.<suffix>`, each serving a record set drawn
+    # from common real-world ones, for use with `StubDNSServer`.
+    chooser = random.Random(seed)
+    return {
+        f"domain{i}.{suffix}": list(chooser.choice(_SYNTHETIC_RECORDS))
+        for i in range(count)
+    }
+
+
+# a DNS-over-HTTPS (RFC 8484) stand-in on localhost, without TLS. it answers
+# GET and POST requests to `path` over HTTP/2 with prior knowledge (which needs
+# the `h2` package), from an unstarted `StubDNSServer` given the same `zones`
+# and options. each connection takes up to `max_concurrent_streams` requests at
+# once. `connections` and `requests` count what it received, and `max_streams`
+# is the most requests one connection had in flight at once.
+class StubDoHServer(_BackgroundServer):
+    _thread_name = "podns-stub-doh"
+
+    def __init__(
+        self,
+        zones: Mapping[str, Sequence[str]] | None = None,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        path: str = "/dns-query",
+        max_concurrent_streams: int = 100,
+        **options: Any,
+    ) -> None:
+        if h2 is None:
+            raise ImportError(
+                "StubDoHServer needs h2, install it with `pip install h2`."
+            )
+        super().__init__()
+        self.dns = StubDNSServer(zones, **options)
+        self.host: str = host
+        self.port: int = port
+        self.path: str = path
+        self.max_concurrent_streams: int = max_concurrent_streams
+        self.connections: int = 0
+        self.requests: int = 0
+        self.max_streams: int = 0
+
+        self._server: asyncio.Server | None = None
+        self._writers: set[asyncio.StreamWriter] = set()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}{self.path}"
+
+    def resolver(self, **kwargs: Any) -> DoHResolver:
+        return DoHResolver([self.url], **kwargs)
+
+    async def _answer(self, method: str, target: str, body: bytes) -> tuple[int, bytes]:
+        self.requests += 1
+        url = urllib.parse.urlsplit(target)
+        if url.path != self.path:
+            return 404, b""
+        if method == "GET":
+            encoded: str = urllib.parse.parse_qs(url.query).get("dns", [""])[0]
+            body = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+        elif method != "POST":
+            return 405, b""
+
+        response = self.dns._respond(body, tcp=True)
+        if response is None:
+            return 400, b""
+        delay: float = self.dns._delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return 200, response
+
+    async def _serve_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        connection = h2.connection.H2Connection(
+            h2.config.H2Configuration(client_side=False, header_encoding="utf-8")
+        )
+        connection.local_settings[h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS] = (
+            self.max_concurrent_streams
+        )
+        connection.local_settings.acknowledge()
+        connection.initiate_connection()
+        writer.write(connection.data_to_send())
+
+        streams: dict[int, tuple[dict[str, str], bytearray]] = {}
+        replies: set[asyncio.Task[None]] = set()
+        in_flight: int = 0
+
+        async def reply(stream_id: int, headers: dict[str, str], body: bytes) -> None:
+            nonlocal in_flight
+            in_flight += 1
+            self.max_streams = max(self.max_streams, in_flight)
+            try:
+                status, content = await self._answer(
+                    headers.get(":method", ""), headers.get(":path", ""), body
+                )
+                connection.send_headers(
+                    stream_id,
+                    [
+                        (":status", str(status)),
+                        ("content-type", "application/dns-message"),
+                        ("content-length", str(len(content))),
+                    ],
+                )
+                connection.send_data(stream_id, content, end_stream=True)
+                writer.write(connection.data_to_send())
+            except h2.exceptions.ProtocolError:
+                pass
+            finally:
+                in_flight -= 1
+
+        try:
+            while data := await reader.read(65_536):
+                for event in connection.receive_data(data):
+                    if isinstance(event, h2.events.RequestReceived):
+                        streams[event.stream_id] = (dict(event.headers), bytearray())
+                    elif isinstance(event, h2.events.DataReceived):
+                        streams[event.stream_id][1].extend(event.data)
+                        connection.acknowledge_received_data(
+                            event.flow_controlled_length, event.stream_id
+                        )
+                    elif isinstance(event, h2.events.StreamEnded):
+                        headers, body = streams.pop(event.stream_id)
+                        task = asyncio.create_task(
+                            reply(event.stream_id, headers, bytes(body))
+                        )
+                        replies.add(task)
+                        task.add_done_callback(replies.discard)
+                    elif isinstance(event, h2.events.ConnectionTerminated):
+                        return
+                writer.write(connection.data_to_send())
+        finally:
+            for task in list(replies):
+                task.cancel()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.connections += 1
+        self._writers.add(writer)
+        try:
+            await self._serve_connection(reader, writer)
+        except (ConnectionError, h2.exceptions.ProtocolError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _serve(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def _shutdown(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+
+
+# a Redis stand-in on localhost for testing `podns.rediscache.RedisCache`,
+# speaking enough of the protocol for it: PING, AUTH, SELECT, GET, SET (with EX
+# or PX), MGET, DEL, PTTL and FLUSHDB. every command is counted by name in
+# `commands`, and `latency` delays every reply.
+class StubRedisServer(_BackgroundServer):
+    _thread_name = "podns-stub-redis"
+
+    def __init__(
+        self,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        password: str | None = None,
+        latency: float = 0.0,
+    ) -> None:
+        super().__init__()
+        self.host: str = host
+        self.port: int = port
+        self.password: str | None = password
+        self.latency: float = latency
+        self.data: dict[bytes, tuple[bytes, float | None]] = {}
+        self.commands: Counter[str] = Counter()
+
+        self._server: asyncio.Server | None = None
+        self._writers: set[asyncio.StreamWriter] = set()
+
+    def _lookup(self, key: bytes) -> bytes | None:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires is not None and expires <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    @staticmethod
+    def _bulk(value: bytes | None) -> bytes:
+        if value is None:
+            return b"$-1\r\n"
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def _execute(self, args: list[bytes], authenticated: bool) -> tuple[bytes, bool]:
+        name: str = args[0].decode().upper()
+        self.commands[name] += 1
+        if name == "AUTH":
+            if args[-1].decode() == self.password:
+                return b"+OK\r\n", True
+            return b"-WRONGPASS invalid password\r\n", authenticated
+        if self.password is not None and not authenticated:
+            return b"-NOAUTH Authentication required.\r\n", authenticated
+
+        match name:
+            case "PING":
+                return b"+PONG\r\n", authenticated
+            case "SELECT":
+                return b"+OK\r\n", authenticated
+            case "GET":
+                return self._bulk(self._lookup(args[1])), authenticated
+            case "MGET":
+                replies = [self._bulk(self._lookup(key)) for key in args[1:]]
+                return b"*%d\r\n" % len(replies) + b"".join(replies), authenticated
+            case "SET":
+                expires: float | None = None
+                options = [arg.upper() for arg in args[3:]]
+                if b"PX" in options:
+                    milliseconds = int(args[3 + options.index(b"PX") + 1])
+                    expires = time.monotonic() + milliseconds / 1000
+                elif b"EX" in options:
+                    expires = time.monotonic() + int(args[3 + options.index(b"EX") + 1])
+                self.data[args[1]] = (args[2], expires)
+                return b"+OK\r\n", authenticated
+            case "DEL":
+                deleted: int = sum(
+                    self.data.pop(key, None) is not None for key in args[1:]
+                )
+                return b":%d\r\n" % deleted, authenticated
+            case "PTTL":
+                item = self.data.get(args[1])
+                if item is None or self._lookup(args[1]) is None:
+                    return b":-2\r\n", authenticated
+                if item[1] is None:
+                    return b":-1\r\n", authenticated
+                remaining: int = int((item[1] - time.monotonic()) * 1000)
+                return b":%d\r\n" % remaining, authenticated
+            case "FLUSHDB" | "FLUSHALL":
+                self.data.clear()
+                return b"+OK\r\n", authenticated
+        return b"-ERR unknown command '%s'\r\n" % args[0], authenticated
+
+    async def _read_command(self, reader: asyncio.StreamReader) -> list[bytes]:
+        header: bytes = await reader.readline()
+        if not header.startswith(b"*"):
+            raise ConnectionError(f"Unsupported request: {header=}")
+        args: list[bytes] = []
+        for _ in range(int(header[1:])):
+            length: int = int((await reader.readline())[1:])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self._writers.add(writer)
+        authenticated: bool = False
+        try:
+            while True:
+                args = await self._read_command(reader)
+                reply, authenticated = self._execute(args, authenticated)
+                if self.latency > 0:
+                    await asyncio.sleep(self.latency)
+                writer.write(reply)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _serve(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def _shutdown(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+
+    def cache(self, **kwargs: object) -> RedisCache:
+        return RedisCache(
+            self.host,
+            self.port,
+            password=self.password,
+            **kwargs,  # type: ignore[arg-type]
+        )
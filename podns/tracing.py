@@ -0,0 +1,169 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import itertools
+import time
+from contextlib import AbstractContextManager, nullcontext
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from types import TracebackType
+from typing import (
+    Any,
+    Callable,
+    Literal,
+    Mapping,
+    Protocol,
+)
+
+
+__all__: tuple[str, ...] = (
+    "TraceEvent",
+    "Tracer",
+    "ContextManagerTracer",
+    "get_tracer",
+    "set_tracer",
+    "span",
+)
+
+
+@dataclass(slots=True, frozen=True)
+class TraceEvent:
+    # `phase` is one of "lookup" (with `shared=True` when it waited on a query
+    # another lookup started), "queue", "rate_limit", "resolve", "tcp_fallback"
+    # (a truncated answer asked again over TCP), "query" (each query an
+    # iterative resolver sends), "parse" or "dedup". timestamps come from
+    # `time.perf_counter()`, and `parent_id` links a phase to the one it ran in.
+    phase: str
+    kind: Literal["start", "end"]
+    timestamp: float
+    span_id: int
+    parent_id: int | None
+    attributes: Mapping[str, Any]
+    error: BaseException | None = None
+
+
+class Tracer(Protocol):
+    def __call__(self, event: TraceEvent) -> None: ...
+
+
+# events are only emitted while a tracer is installed. when there is none,
+# `span()` hands out a shared no-op context manager.
+_tracer: Tracer | None = None
+_current_span: ContextVar[int | None] = ContextVar("podns_current_span", default=None)
+_span_ids = itertools.count(1)
+_NULL_SPAN: AbstractContextManager[None] = nullcontext()
+
+
+def set_tracer(tracer: Tracer | None) -> None:
+    global _tracer
+    _tracer = tracer
+
+
+def get_tracer() -> Tracer | None:
+    return _tracer
+
+
+class _Span:
+    __slots__ = ("_tracer", "_phase", "_attributes", "_span_id", "_parent_id", "_token")
+
+    def __init__(
+        self, tracer: Tracer, phase: str, attributes: Mapping[str, Any]
+    ) -> None:
+        self._tracer = tracer
+        self._phase = phase
+        self._attributes = attributes
+        self._span_id: int = next(_span_ids)
+        self._parent_id: int | None = None
+        self._token: Token[int | None] | None = None
+
+    def __enter__(self) -> None:
+        self._parent_id = _current_span.get()
+        self._token = _current_span.set(self._span_id)
+        self._tracer(
+            TraceEvent(
+                phase=self._phase,
+                kind="start",
+                timestamp=time.perf_counter(),
+                span_id=self._span_id,
+                parent_id=self._parent_id,
+                attributes=self._attributes,
+            )
+        )
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        if self._token is not None:
+            _current_span.reset(self._token)
+        self._tracer(
+            TraceEvent(
+                phase=self._phase,
+                kind="end",
+                timestamp=time.perf_counter(),
+                span_id=self._span_id,
+                parent_id=self._parent_id,
+                attributes=self._attributes,
+                error=exc,
+            )
+        )
+
+
+def span(phase: str, **attributes: Any) -> AbstractContextManager[None]:
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return _Span(tracer, phase, attributes)
+
+
+class ContextManagerTracer:
+    # adapts podns trace events to a tracer built around context managers, such
+    # as `lambda phase, attributes: otel_tracer.start_as_current_span(
+    # f"podns.{phase}", attributes=attributes)`. each phase is entered on its
+    # start event and exited (with any error) on its end event.
+
+    def __init__(
+        self,
+        start_span: Callable[[str, Mapping[str, Any]], AbstractContextManager[Any]],
+    ) -> None:
+        self._start_span = start_span
+        self._open: dict[int, AbstractContextManager[Any]] = {}
+
+    def __call__(self, event: TraceEvent) -> None:
+        if event.kind == "start":
+            context_manager = self._start_span(event.phase, event.attributes)
+            context_manager.__enter__()
+            self._open[event.span_id] = context_manager
+            return
+
+        context_manager = self._open.pop(event.span_id, None)
+        if context_manager is None:
+            return
+        error = event.error
+        if error is None:
+            context_manager.__exit__(None, None, None)
+        else:
+            context_manager.__exit__(type(error), error, error.__traceback__)
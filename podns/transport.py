@@ -0,0 +1,483 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import abc
+import asyncio
+import random
+import struct
+import time
+from collections import deque
+from typing import (
+    Awaitable,
+    Callable,
+    Final,
+    Protocol,
+    Sequence,
+)
+
+import dns.asyncquery
+import dns.asyncresolver
+import dns.exception
+import dns.flags
+import dns.message
+import dns.name
+import dns.nameserver
+import dns.rcode
+import dns.rdataclass
+import dns.rdatatype
+import dns.resolver
+
+from podns.error import PODNSLookupError
+from podns.ratelimit import nameserver_key
+from podns.selection import NameserverSelector
+from podns.tracing import span
+
+
+__all__: tuple[str, ...] = (
+    "TransportResolver",
+    "UDPResolver",
+    "PipelinedTCPResolver",
+)
+
+
+_LENGTH: Final[struct.Struct] = struct.Struct("!H")
+_RETRY_RCODES: Final[frozenset[dns.rcode.Rcode]] = frozenset(
+    {dns.rcode.SERVFAIL, dns.rcode.REFUSED, dns.rcode.NOTIMP}
+)
+
+type _ResolutionError = tuple[
+    str, bool, int, Exception | str, dns.message.Message | None
+]
+
+
+class TransportResolver(dns.asyncresolver.Resolver, abc.ABC):
+    # a resolver that sends its queries over its own transport, which
+    # subclasses provide through `_query`. it can be passed as `resolver`
+    # wherever an async resolver is accepted. nameservers are tried in order
+    # until one answers, or with a `selector`, in the order it picks for each
+    # query.
+
+    def __init__(
+        self,
+        nameservers: Sequence[str | dns.nameserver.Nameserver],
+        *,
+        timeout: float = 2.0,
+        selector: NameserverSelector | None = None,
+    ) -> None:
+        super().__init__(configure=False)
+        if not nameservers:
+            raise ValueError("At least one nameserver is needed.")
+        self.nameservers = list(nameservers)
+        self.timeout = timeout
+        self.selector: NameserverSelector | None = selector
+
+    @abc.abstractmethod
+    async def _query(
+        self, query: dns.message.Message, nameserver: dns.nameserver.Nameserver
+    ) -> dns.message.Message: ...
+
+    async def aclose(self) -> None:
+        pass
+
+    async def _ask(self, query: dns.message.Message) -> dns.message.Message:
+        errors: list[_ResolutionError] = []
+        selector = self.selector
+        nameservers = (
+            self.nameservers if selector is None else selector.order(self.nameservers)
+        )
+        for nameserver in nameservers:
+            assert isinstance(nameserver, dns.nameserver.Nameserver)
+            started: float = time.perf_counter()
+            try:
+                response = await self._query(query, nameserver)
+            except (
+                dns.exception.DNSException,
+                OSError,
+                EOFError,
+                ValueError,
+                PODNSLookupError,
+            ) as e:
+                if selector is not None:
+                    selector.record_failure(nameserver)
+                errors.append((nameserver_key(nameserver), False, 0, e, None))
+                continue
+            if response.rcode() in _RETRY_RCODES:
+                if selector is not None:
+                    selector.record_failure(nameserver)
+                rcode: str = dns.rcode.to_text(response.rcode())
+                errors.append((nameserver_key(nameserver), False, 0, rcode, response))
+                continue
+            if selector is not None:
+                selector.record_success(nameserver, time.perf_counter() - started)
+            return response
+        raise dns.resolver.NoNameservers(request=query, errors=errors)
+
+    async def resolve(
+        self,
+        qname: dns.name.Name | str,
+        rdtype: dns.rdatatype.RdataType | str = dns.rdatatype.A,
+        rdclass: dns.rdataclass.RdataClass | str = dns.rdataclass.IN,
+        tcp: bool = False,
+        source: str | None = None,
+        raise_on_no_answer: bool = True,
+        source_port: int = 0,
+        lifetime: float | None = None,
+        search: bool | None = None,
+        backend: object = None,
+    ) -> dns.resolver.Answer:
+        # the signature matches dnspython's, but only `qname`, `rdtype`,
+        # `raise_on_no_answer` and `lifetime` are used.
+        name: dns.name.Name = (
+            dns.name.from_text(qname) if isinstance(qname, str) else qname
+        )
+        rdtype = dns.rdatatype.RdataType.make(rdtype)
+        try:
+            async with asyncio.timeout(lifetime):
+                response = await self._ask(dns.message.make_query(name, rdtype))
+        except TimeoutError as e:
+            raise dns.resolver.LifetimeTimeout(timeout=lifetime, errors=[]) from e
+
+        if response.rcode() == dns.rcode.NXDOMAIN:
+            raise dns.resolver.NXDOMAIN(qnames=[name], responses={name: response})
+        answer = dns.resolver.Answer(name, rdtype, dns.rdataclass.IN, response)
+        if answer.rrset is None and raise_on_no_answer:
+            raise dns.resolver.NoAnswer(response=response)
+        return answer
+
+
+class UDPResolver(TransportResolver):
+    # sends queries over UDP, and again over a new TCP connection when the
+    # answer is truncated, as dnspython's resolver does.
+
+    async def _query(
+        self, query: dns.message.Message, nameserver: dns.nameserver.Nameserver
+    ) -> dns.message.Message:
+        host: str = nameserver.answer_nameserver()
+        port: int = nameserver.answer_port()
+        async with asyncio.timeout(self.timeout):
+            response = await dns.asyncquery.udp(query, host, port=port)
+            if response.flags & dns.flags.TC:
+                with span("tcp_fallback", nameserver=nameserver_key(nameserver)):
+                    response = await dns.asyncquery.tcp(query, host, port=port)
+        return response
+
+
+class _PipelinedConnection:
+    # one TCP connection carrying many queries at once. responses may arrive in
+    # any order (RFC 7766 section 6.2.1.1), and are matched to their queries by
+    # message id.
+
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self._reader = reader
+        self._writer = writer
+        self._pending: dict[int, asyncio.Future[bytes]] = {}
+        self._closed: bool = False
+        self._read_task = asyncio.create_task(self._read())
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def outstanding(self) -> int:
+        return len(self._pending)
+
+    @property
+    def capacity(self) -> int:
+        # every outstanding query needs its own message id.
+        return 0xFFFF
+
+    async def _read(self) -> None:
+        error: Exception = EOFError("Connection closed by the nameserver.")
+        try:
+            while True:
+                (length,) = _LENGTH.unpack(await self._reader.readexactly(2))
+                wire: bytes = await self._reader.readexactly(length)
+                if len(wire) < 2:
+                    continue
+                future = self._pending.get(_LENGTH.unpack_from(wire)[0])
+                if future is not None and not future.done():
+                    future.set_result(wire)
+        except (asyncio.IncompleteReadError, OSError) as e:
+            if isinstance(e, OSError):
+                error = e
+        finally:
+            self._fail(error)
+
+    def _fail(self, error: Exception) -> None:
+        self._closed = True
+        self._writer.close()
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    async def query(self, query: dns.message.Message) -> dns.message.Message:
+        if self._closed:
+            raise EOFError("Connection closed.")
+        # ids only need to be unique among this connection's outstanding
+        # queries.
+        while (query_id := random.getrandbits(16)) in self._pending:
+            pass
+        query.id = query_id
+        wire: bytes = query.to_wire()
+        future: asyncio.Future[bytes] = asyncio.get_running_loop().create_future()
+        self._pending[query_id] = future
+        try:
+            self._writer.write(_LENGTH.pack(len(wire)) + wire)
+            await self._writer.drain()
+            response = dns.message.from_wire(await future)
+        finally:
+            del self._pending[query_id]
+        if not query.is_response(response):
+            raise dns.exception.FormError("Response does not match the query.")
+        return response
+
+    def close(self) -> None:
+        if not self._closed:
+            self._read_task.cancel()
+            self._fail(EOFError("Connection closed."))
+
+
+class _Multiplexed(Protocol):
+    # a connection carrying many queries at once.
+    @property
+    def closed(self) -> bool: ...
+
+    @property
+    def outstanding(self) -> int: ...
+
+    @property
+    def capacity(self) -> int: ...
+
+    def close(self) -> None: ...
+
+
+class _Pool[C: _Multiplexed]:
+    # the connections open to one nameserver with how many queries each has
+    # been handed, and the queries waiting for one of them to have room.
+    __slots__ = ("in_use", "waiters", "opening")
+
+    def __init__(self) -> None:
+        self.in_use: dict[C, int] = {}
+        self.waiters: deque[asyncio.Future[C | None]] = deque()
+        self.opening: asyncio.Lock = asyncio.Lock()
+
+
+class _PooledResolver[C: _Multiplexed](TransportResolver):
+    # keeps connections to each nameserver open, shared by every query in
+    # flight. a connection takes up to `max_outstanding` queries at once (or
+    # fewer, if the server says so), and up to `max_connections` are opened to
+    # each nameserver as they fill up. once they are all full, queries wait
+    # their turn for one to have room.
+
+    def __init__(
+        self,
+        nameservers: Sequence[str | dns.nameserver.Nameserver],
+        *,
+        timeout: float,
+        selector: NameserverSelector | None,
+        max_outstanding: int,
+        max_connections: int,
+    ) -> None:
+        super().__init__(nameservers, timeout=timeout, selector=selector)
+        if max_outstanding < 1:
+            raise ValueError(f"max_outstanding must be at least 1: {max_outstanding=}")
+        if max_connections < 1:
+            raise ValueError(f"max_connections must be at least 1: {max_connections=}")
+        self.max_outstanding: int = max_outstanding
+        self.max_connections: int = max_connections
+
+        self.connections_opened: int = 0
+
+        self._pools: dict[str, _Pool[C]] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @abc.abstractmethod
+    async def _open(self, nameserver: dns.nameserver.Nameserver) -> C: ...
+
+    def _reserve(self, pool: _Pool[C]) -> C | None:
+        # takes a slot on the least loaded connection with room. the server's
+        # limit is checked every time, as it may change while connected.
+        for connection in [c for c in pool.in_use if c.closed]:
+            del pool.in_use[connection]
+        free: list[C] = [
+            c
+            for c, in_use in pool.in_use.items()
+            if in_use < min(self.max_outstanding, c.capacity)
+        ]
+        if not free:
+            return None
+        connection = min(free, key=pool.in_use.__getitem__)
+        pool.in_use[connection] += 1
+        return connection
+
+    def _wake(self, pool: _Pool[C]) -> None:
+        # hands free slots to waiting queries in order, or lets the first one
+        # open another connection if there is room for one.
+        while pool.waiters:
+            connection = self._reserve(pool)
+            if connection is None and len(pool.in_use) >= self.max_connections:
+                return
+            waiter = pool.waiters.popleft()
+            if waiter.done():
+                if connection is not None:
+                    pool.in_use[connection] -= 1
+                continue
+            waiter.set_result(connection)
+            if connection is None:
+                return
+
+    def _release(self, pool: _Pool[C], connection: C) -> None:
+        if connection in pool.in_use:
+            pool.in_use[connection] -= 1
+        self._wake(pool)
+
+    async def _connection(
+        self, nameserver: dns.nameserver.Nameserver
+    ) -> tuple[_Pool[C], C]:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # connections belong to the loop that opened them.
+            self._loop = loop
+            self._pools = {}
+
+        pool = self._pools.setdefault(nameserver_key(nameserver), _Pool())
+        connection: C | None = None if pool.waiters else self._reserve(pool)
+        while connection is None:
+            if pool.waiters or len(pool.in_use) >= self.max_connections:
+                waiter: asyncio.Future[C | None] = loop.create_future()
+                pool.waiters.append(waiter)
+                try:
+                    connection = await waiter
+                except asyncio.CancelledError:
+                    if waiter.done() and not waiter.cancelled():
+                        # a slot was handed to us just before the cancellation.
+                        if (handed := waiter.result()) is not None:
+                            self._release(pool, handed)
+                        else:
+                            self._wake(pool)
+                    raise
+                if connection is not None:
+                    break
+                # woken with room for another connection, which this opens.
+
+            async with pool.opening:
+                try:
+                    # another query may have opened one while this waited.
+                    connection = self._reserve(pool)
+                    if connection is None and len(pool.in_use) < self.max_connections:
+                        connection = await self._open(nameserver)
+                        self.connections_opened += 1
+                        pool.in_use[connection] = 1
+                finally:
+                    # a new connection has room for those waiting too, and a
+                    # failed one leaves room for the next of them to try.
+                    self._wake(pool)
+        return pool, connection
+
+    async def _on_connection[R](
+        self,
+        nameserver: dns.nameserver.Nameserver,
+        operation: Callable[[C], Awaitable[R]],
+    ) -> R:
+        pool, connection = await self._connection(nameserver)
+        try:
+            return await operation(connection)
+        except (EOFError, OSError):
+            # a connection the server closed while idle is only noticed once
+            # used, so the query is retried once on a fresh one.
+            if not connection.closed:
+                raise
+        finally:
+            self._release(pool, connection)
+        pool, connection = await self._connection(nameserver)
+        try:
+            return await operation(connection)
+        finally:
+            self._release(pool, connection)
+
+    async def aclose(self) -> None:
+        for pool in self._pools.values():
+            for connection in pool.in_use:
+                connection.close()
+        self._pools = {}
+
+
+class PipelinedTCPResolver(_PooledResolver[_PipelinedConnection]):
+    # sends queries over TCP connections that are kept open to each nameserver
+    # and shared by every query in flight, instead of a connection per query.
+    # a connection takes up to `max_outstanding` queries at once, and up to
+    # `max_connections` are opened to each nameserver as they fill up.
+    #
+    # with `udp_first`, queries go over UDP, and only truncated answers are sent
+    # again over the kept-open connections.
+
+    def __init__(
+        self,
+        nameservers: Sequence[str | dns.nameserver.Nameserver],
+        *,
+        timeout: float = 2.0,
+        selector: NameserverSelector | None = None,
+        udp_first: bool = False,
+        max_outstanding: int = 64,
+        max_connections: int = 4,
+    ) -> None:
+        super().__init__(
+            nameservers,
+            timeout=timeout,
+            selector=selector,
+            max_outstanding=max_outstanding,
+            max_connections=max_connections,
+        )
+        self.udp_first: bool = udp_first
+
+    async def _open(
+        self, nameserver: dns.nameserver.Nameserver
+    ) -> _PipelinedConnection:
+        reader, writer = await asyncio.open_connection(
+            nameserver.answer_nameserver(), nameserver.answer_port()
+        )
+        return _PipelinedConnection(reader, writer)
+
+    async def _query(
+        self, query: dns.message.Message, nameserver: dns.nameserver.Nameserver
+    ) -> dns.message.Message:
+        async with asyncio.timeout(self.timeout):
+            if self.udp_first:
+                response = await dns.asyncquery.udp(
+                    query,
+                    nameserver.answer_nameserver(),
+                    port=nameserver.answer_port(),
+                )
+                if not response.flags & dns.flags.TC:
+                    return response
+                with span("tcp_fallback", nameserver=nameserver_key(nameserver)):
+                    return await self._on_connection(
+                        nameserver, lambda connection: connection.query(query)
+                    )
+            return await self._on_connection(
+                nameserver, lambda connection: connection.query(query)
+            )
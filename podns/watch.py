@@ -0,0 +1,276 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import (
+    AsyncIterator,
+    Final,
+    Iterable,
+    Literal,
+    Mapping,
+)
+
+import dns.asyncresolver
+
+from podns.cache import CacheBackend
+from podns.dns import _fetch_with_ttl
+from podns.pronouns import (
+    PronounsDiff,
+    PronounsResponse,
+    diff,
+)
+from podns.ratelimit import RateLimiter
+
+
+__all__: tuple[str, ...] = (
+    "WatchEvent",
+    "PronounWatcher",
+)
+
+
+class _Unknown(Enum):
+    UNKNOWN = "unknown"
+
+
+# the state of a domain that has not been looked up yet.
+_UNKNOWN: Final[Literal[_Unknown.UNKNOWN]] = _Unknown.UNKNOWN
+
+type _State = PronounsResponse | None | Literal[_Unknown.UNKNOWN]
+# domain, generation, response, TTL and whether the lookup succeeded.
+type _LookupOutcome = tuple[str, int, PronounsResponse | None, float | None, bool]
+
+
+@dataclass(slots=True, frozen=True)
+class WatchEvent:
+    # `previous` and `current` are `None` for NXDOMAIN, which compares as a
+    # response with no records. `initial` marks a domain's first lookup, when
+    # its previous state was not known.
+    domain: str
+    previous: PronounsResponse | None
+    current: PronounsResponse | None
+    diff: PronounsDiff
+    initial: bool = False
+
+
+# watches domains for changes to their records. each domain is looked up again
+# when its record's TTL runs out (clamped to [`min_interval`, `max_interval`]),
+# after `negative_interval` for NXDOMAIN, or after `retry_interval` when a
+# lookup fails. iterating the watcher yields a `WatchEvent` only when a
+# domain's records differ from its previous state.
+#
+# `domains` may map each domain to its last known state (`None` for NXDOMAIN),
+# such as one mirrored in a database, so that only differences from it are
+# reported. domains given without a state report their first lookup as an
+# initial event.
+#
+# with a `cache`, lookups are answered from it while its entry is fresh. the
+# entry's remaining TTL is not known then, so the domain is looked up again
+# after `min_interval`.
+class PronounWatcher:
+    def __init__(
+        self,
+        domains: Iterable[str] | Mapping[str, PronounsResponse | None] = (),
+        *,
+        resolver: dns.asyncresolver.Resolver | None = None,
+        pedantic: bool = False,
+        deadline: float | None = 5.0,
+        rate_limiter: RateLimiter | None = None,
+        cache: CacheBackend | None = None,
+        concurrency: int = 16,
+        min_interval: float = 60.0,
+        max_interval: float = 86_400.0,
+        negative_interval: float = 3_600.0,
+        retry_interval: float = 300.0,
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be at least 1: {concurrency=}")
+        if not 0 <= min_interval <= max_interval:
+            raise ValueError(
+                f"Expected 0 <= min_interval <= max_interval: {min_interval=} {max_interval=}"
+            )
+
+        self.resolver: dns.asyncresolver.Resolver | None = resolver
+        self.pedantic: bool = pedantic
+        self.deadline: float | None = deadline
+        self.rate_limiter: RateLimiter | None = rate_limiter
+        self.cache: CacheBackend | None = cache
+        self.concurrency: int = concurrency
+        self.min_interval: float = min_interval
+        self.max_interval: float = max_interval
+        self.negative_interval: float = negative_interval
+        self.retry_interval: float = retry_interval
+
+        self.lookups: int = 0
+        self.errors: int = 0
+
+        self._states: dict[str, _State] = {}
+        self._generations: dict[str, int] = {}
+        self._due: list[tuple[float, int, str, int]] = []
+        self._sequence = itertools.count()
+        self._wakeup = asyncio.Event()
+
+        if isinstance(domains, Mapping):
+            for domain, state in domains.items():
+                self.add(domain, state)
+        else:
+            for domain in domains:
+                self.add(domain)
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __contains__(self, domain: str) -> bool:
+        return domain in self._states
+
+    def state(self, domain: str) -> PronounsResponse | None:
+        state = self._states[domain]
+        if state is _UNKNOWN:
+            raise KeyError(domain)
+        return state
+
+    def add(
+        self,
+        domain: str,
+        state: PronounsResponse | None | Literal[_Unknown.UNKNOWN] = _UNKNOWN,
+        *,
+        delay: float = 0.0,
+    ) -> None:
+        # starts watching `domain`, looking it up after `delay` seconds.
+        self._states[domain] = state
+        generation: int = self._generations.get(domain, 0) + 1
+        self._generations[domain] = generation
+        self._schedule(domain, generation, delay)
+
+    def remove(self, domain: str) -> None:
+        self._states.pop(domain, None)
+        self._generations.pop(domain, None)
+
+    def _schedule(self, domain: str, generation: int, delay: float) -> None:
+        # a domain's heap entries are only acted on while its generation
+        # matches, so re-adding or removing it discards earlier schedules.
+        due: float = time.monotonic() + delay
+        heapq.heappush(self._due, (due, next(self._sequence), domain, generation))
+        self._wakeup.set()
+
+    def _interval(self, response: PronounsResponse | None, ttl: float | None) -> float:
+        if response is None:
+            interval = self.negative_interval
+        elif ttl is None:
+            interval = self.max_interval
+        else:
+            interval = ttl
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    async def _lookup(self, domain: str, generation: int) -> _LookupOutcome:
+        try:
+            response, ttl = await _fetch_with_ttl(
+                domain,
+                pedantic=self.pedantic,
+                resolver=self.resolver,
+                deadline=self.deadline,
+                rate_limiter=self.rate_limiter,
+                cache=self.cache,
+            )
+        except Exception:
+            return domain, generation, None, None, False
+        return domain, generation, response, ttl, True
+
+    def _complete(
+        self,
+        domain: str,
+        generation: int,
+        response: PronounsResponse | None,
+        ttl: float | None,
+        ok: bool,
+    ) -> WatchEvent | None:
+        self.lookups += 1
+        if self._generations.get(domain) != generation:
+            return None  # removed or re-added while the lookup ran.
+        if not ok:
+            self.errors += 1
+            self._schedule(domain, generation, self.retry_interval)
+            return None
+
+        previous = self._states[domain]
+        self._states[domain] = response
+        self._schedule(domain, generation, self._interval(response, ttl))
+
+        initial: bool = previous is _UNKNOWN
+        if initial:
+            previous = None
+        changes: PronounsDiff = diff(previous, response)
+        if not (initial or changes or (previous is None) != (response is None)):
+            return None
+        return WatchEvent(
+            domain=domain,
+            previous=previous,
+            current=response,
+            diff=changes,
+            initial=initial,
+        )
+
+    async def __aiter__(self) -> AsyncIterator[WatchEvent]:
+        in_flight: set[asyncio.Task[_LookupOutcome]] = set()
+        try:
+            while True:
+                # start every lookup that is due, up to the concurrency limit.
+                while self._due and len(in_flight) < self.concurrency:
+                    due, _, domain, generation = self._due[0]
+                    if self._generations.get(domain) != generation:
+                        heapq.heappop(self._due)
+                        continue
+                    if due > time.monotonic():
+                        break
+                    heapq.heappop(self._due)
+                    in_flight.add(asyncio.create_task(self._lookup(domain, generation)))
+
+                timeout: float | None = None
+                if self._due and len(in_flight) < self.concurrency:
+                    timeout = max(0.0, self._due[0][0] - time.monotonic())
+
+                self._wakeup.clear()
+                wakeup = asyncio.create_task(self._wakeup.wait())
+                try:
+                    done, _ = await asyncio.wait(
+                        {*in_flight, wakeup},
+                        timeout=timeout,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                finally:
+                    wakeup.cancel()
+
+                for task in done & in_flight:
+                    in_flight.discard(task)
+                    event = self._complete(*task.result())
+                    if event is not None:
+                        yield event
+        finally:
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
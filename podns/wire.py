@@ -0,0 +1,148 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import struct
+from dataclasses import dataclass
+from typing import Final, Iterable
+
+import dns.exception
+import dns.flags
+import dns.message
+import dns.name
+import dns.rcode
+import dns.rdataclass
+import dns.rdatatype
+import dns.rdtypes.ANY.TXT
+import dns.ttl
+
+from podns.domain import canonical_domain
+from podns.error import PODNSLookupError
+from podns.parser import parse_pronoun_records
+from podns.pronouns import PronounsResponse
+
+
+__all__: tuple[str, ...] = (
+    "WireAnswer",
+    "build_query",
+    "parse_response",
+    "txt_records",
+)
+
+
+_HEADER: Final[struct.Struct] = struct.Struct("!HHHHHH")
+# type TXT, class IN.
+_QUESTION_TAIL: Final[bytes] = struct.pack("!HH", 16, 1)
+# an EDNS(0) OPT record advertising a 1232 byte UDP payload, the size DNS flag
+# day 2020 settled on (and dnspython's default).
+_OPT: Final[bytes] = b"\x00" + struct.pack("!HHIH", 41, 1232, 0, 0)
+_PRONOUNS_LABEL: Final[bytes] = b"pronouns"
+
+
+@dataclass(slots=True, frozen=True)
+class WireAnswer:
+    query_id: int
+    # the canonical domain asked about, without the `pronouns.` label.
+    domain: str
+    # `None` for NXDOMAIN.
+    response: PronounsResponse | None
+    # how long the answer may be cached for, in seconds.
+    ttl: float | None
+
+
+def build_query(domain: str, *, query_id: int = 0) -> bytes:
+    # the wire format `pronouns.` TXT query for a domain, with recursion
+    # desired and EDNS(0). the domain is canonicalised first, so invalid ones
+    # raise `PODNSInvalidDomain`. callers sending many queries over one socket
+    # give each its own `query_id` to match responses by.
+    if not 0 <= query_id <= 0xFFFF:
+        raise ValueError(f"query_id must be within [0, 65535]: {query_id=}")
+    qname: bytes = b"".join(
+        len(label).to_bytes(1) + label
+        for label in (_PRONOUNS_LABEL, *canonical_domain(domain).encode().split(b"."))
+    )
+    return (
+        _HEADER.pack(query_id, dns.flags.RD, 1, 0, 0, 1)
+        + qname
+        + b"\x00"
+        + _QUESTION_TAIL
+        + _OPT
+    )
+
+
+def txt_records(rdatas: Iterable[dns.rdtypes.ANY.TXT.TXT]) -> list[str]:
+    # a TXT record holds one or more character-strings of up to 255 bytes,
+    # which together are the record.
+    return [
+        b"".join(rdata.strings).decode("utf-8", errors="replace") for rdata in rdatas
+    ]
+
+
+def parse_response(wire: bytes, *, pedantic: bool = False) -> WireAnswer:
+    # the answer to a query from `build_query`. failed lookups raise
+    # `PODNSLookupError` (a malformed or truncated response, an error rcode, or
+    # no TXT records), and invalid records the parser's errors.
+    try:
+        message = dns.message.from_wire(wire)
+    except (dns.exception.DNSException, ValueError) as e:
+        raise PODNSLookupError(f"Malformed DNS response: {e}") from e
+    if not message.flags & dns.flags.QR:
+        raise PODNSLookupError(f"Not a DNS response: {message.id=}")
+    if len(message.question) != 1:
+        raise PODNSLookupError(f"Expected one question: {message.question=}")
+
+    question = message.question[0]
+    qname: dns.name.Name = question.name
+    if (
+        question.rdtype != dns.rdatatype.TXT
+        or question.rdclass != dns.rdataclass.IN
+        or len(qname.labels) < 3
+        or qname.labels[0].lower() != _PRONOUNS_LABEL
+    ):
+        raise PODNSLookupError(f"Not a pronouns TXT query: {question.to_text()!r}")
+    domain: str = qname.parent().to_text(omit_final_dot=True).lower()
+
+    rcode = message.rcode()
+    if rcode not in (dns.rcode.NOERROR, dns.rcode.NXDOMAIN):
+        raise PODNSLookupError(
+            f"Lookup failed: {domain=} rcode={dns.rcode.to_text(rcode)}"
+        )
+    if message.flags & dns.flags.TC:
+        raise PODNSLookupError(f"Response was truncated, retry over TCP: {domain=}")
+
+    assert isinstance(message, dns.message.QueryMessage)
+    chain = message.resolve_chaining()
+    # an NXDOMAIN without an SOA record to take a negative TTL from has none.
+    ttl: float | None = (
+        chain.minimum_ttl if chain.minimum_ttl < dns.ttl.MAX_TTL else None
+    )
+    if rcode == dns.rcode.NXDOMAIN:
+        return WireAnswer(message.id, domain, None, ttl)
+    if chain.answer is None:
+        raise PODNSLookupError(f"No TXT records: {domain=}")
+    return WireAnswer(
+        message.id,
+        domain,
+        parse_pronoun_records(txt_records(chain.answer), pedantic=pedantic),
+        ttl,
+    )
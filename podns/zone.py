@@ -0,0 +1,398 @@
+"""
+MIT License
+
+Copyright (c) 2024-present abigail phoebe <abigail@phoebe.sh>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import os
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Final,
+    Iterable,
+    Iterator,
+)
+
+import dns.exception
+import dns.name
+import dns.rdataclass
+import dns.rdatatype
+import dns.tokenizer
+import dns.ttl
+
+from podns.error import PODNSParserError, PODNSZoneError
+from podns.parser import parse_pronoun_records
+from podns.pronouns import PronounsResponse
+
+
+__all__: tuple[str, ...] = (
+    "ZoneRecord",
+    "ZoneLineError",
+    "RecordDiagnostic",
+    "DomainLintResult",
+    "ZoneLintReport",
+    "read_zone_records",
+    "lint_zone",
+    "lint_zones",
+)
+
+
+_PRONOUNS_LABEL: Final[bytes] = b"pronouns"
+# directives that do not change how owner names are read.
+_SKIPPED_DIRECTIVES: Final[frozenset[str]] = frozenset({"$TTL", "$GENERATE"})
+
+
+@dataclass(slots=True, frozen=True)
+class ZoneRecord:
+    # one `pronouns.` TXT record, with its character-strings joined.
+    domain: str
+    text: str
+    source: str
+    line: int
+
+
+@dataclass(slots=True, frozen=True)
+class ZoneLineError:
+    # a line that could not be read. `domain` is set when the line belongs to a
+    # `pronouns.` name.
+    source: str
+    line: int
+    domain: str | None
+    error: PODNSZoneError
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "domain": self.domain,
+            "source": self.source,
+            "line": self.line,
+            "ok": False,
+            "error": _format_error(self.error),
+        }
+
+
+@dataclass(slots=True, frozen=True)
+class RecordDiagnostic:
+    record: ZoneRecord
+    # the first specification violation in the record on its own, pedantically.
+    error: PODNSParserError | None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "record": self.record.text,
+            "line": self.record.line,
+            "error": _format_error(self.error),
+        }
+
+
+@dataclass(slots=True, frozen=True)
+class DomainLintResult:
+    domain: str
+    source: str
+    records: tuple[RecordDiagnostic, ...]
+    # what a (non-pedantic) lookup of the domain would return, if anything.
+    response: PronounsResponse | None
+    # the first violation between records, such as records after a `!`. only
+    # checked once every record is valid on its own.
+    error: PODNSParserError | None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and all(r.error is None for r in self.records)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "domain": self.domain,
+            "source": self.source,
+            "ok": self.ok,
+            "result": None if self.response is None else self.response.to_dict(),
+            "error": _format_error(self.error),
+            "records": [diagnostic.to_dict() for diagnostic in self.records],
+        }
+
+
+@dataclass(slots=True, frozen=True)
+class ZoneLintReport:
+    source: str
+    results: tuple[DomainLintResult, ...]
+    # set when the file could not be read, with the results read before it.
+    error: PODNSZoneError | None = None
+    # lines that could not be read, which reading carried on past.
+    line_errors: tuple[ZoneLineError, ...] = ()
+
+    @property
+    def ok(self) -> bool:
+        return (
+            self.error is None
+            and not self.line_errors
+            and all(result.ok for result in self.results)
+        )
+
+
+def _format_error(error: Exception | None) -> str | None:
+    return None if error is None else f"{type(error).__name__}: {error}"
+
+
+def _skip_line(tok: dns.tokenizer.Tokenizer) -> None:
+    while not tok.get().is_eol_or_eof():
+        pass
+
+
+def _is_ttl_or_class(value: str) -> bool:
+    try:
+        dns.ttl.from_text(value)
+        return True
+    except dns.ttl.BadTTL:
+        pass
+    try:
+        dns.rdataclass.from_text(value)
+        return True
+    except dns.rdataclass.UnknownRdataclass:
+        return False
+
+
+def _read_txt(tok: dns.tokenizer.Tokenizer) -> str:
+    # a TXT record holds one or more character-strings, which are joined
+    # without a separator, as RFC 7208 section 3.3 does for SPF.
+    strings: list[bytes] = []
+    while not (token := tok.get()).is_eol_or_eof():
+        if not (token.is_quoted_string() or token.is_identifier()):
+            raise dns.exception.SyntaxError("expected a TXT character-string")
+        strings.append(token.unescape_to_bytes().value)
+    if not strings:
+        tok.unget(token)
+        raise dns.exception.SyntaxError("TXT record without character-strings")
+    return b"".join(strings).decode("utf-8", errors="replace")
+
+
+def _pronouns_domain(owner: dns.name.Name | None) -> str | None:
+    if owner is None or len(owner) < 3 or owner[0].lower() != _PRONOUNS_LABEL:
+        return None
+    return owner.parent().to_text(omit_final_dot=True).lower()
+
+
+def _is_txt(value: str) -> bool:
+    try:
+        return dns.rdatatype.from_text(value) == dns.rdatatype.TXT
+    except dns.rdatatype.UnknownRdatatype:
+        return False
+
+
+def _read_origin(
+    tok: dns.tokenizer.Tokenizer, origin: dns.name.Name | None
+) -> dns.name.Name:
+    token = tok.get()
+    if not token.is_identifier():
+        tok.unget(token)
+        raise dns.exception.SyntaxError("$ORIGIN without a name")
+    name = tok.as_name(token, origin)
+    if not name.is_absolute():
+        raise dns.exception.SyntaxError("$ORIGIN must be absolute")
+    tok.get_eol()
+    return name
+
+
+def _read_records(
+    tok: dns.tokenizer.Tokenizer, source: str, origin: dns.name.Name | None
+) -> Iterator[ZoneRecord | ZoneLineError]:
+    # a line that cannot be read is reported, and reading carries on with the
+    # next one. nothing raising below reads past the end of its line, so the
+    # rest of it can be skipped.
+    owner: dns.name.Name | None = None
+    while not (token := tok.get(want_leading=True)).is_eof():
+        if token.is_eol():
+            continue
+        line: int = tok.where()[1]
+        try:
+            if token.is_identifier() and token.value.startswith("$"):
+                directive: str = token.value.upper()
+                if directive == "$ORIGIN":
+                    origin = _read_origin(tok, origin)
+                elif directive in _SKIPPED_DIRECTIVES:
+                    _skip_line(tok)
+                else:
+                    raise dns.exception.SyntaxError(
+                        f"unsupported directive {directive}"
+                    )
+                continue
+
+            if token.is_whitespace():
+                token = tok.get()
+                if token.is_eol_or_eof():
+                    continue
+                if owner is None:
+                    raise dns.exception.SyntaxError("record without an owner name")
+            else:
+                owner = None
+                name = tok.as_name(token, origin)
+                if not name.is_absolute():
+                    raise dns.exception.SyntaxError(
+                        f"relative owner name without an origin: {token.value}"
+                    )
+                owner = name
+                token = tok.get()
+
+            # TTL and class come in either order, before the type.
+            while token.is_identifier() and _is_ttl_or_class(token.value):
+                token = tok.get()
+            if not token.is_identifier():
+                tok.unget(token)
+                raise dns.exception.SyntaxError("expected a record type")
+
+            # records of types dnspython does not know are not TXT either.
+            domain = _pronouns_domain(owner)
+            if domain is None or not _is_txt(token.value):
+                _skip_line(tok)
+                continue
+            text: str = _read_txt(tok)
+        except dns.exception.DNSException as e:
+            _skip_line(tok)
+            yield ZoneLineError(
+                source=source,
+                line=line,
+                domain=_pronouns_domain(owner),
+                error=PODNSZoneError(f"{source}:{line}: {e}"),
+            )
+            continue
+        yield ZoneRecord(domain=domain, text=text, source=source, line=line)
+
+
+def _read_zone(
+    path: str | os.PathLike[str], origin: str | None
+) -> Iterator[ZoneRecord | ZoneLineError]:
+    source: str = os.fspath(path)
+    zone_origin = None if origin is None else dns.name.from_text(origin)
+    with open(path, encoding="utf-8") as f:
+        tok = dns.tokenizer.Tokenizer(f, source)
+        try:
+            yield from _read_records(tok, source, zone_origin)
+        except (dns.exception.DNSException, UnicodeDecodeError) as e:
+            raise PODNSZoneError(f"{source}:{tok.where()[1]}: {e}") from e
+
+
+def read_zone_records(
+    path: str | os.PathLike[str], *, origin: str | None = None
+) -> Iterator[ZoneRecord]:
+    # streams the `pronouns.` TXT records out of an RFC 1035 zone file or a
+    # captured AXFR dump (such as `dig AXFR` output), without building the zone.
+    # names are relative to `origin` until a $ORIGIN directive sets one. the
+    # first line that cannot be read raises; `lint_zone` reads past them.
+    for item in _read_zone(path, origin):
+        if isinstance(item, ZoneLineError):
+            raise item.error
+        yield item
+
+
+def _first_violation(records: list[str]) -> PODNSParserError | None:
+    try:
+        parse_pronoun_records(records, pedantic=True)
+    except PODNSParserError as e:
+        return e
+    return None
+
+
+def _lint_domain(records: list[ZoneRecord]) -> DomainLintResult:
+    texts: list[str] = [record.text for record in records]
+    response: PronounsResponse | None = None
+    try:
+        response = parse_pronoun_records(texts)
+    except PODNSParserError:
+        pass
+    diagnostics: tuple[RecordDiagnostic, ...] = tuple(
+        RecordDiagnostic(record=record, error=_first_violation([record.text]))
+        for record in records
+    )
+    error: PODNSParserError | None = None
+    if len(records) > 1 and all(d.error is None for d in diagnostics):
+        error = _first_violation(texts)
+    return DomainLintResult(
+        domain=records[0].domain,
+        source=records[0].source,
+        records=diagnostics,
+        response=response,
+        error=error,
+    )
+
+
+def lint_zone(
+    path: str | os.PathLike[str],
+    *,
+    origin: str | None = None,
+) -> ZoneLintReport:
+    # groups the file's records by domain and checks each record, and then each
+    # group as a whole, against the specification. lines that cannot be read
+    # are reported in `line_errors` without stopping the rest of the file.
+    groups: dict[str, list[ZoneRecord]] = {}
+    line_errors: list[ZoneLineError] = []
+    error: PODNSZoneError | None = None
+    try:
+        for item in _read_zone(path, origin):
+            if isinstance(item, ZoneLineError):
+                line_errors.append(item)
+            else:
+                groups.setdefault(item.domain, []).append(item)
+    except (PODNSZoneError, OSError) as e:
+        error = e if isinstance(e, PODNSZoneError) else PODNSZoneError(str(e))
+    return ZoneLintReport(
+        source=os.fspath(path),
+        results=tuple(_lint_domain(records) for records in groups.values()),
+        error=error,
+        line_errors=tuple(line_errors),
+    )
+
+
+def lint_zones(
+    paths: Iterable[str | os.PathLike[str]],
+    *,
+    workers: int | None = None,
+) -> Iterator[ZoneLintReport]:
+    # lints many files across `workers` processes (default: one per CPU),
+    # yielding each report as it completes. with one worker, files are linted
+    # in this process, in order.
+    if workers is not None and workers < 1:
+        raise ValueError(f"workers must be at least 1: {workers=}")
+    if workers is None:
+        workers = os.process_cpu_count() or 1
+    if workers == 1:
+        for path in paths:
+            yield lint_zone(path)
+        return
+
+    with ProcessPoolExecutor(workers) as executor:
+        # only a few files are queued per worker, so an iterable of thousands
+        # of paths is consumed as the work progresses.
+        limit: int = 2 * workers
+        pending: set[Future[ZoneLintReport]] = set()
+        for path in paths:
+            if len(pending) >= limit:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(executor.submit(lint_zone, path))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
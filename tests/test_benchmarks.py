@@ -0,0 +1,97 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from benchmarks import bench_fetch, bench_parser
+from benchmarks.harness import (
+    BenchmarkResult,
+    compare,
+    load_baseline,
+    save_baseline,
+)
+
+
+def _result(name: str, best: float) -> BenchmarkResult:
+    return BenchmarkResult(name=name, best=best, median=best, number=1, repeat=1)
+
+
+class TestHarness(unittest.TestCase):
+    def test_baseline_round_trip(self):
+        results = [_result("a", 1e-6), _result("b", 2e-6)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baseline.json")
+            save_baseline(path, results)
+            self.assertEqual(load_baseline(path), {r.name: r for r in results})
+
+    def test_compare(self):
+        baseline = {"a": _result("a", 1.0), "b": _result("b", 1.0)}
+        results = [_result("a", 1.05), _result("b", 1.5), _result("new", 9.0)]
+
+        regressions = compare(baseline, results, threshold=0.1)
+
+        self.assertEqual([r.name for r in regressions], ["b"])
+        self.assertAlmostEqual(regressions[0].ratio, 1.5)
+        self.assertEqual(compare(baseline, results, threshold=0.6), [])
+
+
+class TestParserBenchmarks(unittest.TestCase):
+    def test_corpora_parse(self):
+        for name, records in bench_parser.CORPORA.items():
+            with self.subTest(name):
+                bench_parser.parse_pronoun_records(records)
+
+    def test_save_and_compare(self):
+        arguments = ["--filter", "realistic.single", "--repeat", "1"]
+        arguments += ["--min-time", "0"]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baseline.json")
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(bench_parser.main([*arguments, "--save", path]), 0)
+
+            with open(path) as f:
+                document = json.load(f)
+            self.assertIn(
+                "parse_pronoun_records[realistic.single]", document["results"]
+            )
+
+            # make the baseline impossibly fast, so everything regresses.
+            for result in document["results"].values():
+                result["best"] = 1e-12
+            with open(path, "w") as f:
+                json.dump(document, f)
+
+            stderr = io.StringIO()
+            with (
+                contextlib.redirect_stdout(io.StringIO()),
+                contextlib.redirect_stderr(stderr),
+            ):
+                self.assertEqual(bench_parser.main([*arguments, "--compare", path]), 1)
+            self.assertIn("regression: normalise_record", stderr.getvalue())
+
+
+class TestFetchBenchmark(unittest.TestCase):
+    def test_levels(self):
+        arguments = ["-c", "1,4", "-n", "20", "--domains", "10", "--trace-memory"]
+        arguments += ["--truncation", "0.2", "--nxdomain", "0.2"]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.json")
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(bench_fetch.main([*arguments, "--save", path]), 0)
+
+            with open(path) as f:
+                results = json.load(f)["results"]
+
+        self.assertEqual([result["concurrency"] for result in results], [1, 4])
+        for result in results:
+            self.assertEqual(result["queries"], 20)
+            self.assertEqual(result["errors"], 0)
+            self.assertGreater(result["qps"], 0)
+            self.assertLessEqual(result["p50"], result["p99"])
+            self.assertGreater(result["peak_memory"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
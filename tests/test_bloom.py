@@ -0,0 +1,138 @@
+import os
+import tempfile
+import unittest
+
+import podns.bulk
+from podns.bloom import AbsentDomains, BloomFilter
+from podns.cache import LookupCache
+from podns.error import PODNSStoreError
+from podns.testing import StubDNSServer
+
+
+class TestBloomFilter(unittest.TestCase):
+    def test_membership(self):
+        bloom = BloomFilter(1_000, 0.01)
+        for i in range(1_000):
+            bloom.add(f"domain{i}.example")
+
+        self.assertTrue(all(f"domain{i}.example" in bloom for i in range(1_000)))
+        false_positives = sum(f"other{i}.example" in bloom for i in range(10_000))
+        self.assertLess(false_positives / 10_000, 0.02)
+        self.assertAlmostEqual(bloom.false_positive_rate, 0.01, delta=0.005)
+        self.assertLessEqual(len(bloom), 1_000)
+
+    def test_sizing(self):
+        bloom = BloomFilter(1_000_000, 0.01)
+
+        # about 9.6 bits and 7 hashes per item at a 1% error rate.
+        self.assertAlmostEqual(bloom.bit_count / 1_000_000, 9.6, delta=0.1)
+        self.assertEqual(bloom.hash_count, 7)
+
+    def test_persistence(self):
+        bloom = BloomFilter(100)
+        bloom.add("example.org")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "absent.bloom")
+            bloom.save(path)
+            loaded = BloomFilter.load(path)
+
+            with open(path, "r+b") as f:
+                f.write(b"garbage!")
+            with self.assertRaises(PODNSStoreError):
+                BloomFilter.load(path)
+
+        self.assertIn("example.org", loaded)
+        self.assertNotIn("example.com", loaded)
+        self.assertEqual(len(loaded), 1)
+        self.assertEqual(loaded.bit_count, bloom.bit_count)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            BloomFilter(0)
+        with self.assertRaises(ValueError):
+            BloomFilter(10, 1.5)
+
+
+class TestAbsentDomains(unittest.TestCase):
+    def test_check(self):
+        absent = AbsentDomains(capacity=100, recheck_rate=0.25, seed=1)
+        absent.add("Missing.Example.")
+
+        self.assertIn("missing.example", absent)
+        self.assertEqual(absent.check("example.org"), "lookup")
+        checks = [absent.check("missing.example") for _ in range(1_000)]
+        self.assertEqual(set(checks), {"recheck", "skip"})
+        self.assertAlmostEqual(checks.count("recheck") / 1_000, 0.25, delta=0.05)
+        self.assertEqual(absent.checked, 1_001)
+        self.assertEqual(absent.skipped + absent.rechecked, 1_000)
+
+    def test_false_positives(self):
+        absent = AbsentDomains(capacity=100, recheck_rate=1.0)
+        absent.record("gone.example", absent=True)
+        absent.record("gone.example", absent=True, rechecked=True)
+        absent.record("back.example", absent=False, rechecked=True)
+        absent.rechecked = 2
+
+        self.assertEqual(absent.false_positives, 1)
+        self.assertEqual(absent.false_positive_rate, 0.5)
+
+
+class TestBulkWithAbsentDomains(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = StubDNSServer({"present.example": ["she/her"]})
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    async def scan(self, domains, absent, **kwargs):
+        return {
+            result.domain: result.status
+            async for result in podns.bulk.fetch_pronouns_bulk_async(
+                domains,
+                resolver=self.server.async_resolver(),
+                absent_domains=absent,
+                **kwargs,
+            )
+        }
+
+    async def test_skips_known_absent(self):
+        domains = ["present.example"] + [f"missing{i}.example" for i in range(50)]
+        absent = AbsentDomains(capacity=1_000, recheck_rate=0.0)
+
+        first = await self.scan(domains, absent)
+        queries = self.server.queries
+        second = await self.scan(domains, absent, concurrency=2)
+
+        self.assertEqual(first["missing0.example"], "nxdomain")
+        self.assertEqual(second["present.example"], "ok")
+        self.assertEqual(
+            {second[domain] for domain in domains[1:]},
+            {"skipped"},
+        )
+        self.assertEqual(self.server.queries - queries, 1)
+        self.assertEqual(absent.skipped, 50)
+
+    async def test_recheck_finds_new_record(self):
+        absent = AbsentDomains(capacity=1_000, recheck_rate=1.0)
+        absent.add("present.example")
+
+        statuses = await self.scan(["present.example"], absent, cache=LookupCache())
+
+        self.assertEqual(statuses, {"present.example": "ok"})
+        self.assertEqual(absent.rechecked, 1)
+        self.assertEqual(absent.false_positives, 1)
+        self.assertEqual(absent.false_positive_rate, 1.0)
+
+    async def test_skipped_with_cache(self):
+        absent = AbsentDomains(capacity=1_000, recheck_rate=0.0)
+        absent.add("missing.example")
+
+        statuses = await self.scan(["missing.example"], absent, cache=LookupCache())
+
+        self.assertEqual(statuses, {"missing.example": "skipped"})
+        self.assertEqual(self.server.queries, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,228 @@
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from contextlib import aclosing, redirect_stdout
+
+import podns.bulk
+import podns.cli
+import podns.dns
+import podns.parser
+from podns.bulk import BulkLookupResult
+from podns.testing import StubDNSServer
+
+
+REPOSITORY_ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ZONES: dict[str, list[str]] = {
+    "abigail.sh": ["she/her;preferred", "they/them"],
+    "example.com": ["he/him"],
+    "invalid.example": ["she"],
+}
+
+
+class TestFetchWithResolver(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = StubDNSServer(ZONES)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    async def test_fetch_async(self):
+        response = await podns.dns.fetch_pronouns_from_domain_async(
+            "abigail.sh", resolver=self.server.async_resolver()
+        )
+        self.assertEqual(
+            response, podns.parser.parse_pronoun_records(ZONES["abigail.sh"])
+        )
+
+    async def test_fetch_async_nxdomain(self):
+        response = await podns.dns.fetch_pronouns_from_domain_async(
+            "missing.example", resolver=self.server.async_resolver()
+        )
+        self.assertIsNone(response)
+
+    def test_fetch_sync(self):
+        response = podns.dns.fetch_pronouns_from_domain_sync(
+            "example.com", resolver=self.server.resolver()
+        )
+        self.assertEqual(
+            response, podns.parser.parse_pronoun_records(ZONES["example.com"])
+        )
+
+
+class TestBulkLookup(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = StubDNSServer(ZONES)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    async def collect(self, domains, **kwargs) -> dict[str, BulkLookupResult]:
+        results: dict[str, BulkLookupResult] = {}
+        async for result in podns.bulk.fetch_pronouns_bulk_async(
+            domains, resolver=self.server.async_resolver(), **kwargs
+        ):
+            results[result.domain] = result
+        return results
+
+    async def test_statuses(self):
+        results = await self.collect(
+            ["abigail.sh", "example.com", "invalid.example", "missing.example"],
+            concurrency=2,
+        )
+
+        self.assertEqual(results["abigail.sh"].status, "ok")
+        self.assertEqual(results["example.com"].status, "ok")
+        self.assertEqual(results["invalid.example"].status, "error")
+        self.assertEqual(results["missing.example"].status, "nxdomain")
+        self.assertEqual(
+            results["example.com"].response,
+            podns.parser.parse_pronoun_records(ZONES["example.com"]),
+        )
+
+    async def test_many_domains_async_iterable(self):
+        async def domains():
+            for i in range(200):
+                yield "abigail.sh" if i % 2 else f"missing{i}.example"
+
+        results: list[BulkLookupResult] = []
+        async for result in podns.bulk.fetch_pronouns_bulk_async(
+            domains(), concurrency=16, resolver=self.server.async_resolver()
+        ):
+            results.append(result)
+
+        self.assertEqual(len(results), 200)
+        self.assertEqual(sum(r.status == "ok" for r in results), 100)
+        self.assertEqual(sum(r.status == "nxdomain" for r in results), 100)
+
+    async def test_early_exit(self):
+        async with aclosing(
+            podns.bulk.fetch_pronouns_bulk_async(
+                ["abigail.sh"] * 50,
+                concurrency=4,
+                resolver=self.server.async_resolver(),
+            )
+        ) as results:
+            async for _ in results:
+                break
+        # closing the iterator must tear down the in-flight lookups.
+        self.assertEqual(
+            [t for t in asyncio.all_tasks() if t is not asyncio.current_task()], []
+        )
+
+    async def test_invalid_concurrency(self):
+        with self.assertRaises(ValueError):
+            await self.collect(["abigail.sh"], concurrency=0)
+
+
+class TestCommandLine(unittest.TestCase):
+    def setUp(self):
+        self.server = StubDNSServer(ZONES)
+        self.server.start()
+        self.nameserver: str = f"{self.server.host}:{self.server.port}"
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_file_input(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            f.write("abigail.sh\n\n# a comment\nmissing.example  # trailing\n")
+        self.addCleanup(os.unlink, f.name)
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            exit_code = podns.cli.main([f.name, "--nameserver", self.nameserver])
+
+        self.assertEqual(exit_code, 0)
+        lines = {
+            line["domain"]: line
+            for line in map(json.loads, output.getvalue().splitlines())
+        }
+        self.assertEqual(set(lines), {"abigail.sh", "missing.example"})
+        self.assertEqual(lines["abigail.sh"]["status"], "ok")
+        self.assertEqual(
+            lines["abigail.sh"]["result"],
+            podns.parser.parse_pronoun_records(ZONES["abigail.sh"]).to_dict(),
+        )
+        self.assertEqual(lines["missing.example"]["status"], "nxdomain")
+        self.assertIsNone(lines["missing.example"]["result"])
+
+    def test_module_stdin(self):
+        completed = subprocess.run(
+            [sys.executable, "-m", "podns", "-c", "2", "-n", self.nameserver],
+            input="example.com\ninvalid.example\n",
+            cwd=REPOSITORY_ROOT,
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        lines = {
+            line["domain"]: line
+            for line in map(json.loads, completed.stdout.splitlines())
+        }
+        self.assertEqual(lines["example.com"]["status"], "ok")
+        self.assertEqual(lines["invalid.example"]["status"], "error")
+        self.assertIn(
+            "PODNSParserInsufficientPronounSetValues", lines["invalid.example"]["error"]
+        )
+
+    def run_cli(self, *arguments):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            f.write("abigail.sh\nmissing.example\n")
+        self.addCleanup(os.unlink, f.name)
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            exit_code = podns.cli.main(
+                [f.name, "--nameserver", self.nameserver, *arguments]
+            )
+        self.assertEqual(exit_code, 0)
+        return {
+            line["domain"]: line["status"]
+            for line in map(json.loads, output.getvalue().splitlines())
+        }
+
+    def test_adaptive(self):
+        self.assertEqual(
+            self.run_cli("--adaptive", "--concurrency", "4"),
+            {"abigail.sh": "ok", "missing.example": "nxdomain"},
+        )
+
+    def test_rate(self):
+        started: float = time.perf_counter()
+        statuses = self.run_cli("--rate", "20")
+
+        self.assertEqual(statuses, {"abigail.sh": "ok", "missing.example": "nxdomain"})
+        # the second query waits for the next token.
+        self.assertGreaterEqual(time.perf_counter() - started, 1 / 20 - 0.01)
+
+    def test_absent_filter(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "absent.bloom")
+            arguments = ("--absent-filter", path, "--recheck-rate", "0")
+
+            first = self.run_cli(*arguments)
+            second = self.run_cli(*arguments)
+
+        self.assertEqual(first, {"abigail.sh": "ok", "missing.example": "nxdomain"})
+        self.assertEqual(second, {"abigail.sh": "ok", "missing.example": "skipped"})
+
+    def test_parse_nameserver(self):
+        for value, host, port in (
+            ("1.1.1.1", "1.1.1.1", 53),
+            ("127.0.0.1:5353", "127.0.0.1", 5353),
+            ("[::1]", "::1", 53),
+            ("[::1]:5353", "::1", 5353),
+            ("::1", "::1", 53),
+        ):
+            nameserver = podns.cli._parse_nameserver(value)
+            self.assertEqual((nameserver.address, nameserver.port), (host, port))
@@ -0,0 +1,170 @@
+import asyncio
+import random
+import time
+import unittest
+
+import podns.dns
+import podns.metrics
+from podns.cache import CACHE_MISS, LookupCache
+from podns.metrics import InMemoryCollector
+from podns.parser import parse_pronoun_records
+from podns.testing import StubDNSServer
+
+
+SHE_HER = parse_pronoun_records(["she/her"])
+
+
+class TestLookupCache(unittest.TestCase):
+    def test_get_and_set(self):
+        cache = LookupCache(100)
+
+        self.assertIs(cache.get_sync("example.org"), CACHE_MISS)
+        cache.set_sync("example.org", SHE_HER)
+        cache.set_sync("missing.example", None)
+
+        self.assertEqual(cache.get_sync("example.org"), SHE_HER)
+        self.assertIsNone(cache.get_sync("missing.example"))
+        self.assertIn("example.org", cache)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+        self.assertAlmostEqual(cache.hit_ratio, 2 / 3)
+
+    def test_update(self):
+        cache = LookupCache(100)
+        cache.set_sync("example.org", None)
+        cache.set_sync("example.org", SHE_HER)
+
+        self.assertEqual(cache.get_sync("example.org"), SHE_HER)
+        self.assertEqual(len(cache), 1)
+
+    def test_delete_and_clear(self):
+        cache = LookupCache(100)
+        cache.set_sync("a.example", SHE_HER)
+        cache.set_sync("b.example", SHE_HER)
+
+        cache.delete("a.example")
+        self.assertNotIn("a.example", cache)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.weight, 0)
+
+    def test_ttl(self):
+        cache = LookupCache(100, ttl=0.05, negative_ttl=0.01)
+        cache.set_sync("example.org", SHE_HER)
+        cache.set_sync("missing.example", None)
+        cache.set_sync("short.example", SHE_HER, ttl=0.01)
+        cache.set_sync("long.example", SHE_HER, ttl=60)
+        time.sleep(0.02)
+
+        self.assertEqual(cache.get_sync("example.org"), SHE_HER)
+        self.assertIs(cache.get_sync("missing.example"), CACHE_MISS)
+        self.assertIs(cache.get_sync("short.example"), CACHE_MISS)
+        time.sleep(0.04)
+        # the cache's own ttl caps the one given.
+        self.assertIs(cache.get_sync("long.example"), CACHE_MISS)
+
+    def test_entry_limit(self):
+        cache = LookupCache(50)
+        for i in range(1_000):
+            key = f"domain{i}.example"
+            cache.get_sync(key)
+            cache.set_sync(key, SHE_HER)
+
+        self.assertLessEqual(len(cache), 50)
+        self.assertGreater(cache.evictions + cache.rejections, 0)
+
+    def test_byte_limit(self):
+        cache = LookupCache(max_bytes=20_000)
+        for i in range(1_000):
+            key = f"domain{i}.example"
+            cache.get_sync(key)
+            cache.set_sync(key, SHE_HER)
+
+        self.assertLessEqual(cache.weight, 20_000)
+        self.assertGreater(len(cache), 0)
+
+    def test_scan_resistance(self):
+        cache = LookupCache(100)
+        hot = [f"hot{i}.example" for i in range(50)]
+        chooser = random.Random(1)
+
+        def request(key):
+            if cache.get_sync(key) is CACHE_MISS:
+                cache.set_sync(key, SHE_HER)
+
+        for _ in range(2_000):
+            request(chooser.choice(hot))
+
+        # a crawl of one-off domains, interleaved with the usual traffic.
+        hits, misses = cache.hits, cache.misses
+        for i in range(10_000):
+            request(f"crawl{i}.example")
+            if i % 4 == 0:
+                request(chooser.choice(hot))
+        crawl_misses = 10_000
+
+        hot_hits = cache.hits - hits
+        hot_requests = hot_hits + (cache.misses - misses - crawl_misses)
+        self.assertGreater(hot_hits / hot_requests, 0.95)
+        self.assertTrue(all(key in cache for key in hot))
+
+
+class TestCachedLookups(unittest.TestCase):
+    def setUp(self):
+        self.server = StubDNSServer({"example.org": ["she/her"]}, ttl=300)
+        self.server.start()
+        self.collector = InMemoryCollector()
+        podns.metrics.set_metrics_collector(self.collector)
+
+    def tearDown(self):
+        podns.metrics.set_metrics_collector(None)
+        self.server.stop()
+
+    def test_sync(self):
+        cache = LookupCache()
+        resolver = self.server.resolver()
+        for domain in ("example.org", "EXAMPLE.org.", "missing.example") * 2:
+            podns.dns.fetch_pronouns_from_domain_sync(
+                domain, resolver=resolver, cache=cache
+            )
+
+        self.assertEqual(self.server.queries, 2)
+        self.assertEqual(cache.hits, 4)
+        self.assertEqual(self.collector.counter(podns.metrics.CACHE_HITS_TOTAL), 4)
+        self.assertEqual(self.collector.counter(podns.metrics.CACHE_MISSES_TOTAL), 2)
+
+    def test_async(self):
+        cache = LookupCache()
+        resolver = self.server.async_resolver()
+
+        async def lookup(domain, **kwargs):
+            return await podns.dns.fetch_pronouns_from_domain_async(
+                domain, resolver=resolver, cache=cache, **kwargs
+            )
+
+        async def lookups():
+            first = await lookup("example.org")
+            self.assertEqual(await lookup("example.org"), first)
+            self.assertIsNone(await lookup("missing.example"))
+            self.assertIsNone(await lookup("missing.example"))
+            # pedantic lookups are cached separately.
+            await lookup("example.org", pedantic=True)
+
+        asyncio.run(lookups())
+
+        self.assertEqual(self.server.queries, 3)
+        self.assertEqual(cache.hits, 2)
+
+    def test_dns_ttl(self):
+        cache = LookupCache()
+        with StubDNSServer({"example.org": ["she/her"]}, ttl=0) as server:
+            resolver = server.resolver()
+            for _ in range(2):
+                podns.dns.fetch_pronouns_from_domain_sync(
+                    "example.org", resolver=resolver, cache=cache
+                )
+
+            self.assertEqual(server.queries, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
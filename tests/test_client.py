@@ -0,0 +1,125 @@
+import threading
+import unittest
+
+from podns.client import PronounsClient
+from podns.error import PODNSInvalidDomain
+from podns.parser import parse_pronoun_records
+from podns.testing import StubDNSServer, synthetic_zones
+from podns.transport import PipelinedTCPResolver
+
+
+ZONES: dict[str, list[str]] = synthetic_zones(30, seed=7)
+
+
+class TestPronounsClient(unittest.TestCase):
+    def setUp(self):
+        self.server = StubDNSServer(ZONES, latency=0.02)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+    def client(self, **kwargs):
+        client = PronounsClient(
+            resolver=kwargs.pop("resolver", None) or self.server.async_resolver(),
+            deadline=5.0,
+            **kwargs,
+        )
+        self.addCleanup(client.close)
+        return client
+
+    def run_threads(self, target, count):
+        barrier = threading.Barrier(count)
+        results: list[object] = [None] * count
+
+        def run(index):
+            barrier.wait()
+            results[index] = target(index)
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_fetch(self):
+        client = self.client()
+
+        self.assertEqual(
+            client.fetch("domain0.example"),
+            parse_pronoun_records(ZONES["domain0.example"]),
+        )
+        self.assertIsNone(client.fetch("missing.example"))
+        with self.assertRaises(PODNSInvalidDomain):
+            client.fetch("domain0..example")
+
+    def test_threads_share_queries_in_flight(self):
+        client = self.client()
+
+        responses = self.run_threads(lambda _: client.fetch("domain0.example"), 8)
+
+        self.assertEqual(self.server.queries, 1)
+        self.assertEqual(
+            responses, [parse_pronoun_records(ZONES["domain0.example"])] * 8
+        )
+
+    def test_threads_share_pooled_connections(self):
+        resolver = PipelinedTCPResolver([self.server.nameserver])
+        client = self.client(resolver=resolver)
+        domains = list(ZONES)
+
+        responses = self.run_threads(lambda i: client.fetch(domains[i]), len(domains))
+
+        for domain, response in zip(domains, responses):
+            self.assertEqual(response, parse_pronoun_records(ZONES[domain]))
+        self.assertEqual(resolver.connections_opened, 1)
+
+    def test_submit(self):
+        client = self.client()
+
+        futures = [client.submit(domain) for domain in ZONES]
+
+        for domain, future in zip(ZONES, futures):
+            self.assertEqual(future.result(), parse_pronoun_records(ZONES[domain]))
+
+    def test_fetch_bulk(self):
+        client = self.client()
+
+        results = {
+            result.domain: result.status
+            for result in client.fetch_bulk([*ZONES, "missing.example"])
+        }
+
+        self.assertEqual(
+            results, {**dict.fromkeys(ZONES, "ok"), "missing.example": "nxdomain"}
+        )
+
+    def test_fetch_bulk_stopped_early(self):
+        client = self.client()
+
+        for _ in client.fetch_bulk(ZONES):
+            break
+
+        self.assertIsNotNone(client.fetch("domain0.example"))
+
+    def test_close(self):
+        with self.client() as client:
+            client.fetch("domain0.example")
+
+        self.assertTrue(client.closed)
+        self.assertFalse(client._thread.is_alive())
+        with self.assertRaises(RuntimeError):
+            client.fetch("domain0.example")
+        client.close()
+
+    def test_close_cancels_lookups(self):
+        self.server.latency = 1.0
+        client = self.client()
+        future = client.submit("domain0.example")
+
+        client.close()
+
+        self.assertTrue(future.cancelled())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+from podns.codec import decode_response, encode_response
+from podns.error import PODNSCodecError
+from podns.parser import parse_pronoun_records
+from podns.pronouns import (
+    PronounRecord,
+    Pronouns,
+    PronounsResponse,
+)
+
+
+RESPONSES = {
+    "single": parse_pronoun_records(["she/her"]),
+    "full": parse_pronoun_records(
+        ["he/him/his/his/himself;preferred", "they/them/their/theirs/themself"]
+    ),
+    "any": parse_pronoun_records(["*", "she/her"]),
+    "name_only": parse_pronoun_records(["!"]),
+    "non_ascii": parse_pronoun_records(["ça/ço", "ze/zir/zir/zirs/zirself"]),
+    "long": parse_pronoun_records(["/".join(c * 300 for c in "abcde")]),
+    "many": parse_pronoun_records([f"s{i}/o{i}" for i in range(300)]),
+}
+
+
+class TestCodec(unittest.TestCase):
+    def test_round_trip(self):
+        for name, response in RESPONSES.items():
+            with self.subTest(name):
+                self.assertEqual(decode_response(encode_response(response)), response)
+
+    def test_gaps(self):
+        response = PronounsResponse(
+            uses_any_pronouns=False,
+            uses_name_only=False,
+            records=frozenset(
+                {
+                    PronounRecord(
+                        pronouns=Pronouns("she", "her", None, None, "herself"),
+                        tags=frozenset(),
+                    )
+                }
+            ),
+        )
+        self.assertEqual(decode_response(encode_response(response)), response)
+
+    def test_stable(self):
+        response = RESPONSES["full"]
+        reordered = PronounsResponse(
+            uses_any_pronouns=response.uses_any_pronouns,
+            uses_name_only=response.uses_name_only,
+            records=frozenset(reversed(list(response.records))),
+        )
+        self.assertEqual(encode_response(response), encode_response(reordered))
+
+    def test_compact(self):
+        self.assertLessEqual(len(encode_response(RESPONSES["single"])), 16)
+
+    def test_malformed(self):
+        encoded = encode_response(RESPONSES["full"])
+        for data in (b"", b"\x02\x00\x00", encoded[:-1], encoded + b"\x00"):
+            with self.subTest(data=data):
+                with self.assertRaises(PODNSCodecError):
+                    decode_response(data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import time
+import unittest
+
+from podns.parser import parse_pronoun_records
+from podns.pronouns import (
+    PronounRecord,
+    Pronouns,
+    PronounsDiff,
+    PronounsResponse,
+    PronounTag,
+    diff,
+)
+
+
+def parse(*records):
+    return parse_pronoun_records(list(records))
+
+
+class TestDiff(unittest.TestCase):
+    def test_unchanged(self):
+        changes = diff(parse("she/her", "they/them"), parse("they/them", "she/her"))
+
+        self.assertFalse(changes)
+        self.assertEqual(changes.added, frozenset())
+        self.assertEqual(changes.retagged, ())
+
+    def test_added_removed_and_retagged(self):
+        old = parse("she/her", "they/them", "xe/xem")
+        new = parse("she/her;preferred", "they/them", "he/him")
+
+        changes = diff(old, new)
+
+        self.assertTrue(changes)
+        self.assertEqual({str(r) for r in changes.added}, {"he/him"})
+        self.assertEqual({str(r) for r in changes.removed}, {"xe/xem"})
+        self.assertEqual(
+            [(str(old), str(new)) for old, new in changes.retagged],
+            [("she/her", "she/her [preferred]")],
+        )
+        self.assertFalse(changes.uses_any_pronouns_changed)
+
+    def test_retagged_order(self):
+        names = ["xe/xem", "she/her", "they/them", "ze/hir", "he/him", "it/its"]
+        old = parse(*names)
+        new = parse(*(f"{name};preferred" for name in names))
+
+        changes = diff(old, new)
+        self.assertEqual(changes, diff(parse(*reversed(names)), new))
+        self.assertEqual(
+            [str(old) for old, _ in changes.retagged],
+            sorted(str(record) for record in old.records),
+        )
+
+    def test_flags(self):
+        changes = diff(parse("she/her"), parse("!"))
+
+        self.assertTrue(changes.uses_name_only_changed)
+        self.assertFalse(changes.uses_any_pronouns_changed)
+        self.assertEqual(len(changes.removed), 1)
+        self.assertTrue(diff(parse("*"), parse("*", "she/her")).added)
+        self.assertTrue(diff(parse("she/her"), parse("*", "she/her")))
+
+    def test_nxdomain(self):
+        response = parse("she/her")
+
+        self.assertEqual(diff(None, response).added, response.records)
+        self.assertEqual(diff(response, None).removed, response.records)
+        self.assertFalse(diff(None, None))
+
+    def test_apply(self):
+        cases = [
+            (parse("she/her", "xe/xem"), parse("she/her;preferred", "he/him")),
+            (parse("*"), parse("!")),
+            (None, parse("they/them")),
+            (parse("she/her"), parse("she/her")),
+        ]
+        for old, new in cases:
+            with self.subTest(old=old, new=new):
+                self.assertEqual(diff(old, new).apply(old), new)
+
+    def test_to_dict(self):
+        changes = diff(parse("she/her"), parse("she/her;preferred", "*"))
+
+        self.assertEqual(
+            changes.to_dict(),
+            {
+                "added": [],
+                "removed": [],
+                "retagged": [
+                    {
+                        "old": parse("she/her").to_dict()["records"][0],
+                        "new": parse("she/her;preferred").to_dict()["records"][0],
+                    }
+                ],
+                "uses_any_pronouns_changed": True,
+                "uses_name_only_changed": False,
+            },
+        )
+        self.assertIsInstance(changes, PronounsDiff)
+
+    def test_linear_time(self):
+        def response(count, tags):
+            return PronounsResponse(
+                uses_any_pronouns=False,
+                uses_name_only=False,
+                records=frozenset(
+                    PronounRecord(Pronouns(f"s{i}", f"o{i}", None, None, None), tags)
+                    for i in range(count)
+                ),
+            )
+
+        def timed(count):
+            old = response(count, frozenset())
+            new = response(count, frozenset({PronounTag.PREFERRED}))
+            started = time.perf_counter()
+            changes = diff(old, new)
+            elapsed = time.perf_counter() - started
+            self.assertEqual(len(changes.retagged), count)
+            return elapsed
+
+        small = min(timed(1_000) for _ in range(3))
+        large = min(timed(10_000) for _ in range(3))
+        # quadratic matching would be about 100 times slower.
+        self.assertLess(large, small * 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import asyncio
+import importlib.util
+import unittest
+
+import dns.resolver
+
+import podns.bulk
+import podns.dns
+import podns.doh
+from podns.parser import parse_pronoun_records
+from podns.ratelimit import NameserverRateLimiter
+from podns.testing import StubDoHServer, synthetic_zones
+
+
+HAS_H2: bool = importlib.util.find_spec("h2") is not None
+ZONES: dict[str, list[str]] = synthetic_zones(50, seed=5)
+
+
+@unittest.skipUnless(HAS_H2, "needs h2")
+class TestDoHResolver(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = StubDoHServer(ZONES, latency=0.01)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+    def resolver(self, **kwargs):
+        resolver = self.server.resolver(**kwargs)
+        self.addAsyncCleanup(resolver.aclose)
+        return resolver
+
+    async def fetch(self, domain, resolver, **kwargs):
+        return await podns.dns.fetch_pronouns_from_domain_async(
+            domain, resolver=resolver, deadline=5.0, **kwargs
+        )
+
+    async def test_multiplexes_over_http2(self):
+        resolver = self.resolver(max_connections=1)
+        domains = list(ZONES)
+
+        responses = await asyncio.gather(
+            *(self.fetch(domain, resolver) for domain in domains)
+        )
+
+        for domain, response in zip(domains, responses):
+            self.assertEqual(response, parse_pronoun_records(ZONES[domain]))
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(self.server.requests, len(domains))
+        self.assertGreater(self.server.max_streams, 1)
+
+    async def test_get(self):
+        resolver = self.resolver(method="GET")
+
+        self.assertEqual(
+            await self.fetch("domain0.example", resolver),
+            parse_pronoun_records(ZONES["domain0.example"]),
+        )
+        self.assertIsNone(await self.fetch("missing.example", resolver))
+
+    async def test_opens_connections_as_streams_fill(self):
+        self.server.dns.latency = 0.05
+        resolver = self.resolver(max_outstanding=5, max_connections=3)
+
+        await asyncio.gather(*(self.fetch(domain, resolver) for domain in ZONES))
+
+        self.assertEqual(self.server.connections, 3)
+        self.assertEqual(resolver.connections_opened, 3)
+
+    async def test_waits_for_streams_to_free(self):
+        with StubDoHServer(ZONES, latency=0.02, max_concurrent_streams=4) as server:
+            resolver = server.resolver(max_connections=2)
+            self.addAsyncCleanup(resolver.aclose)
+            domains = list(ZONES)
+
+            responses = await asyncio.gather(
+                *(self.fetch(domain, resolver) for domain in domains)
+            )
+
+        # more lookups than the streams every connection allows at once.
+        self.assertGreater(len(domains), 4 * 2)
+        for domain, response in zip(domains, responses):
+            self.assertEqual(response, parse_pronoun_records(ZONES[domain]))
+        self.assertEqual(server.connections, 2)
+        self.assertEqual(server.max_streams, 4)
+
+    async def test_reconnects_after_server_closes(self):
+        resolver = self.resolver()
+        await self.fetch("domain0.example", resolver)
+        self.server.stop()
+        self.server.start()
+
+        self.assertIsNotNone(await self.fetch("domain1.example", resolver))
+        self.assertEqual(resolver.connections_opened, 2)
+
+    async def test_nxdomain(self):
+        self.assertIsNone(await self.fetch("missing.example", self.resolver()))
+
+    async def test_rate_limited_by_url(self):
+        limiter = NameserverRateLimiter(default_rate=1000.0)
+
+        await self.fetch("domain0.example", self.resolver(), rate_limiter=limiter)
+
+        self.assertEqual(list(limiter.buckets), [self.server.url])
+
+    async def test_servfail(self):
+        self.server.dns.servfail_rate = 1.0
+
+        with self.assertRaises(dns.resolver.NoNameservers):
+            await self.resolver().resolve("pronouns.domain0.example", "TXT")
+
+    async def test_bad_path(self):
+        resolver = podns.doh.DoHResolver([self.server.url + "/missing"])
+        self.addAsyncCleanup(resolver.aclose)
+
+        with self.assertRaises(dns.resolver.NoNameservers):
+            await resolver.resolve("pronouns.domain0.example", "TXT")
+
+    async def test_bulk(self):
+        statuses = [
+            result.status
+            async for result in podns.bulk.fetch_pronouns_bulk_async(
+                ZONES, resolver=self.resolver(), timeout=5.0
+            )
+        ]
+
+        self.assertEqual(statuses, ["ok"] * len(ZONES))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import asyncio
+import unittest
+
+import podns.dns
+from podns.cache import LookupCache, cache_key
+from podns.domain import canonical_domain
+from podns.error import PODNSInvalidDomain
+from podns.testing import StubDNSServer
+
+
+ZONES: dict[str, list[str]] = {
+    "abigail.sh": ["she/her"],
+    "xn--bcher-kva.example": ["they/them"],
+}
+
+
+class TestCanonicalDomain(unittest.TestCase):
+    def test_equivalent_spellings(self):
+        for domain in ("abigail.sh", "Abigail.SH", "abigail.sh.", "  abigail.sh\n"):
+            with self.subTest(domain=domain):
+                self.assertEqual(canonical_domain(domain), "abigail.sh")
+
+    def test_idna(self):
+        self.assertEqual(canonical_domain("Bücher.example"), "xn--bcher-kva.example")
+        self.assertEqual(canonical_domain("bücher。example"), "xn--bcher-kva.example")
+        self.assertEqual(
+            canonical_domain("XN--BCHER-KVA.example"), "xn--bcher-kva.example"
+        )
+
+    def test_invalid(self):
+        for domain in (
+            "",
+            " ",
+            ".",
+            "abigail..sh",
+            ".abigail.sh",
+            "abigail.sh..",
+            "-abigail.sh",
+            "abigail-.sh",
+            "abi gail.sh",
+            "abigail.sh/pronouns",
+            "a" * 64 + ".sh",
+            ".".join(["a" * 60] * 5),
+        ):
+            with self.subTest(domain=domain):
+                with self.assertRaises(PODNSInvalidDomain):
+                    canonical_domain(domain)
+
+    def test_invalid_is_value_error(self):
+        with self.assertRaises(ValueError):
+            canonical_domain("abigail..sh")
+
+    def test_cache_key(self):
+        self.assertEqual(cache_key("Abigail.SH."), cache_key("abigail.sh"))
+        self.assertEqual(cache_key("Bücher.example"), "xn--bcher-kva.example")
+
+
+class TestCanonicalLookups(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = StubDNSServer(ZONES, latency=0.02)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.resolver = self.server.async_resolver()
+
+    async def fetch(self, domain, **kwargs):
+        return await podns.dns.fetch_pronouns_from_domain_async(
+            domain, resolver=self.resolver, **kwargs
+        )
+
+    async def test_invalid_domain_is_not_queried(self):
+        with self.assertRaises(PODNSInvalidDomain):
+            await self.fetch("abigail..sh")
+        with self.assertRaises(PODNSInvalidDomain):
+            podns.dns.fetch_pronouns_from_domain_sync(
+                "abigail..sh", resolver=self.server.resolver()
+            )
+
+        self.assertEqual(self.server.queries, 0)
+
+    async def test_idna_lookup(self):
+        self.assertIsNotNone(await self.fetch("Bücher.example"))
+        self.assertIsNotNone(
+            podns.dns.fetch_pronouns_from_domain_sync(
+                "Bücher.example", resolver=self.server.resolver()
+            )
+        )
+
+    async def test_equivalent_domains_share_cache_entries(self):
+        cache = LookupCache()
+
+        await self.fetch("Abigail.SH", cache=cache)
+        await self.fetch("abigail.sh.", cache=cache)
+
+        self.assertEqual(self.server.queries, 1)
+
+    async def test_equivalent_domains_share_queries_in_flight(self):
+        responses = await asyncio.gather(
+            self.fetch("abigail.sh"),
+            self.fetch("Abigail.SH"),
+            self.fetch("abigail.sh."),
+        )
+
+        self.assertEqual(self.server.queries, 1)
+        self.assertEqual(responses[0], responses[1])
+        self.assertEqual(responses[0], responses[2])
+
+    async def test_different_options_do_not_share_queries(self):
+        await asyncio.gather(
+            self.fetch("abigail.sh"), self.fetch("abigail.sh", pedantic=True)
+        )
+
+        self.assertEqual(self.server.queries, 2)
+
+    async def test_cancelling_one_waiter_keeps_the_query(self):
+        first = asyncio.create_task(self.fetch("abigail.sh"))
+        second = asyncio.create_task(self.fetch("abigail.sh"))
+        await asyncio.sleep(0.005)
+        first.cancel()
+
+        self.assertIsNotNone(await second)
+        self.assertEqual(self.server.queries, 1)
+        with self.assertRaises(asyncio.CancelledError):
+            await first
+
+
+if __name__ == "__main__":
+    unittest.main()
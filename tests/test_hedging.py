@@ -0,0 +1,156 @@
+import time
+import unittest
+
+import podns.dns
+import podns.error
+import podns.parser
+from podns.hedging import HedgingPolicy
+from podns.testing import StubDNSServer
+
+
+ZONES: dict[str, list[str]] = {"abigail.sh": ["she/her;preferred", "they/them"]}
+
+
+class TestDeadline(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = StubDNSServer(ZONES, latency=1.0)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    async def test_async_deadline_exceeded(self):
+        started: float = time.perf_counter()
+        with self.assertRaises(podns.error.PODNSLookupTimeout):
+            await podns.dns.fetch_pronouns_from_domain_async(
+                "abigail.sh", resolver=self.server.async_resolver(), deadline=0.2
+            )
+        self.assertLess(time.perf_counter() - started, 0.9)
+
+    async def test_async_deadline_met(self):
+        self.server.latency = 0.0
+        response = await podns.dns.fetch_pronouns_from_domain_async(
+            "abigail.sh", resolver=self.server.async_resolver(), deadline=2.0
+        )
+        self.assertEqual(
+            response, podns.parser.parse_pronoun_records(ZONES["abigail.sh"])
+        )
+
+    def test_sync_deadline_exceeded(self):
+        with self.assertRaises(podns.error.PODNSLookupTimeout):
+            podns.dns.fetch_pronouns_from_domain_sync(
+                "abigail.sh", resolver=self.server.resolver(), deadline=0.2
+            )
+
+    def test_timeout_is_a_timeout_error(self):
+        self.assertTrue(issubclass(podns.error.PODNSLookupTimeout, TimeoutError))
+        self.assertTrue(
+            issubclass(podns.error.PODNSLookupTimeout, podns.error.PODNSError)
+        )
+
+
+class TestHedging(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.slow = StubDNSServer(ZONES, latency=1.0)
+        self.fast = StubDNSServer(ZONES)
+        self.slow.start()
+        self.fast.start()
+
+    def tearDown(self):
+        self.slow.stop()
+        self.fast.stop()
+
+    async def test_hedge_to_second_nameserver(self):
+        policy = HedgingPolicy(
+            [self.slow.nameserver, self.fast.nameserver], initial_delay=0.05
+        )
+
+        started: float = time.perf_counter()
+        response = await podns.dns.fetch_pronouns_from_domain_async(
+            "abigail.sh", hedging=policy, deadline=2.0
+        )
+
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual(
+            response, podns.parser.parse_pronoun_records(ZONES["abigail.sh"])
+        )
+        self.assertEqual(policy.hedged_queries, 1)
+        self.assertEqual(policy.hedge_wins, 1)
+
+    async def test_no_hedge_when_primary_is_fast(self):
+        policy = HedgingPolicy(
+            [self.fast.nameserver, self.slow.nameserver], initial_delay=0.5
+        )
+
+        for _ in range(3):
+            response = await podns.dns.fetch_pronouns_from_domain_async(
+                "abigail.sh", hedging=policy
+            )
+            self.assertIsNotNone(response)
+
+        self.assertEqual(policy.hedged_queries, 0)
+        self.assertEqual(self.slow.queries, 0)
+
+    async def test_slow_primary_keeps_the_delay_up(self):
+        policy = HedgingPolicy(
+            [self.slow.nameserver, self.fast.nameserver],
+            initial_delay=0.05,
+            min_samples=8,
+        )
+
+        for _ in range(8):
+            await podns.dns.fetch_pronouns_from_domain_async(
+                "abigail.sh", hedging=policy
+            )
+
+        # every primary query lost to the hedge after the delay, so counting
+        # them keeps the delay there instead of falling to the fast answers'.
+        self.assertEqual(policy.hedge_wins, 8)
+        self.assertGreaterEqual(policy.hedge_delay(), 0.05)
+
+    async def test_nxdomain_is_a_valid_answer(self):
+        policy = HedgingPolicy(
+            [self.fast.nameserver, self.slow.nameserver], initial_delay=0.5
+        )
+
+        response = await podns.dns.fetch_pronouns_from_domain_async(
+            "missing.example", hedging=policy
+        )
+
+        self.assertIsNone(response)
+        self.assertEqual(policy.hedged_queries, 0)
+
+    async def test_deadline_applies_to_hedged_queries(self):
+        self.fast.latency = 1.0
+        policy = HedgingPolicy(
+            [self.slow.nameserver, self.fast.nameserver], initial_delay=0.05
+        )
+
+        with self.assertRaises(podns.error.PODNSLookupTimeout):
+            await podns.dns.fetch_pronouns_from_domain_async(
+                "abigail.sh", hedging=policy, deadline=0.3
+            )
+
+
+class TestHedgeDelay(unittest.TestCase):
+    def test_initial_delay_until_enough_samples(self):
+        policy = HedgingPolicy(["127.0.0.1", "127.0.0.2"], initial_delay=0.25)
+        for _ in range(policy.min_samples - 1):
+            policy.record_latency(0.01)
+        self.assertEqual(policy.hedge_delay(), 0.25)
+
+    def test_percentile(self):
+        policy = HedgingPolicy(["127.0.0.1", "127.0.0.2"], percentile=90.0)
+        for i in range(1, 101):
+            policy.record_latency(i / 1000)
+        self.assertAlmostEqual(policy.hedge_delay(), 0.090, places=3)
+
+    def test_min_delay(self):
+        policy = HedgingPolicy(["127.0.0.1", "127.0.0.2"], min_delay=0.02)
+        for _ in range(100):
+            policy.record_latency(0.001)
+        self.assertEqual(policy.hedge_delay(), 0.02)
+
+    def test_requires_two_nameservers(self):
+        with self.assertRaises(ValueError):
+            HedgingPolicy(["127.0.0.1"])
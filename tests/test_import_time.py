@@ -0,0 +1,83 @@
+import os
+import subprocess
+import sys
+import unittest
+
+
+REPOSITORY_ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# generous enough for slow CI machines, but well below the cost of importing
+# dnspython (which is several times larger than the parser on its own).
+IMPORT_TIME_BUDGET_US: int = 30_000
+IMPORT_TIME_ATTEMPTS: int = 3
+
+
+def _import_time(statement: str) -> tuple[int, set[str]]:
+    # returns the cumulative import time of the top-level module in
+    # microseconds, alongside every module that was imported.
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=REPOSITORY_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    cumulative: int = 0
+    imported: set[str] = set()
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_part, module_part = line.split("|")
+        module: str = module_part.strip()
+        imported.add(module)
+        if module == "podns":
+            cumulative = int(cumulative_part)
+    return cumulative, imported
+
+
+class TestImportTime(unittest.TestCase):
+    def assert_import_within_budget(self, statement: str) -> None:
+        timings: list[int] = []
+        for _ in range(IMPORT_TIME_ATTEMPTS):
+            cumulative, imported = _import_time(statement)
+            self.assertIn("podns", imported)
+            self.assertFalse(
+                {m for m in imported if m == "dns" or m.startswith("dns.")},
+                f"{statement!r} imported dnspython",
+            )
+            timings.append(cumulative)
+
+        self.assertLessEqual(min(timings), IMPORT_TIME_BUDGET_US, f"{timings=}")
+
+    def test_import_podns(self):
+        self.assert_import_within_budget("import podns")
+
+    def test_import_podns_parser(self):
+        self.assert_import_within_budget("import podns.parser")
+
+
+class TestLazyDNSImport(unittest.TestCase):
+    def test_fetchers_load_on_access(self):
+        completed = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, podns; "
+                "assert 'dns.resolver' not in sys.modules; "
+                "podns.fetch_pronouns_from_domain_async; "
+                "assert 'dns.resolver' in sys.modules; "
+                "assert podns.dns.fetch_pronouns_from_domain_sync "
+                "is podns.fetch_pronouns_from_domain_sync",
+            ],
+            cwd=REPOSITORY_ROOT,
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+
+    def test_unknown_attribute(self):
+        import podns
+
+        with self.assertRaises(AttributeError):
+            podns.does_not_exist
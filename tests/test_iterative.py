@@ -0,0 +1,148 @@
+import unittest
+from contextlib import ExitStack
+
+import dns.name
+import dns.resolver
+
+import podns.bulk
+import podns.dns
+from podns.iterative import IterativeResolver
+from podns.parser import parse_pronoun_records
+from podns.testing import StubDNSServer
+
+
+class TestIterativeResolver(unittest.IsolatedAsyncioTestCase):
+    # a root, the `sh.` TLD, an authoritative server for three domains under
+    # it, and the `example.` TLD, whose nameserver is delegated without glue.
+    # `evil.sh` is delegated with glue for a nameserver outside it, pointing
+    # at an address nothing answers on.
+    def setUp(self):
+        stack = ExitStack()
+        self.addCleanup(stack.close)
+        self.root = stack.enter_context(
+            StubDNSServer(
+                delegations={
+                    "sh": {"ns.nic.sh": "127.0.0.2"},
+                    "example": {"ns1.nic.sh": None},
+                },
+            )
+        )
+        port = self.root.port
+        self.tld = stack.enter_context(
+            StubDNSServer(
+                host="127.0.0.2",
+                port=port,
+                delegations={
+                    "abigail.sh": {"ns1.abigail.sh": "127.0.0.3"},
+                    "other.sh": {"ns1.other.sh": "127.0.0.3"},
+                    "evil.sh": {"ns1.abigail.sh": "127.0.0.9"},
+                },
+                hosts={"ns1.nic.sh": "127.0.0.4"},
+            )
+        )
+        self.authoritative = stack.enter_context(
+            StubDNSServer(
+                {
+                    "abigail.sh": ["she/her;preferred"],
+                    "other.sh": ["they/them"],
+                    "evil.sh": ["it/its"],
+                },
+                host="127.0.0.3",
+                port=port,
+                hosts={"ns1.abigail.sh": "127.0.0.3"},
+            )
+        )
+        self.glueless = stack.enter_context(
+            StubDNSServer({"domain.example": ["xe/xem"]}, host="127.0.0.4", port=port)
+        )
+        self.resolver = IterativeResolver(["127.0.0.1"], port=port, timeout=0.5)
+
+    async def fetch(self, domain, resolver=None):
+        return await podns.dns.fetch_pronouns_from_domain_async(
+            domain, resolver=resolver or self.resolver, deadline=5.0
+        )
+
+    async def test_resolves_through_delegations(self):
+        self.assertEqual(
+            await self.fetch("abigail.sh"),
+            parse_pronoun_records(["she/her;preferred"]),
+        )
+        self.assertEqual(self.resolver.referrals, 2)
+        self.assertEqual(self.resolver.cached_zones, 2)
+
+    async def test_reuses_delegations(self):
+        await self.fetch("abigail.sh")
+        self.assertEqual(
+            await self.fetch("other.sh"), parse_pronoun_records(["they/them"])
+        )
+        await self.fetch("abigail.sh")
+
+        self.assertEqual(self.root.queries, 1)
+        self.assertEqual(self.tld.queries, 2)
+        self.assertEqual(self.authoritative.queries, 3)
+
+    async def test_max_ttl(self):
+        resolver = IterativeResolver(["127.0.0.1"], port=self.root.port, max_ttl=0)
+        await self.fetch("abigail.sh", resolver)
+        await self.fetch("abigail.sh", resolver)
+
+        self.assertEqual(self.root.queries, 2)
+
+    async def test_max_zones(self):
+        resolver = IterativeResolver(["127.0.0.1"], port=self.root.port, max_zones=1)
+        await self.fetch("abigail.sh", resolver)
+
+        self.assertEqual(resolver.cached_zones, 1)
+
+    async def test_nxdomain(self):
+        self.assertIsNone(await self.fetch("missing.sh"))
+        self.assertIsNone(await self.fetch("missing.org"))
+
+    async def test_glueless_delegation(self):
+        self.assertEqual(
+            await self.fetch("domain.example"), parse_pronoun_records(["xe/xem"])
+        )
+
+    async def test_out_of_bailiwick_glue(self):
+        self.assertEqual(await self.fetch("evil.sh"), parse_pronoun_records(["it/its"]))
+        # the nameserver's address came from its own zone, not the glue.
+        self.assertEqual(
+            self.resolver._delegations[dns.name.from_text("evil.sh")].nameservers,
+            {dns.name.from_text("ns1.abigail.sh"): ["127.0.0.3"]},
+        )
+
+    async def test_unreachable_root_hint(self):
+        resolver = IterativeResolver(
+            ["127.0.0.9", "127.0.0.1"], port=self.root.port, timeout=0.2
+        )
+        for _ in range(2):
+            self.assertIsNotNone(await self.fetch("abigail.sh", resolver))
+
+    async def test_no_nameservers(self):
+        resolver = IterativeResolver(["127.0.0.9"], port=self.root.port, timeout=0.2)
+        with self.assertRaises(dns.resolver.NoNameservers):
+            await resolver.resolve("pronouns.abigail.sh", "TXT")
+
+    async def test_bulk(self):
+        results = {
+            result.domain: result.status
+            async for result in podns.bulk.fetch_pronouns_bulk_async(
+                ["abigail.sh", "other.sh", "missing.sh", "domain.example"],
+                resolver=self.resolver,
+                timeout=5.0,
+            )
+        }
+
+        self.assertEqual(
+            results,
+            {
+                "abigail.sh": "ok",
+                "other.sh": "ok",
+                "missing.sh": "nxdomain",
+                "domain.example": "ok",
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
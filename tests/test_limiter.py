@@ -0,0 +1,174 @@
+import asyncio
+import heapq
+import unittest
+
+import podns.bulk
+from podns.limiter import AdaptiveLimiter
+from podns.testing import StubDNSServer
+
+
+# concurrent lookups of one domain share a query, so load is spread over many.
+DOMAINS: list[str] = [f"domain{i}.example" for i in range(300)]
+ZONES: dict[str, list[str]] = {
+    "abigail.sh": ["she/her"],
+    **{domain: ["she/her"] for domain in DOMAINS},
+}
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now: float = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def simulate_overloaded_resolver(
+    clock: FakeClock, limiter: AdaptiveLimiter | None, count: int
+) -> list[str]:
+    # a resolver that answers 8 queries at a time after 20ms and drops every
+    # query beyond that, which the client gives up on after 250ms. without a
+    # limiter, 64 lookups are held in flight regardless.
+    completions: list[tuple[float, int, float, str]] = []
+    statuses: list[str] = []
+    answering: int = 0
+    started: int = 0
+    while len(statuses) < count:
+        while started < count and (
+            limiter.in_flight < int(limiter.limit)
+            if limiter is not None
+            else len(completions) < 64
+        ):
+            token: float = await limiter.acquire() if limiter is not None else clock.now
+            if answering < 8:
+                answering += 1
+                completion = (clock.now + 0.02, started, token, "ok")
+            else:
+                completion = (clock.now + 0.25, started, token, "timeout")
+            heapq.heappush(completions, completion)
+            started += 1
+
+        clock.now, _, token, status = heapq.heappop(completions)
+        if status == "ok":
+            answering -= 1
+        if limiter is not None:
+            limiter.release(token, overloaded=status == "timeout")
+        statuses.append(status)
+    return statuses
+
+
+class TestAdaptiveLimiter(unittest.IsolatedAsyncioTestCase):
+    async def test_additive_increase(self):
+        limiter = AdaptiveLimiter(initial=4, maximum=8)
+        for _ in range(40):
+            limiter.release(await limiter.acquire(), latency=0.01)
+        self.assertGreater(limiter.limit, 4)
+        self.assertLessEqual(limiter.limit, 8)
+
+    async def test_multiplicative_decrease(self):
+        limiter = AdaptiveLimiter(initial=16)
+        limiter.release(await limiter.acquire(), overloaded=True)
+        self.assertEqual(limiter.limit, 8)
+
+    async def test_one_decrease_per_congestion_event(self):
+        limiter = AdaptiveLimiter(initial=16)
+        tokens: list[float] = [await limiter.acquire() for _ in range(8)]
+        await asyncio.sleep(0.001)
+        for token in tokens:
+            limiter.release(token, overloaded=True)
+        # every lookup was already in flight when the first decrease happened.
+        self.assertEqual(limiter.limit, 8)
+        self.assertEqual(limiter.decreases, 1)
+        self.assertEqual(limiter.overloaded, 8)
+
+    async def test_never_below_minimum(self):
+        limiter = AdaptiveLimiter(initial=4, minimum=2)
+        for _ in range(10):
+            limiter.release(await limiter.acquire(), overloaded=True)
+            await asyncio.sleep(0.001)
+        self.assertEqual(limiter.limit, 2)
+
+    async def test_latency_threshold(self):
+        limiter = AdaptiveLimiter(initial=16, latency_threshold=0.1)
+        limiter.release(await limiter.acquire(), latency=0.5)
+        self.assertEqual(limiter.limit, 8)
+
+    async def test_acquire_waits_for_capacity(self):
+        limiter = AdaptiveLimiter(initial=1, maximum=1)
+        token: float = await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        self.assertFalse(waiter.done())
+
+        limiter.release(token)
+        limiter.release(await asyncio.wait_for(waiter, 1))
+        self.assertEqual(limiter.in_flight, 0)
+
+    async def test_cancelled_waiter(self):
+        limiter = AdaptiveLimiter(initial=1, maximum=1)
+        token: float = await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+
+        limiter.release(token)
+        self.assertEqual(limiter.in_flight, 0)
+
+    async def test_backs_off_from_overloaded_resolver(self):
+        # starting at 64 in flight against a resolver answering 8 at a time,
+        # the limit must back off to around that capacity.
+        fixed = await simulate_overloaded_resolver(FakeClock(), None, 500)
+        clock = FakeClock()
+        limiter = AdaptiveLimiter(initial=64, maximum=64, clock=clock)
+        adaptive = await simulate_overloaded_resolver(clock, limiter, 500)
+
+        self.assertGreater(limiter.decreases, 0)
+        self.assertLessEqual(limiter.limit, 16)
+        # once backed off, the rest of the scan loses far fewer lookups than
+        # it does when holding 64 lookups in flight regardless.
+        self.assertGreater(adaptive[-100:].count("ok"), fixed[-100:].count("ok"))
+
+    def test_invalid_bounds(self):
+        with self.assertRaises(ValueError):
+            AdaptiveLimiter(initial=1, minimum=2)
+        with self.assertRaises(ValueError):
+            AdaptiveLimiter(decrease=1.5)
+
+
+class TestAdaptiveBulkLookup(unittest.IsolatedAsyncioTestCase):
+    async def scan(
+        self, server: StubDNSServer, limiter: AdaptiveLimiter | None, count: int
+    ) -> list[str]:
+        statuses: list[str] = []
+        async for result in podns.bulk.fetch_pronouns_bulk_async(
+            DOMAINS[:count],
+            concurrency=64,
+            timeout=0.25,
+            resolver=server.async_resolver(),
+            limiter=limiter,
+        ):
+            statuses.append(result.status)
+        return statuses
+
+    async def test_grows_against_healthy_resolver(self):
+        with StubDNSServer(ZONES, latency=0.005) as server:
+            limiter = AdaptiveLimiter(initial=2, maximum=64)
+            statuses = await self.scan(server, limiter, 200)
+
+        self.assertEqual(statuses.count("ok"), 200)
+        self.assertGreater(limiter.limit, 4)
+        self.assertEqual(limiter.decreases, 0)
+
+    async def test_backs_off_on_packet_loss_and_servfail(self):
+        with StubDNSServer(
+            ZONES, drop_rate=0.2, servfail_rate=0.2, seed=1234
+        ) as server:
+            limiter = AdaptiveLimiter(initial=32, maximum=32)
+            statuses = await self.scan(server, limiter, 100)
+
+        self.assertEqual(len(statuses), 100)
+        self.assertGreater(limiter.decreases, 0)
+        self.assertLess(limiter.limit, 32)
+        self.assertGreater(server.dropped, 0)
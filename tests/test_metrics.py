@@ -0,0 +1,150 @@
+import unittest
+
+import podns.dns
+import podns.error
+import podns.metrics
+import podns.parser
+from podns.metrics import InMemoryCollector
+from podns.testing import StubDNSServer
+
+
+class TestInMemoryCollector(unittest.TestCase):
+    def test_counters(self):
+        collector = InMemoryCollector()
+        collector.increment("requests_total")
+        collector.increment("requests_total", 2)
+        collector.increment("requests_total", labels={"result": "ok"})
+
+        self.assertEqual(collector.counter("requests_total"), 3)
+        self.assertEqual(collector.counter("requests_total", {"result": "ok"}), 1)
+        self.assertEqual(collector.counter("missing_total"), 0)
+
+    def test_render_prometheus(self):
+        collector = InMemoryCollector(buckets=(0.1, 1.0))
+        collector.increment(podns.metrics.LOOKUPS_TOTAL, labels={"result": "ok"})
+        collector.increment(podns.metrics.LOOKUPS_TOTAL, labels={"result": 'we"ird'})
+        collector.observe("latency_seconds", 0.05)
+        collector.observe("latency_seconds", 0.5)
+        collector.observe("latency_seconds", 5)
+
+        self.assertEqual(
+            collector.render_prometheus(),
+            "# HELP podns_lookups_total Pronoun lookups by result.\n"
+            "# TYPE podns_lookups_total counter\n"
+            'podns_lookups_total{result="ok"} 1\n'
+            'podns_lookups_total{result="we\\"ird"} 1\n'
+            "# TYPE latency_seconds histogram\n"
+            'latency_seconds_bucket{le="0.1"} 1\n'
+            'latency_seconds_bucket{le="1"} 2\n'
+            'latency_seconds_bucket{le="+Inf"} 3\n'
+            "latency_seconds_sum 5.55\n"
+            "latency_seconds_count 3\n",
+        )
+
+    def test_render_empty(self):
+        self.assertEqual(InMemoryCollector().render_prometheus(), "")
+
+
+class TestParserMetrics(unittest.TestCase):
+    def setUp(self):
+        self.collector = InMemoryCollector()
+        podns.metrics.set_metrics_collector(self.collector)
+
+    def tearDown(self):
+        podns.metrics.set_metrics_collector(None)
+
+    def test_stage_timings(self):
+        response = podns.parser.parse_pronoun_records(
+            ["she/her", "they/them;preferred"]
+        )
+
+        self.assertEqual(len(response.records), 2)
+        self.assertEqual(self.collector.histogram_count(podns.metrics.PARSE_SECONDS), 1)
+        for stage in ("normalise", "parse", "dedup"):
+            self.assertEqual(
+                self.collector.histogram_count(
+                    podns.metrics.PARSE_STAGE_SECONDS, {"stage": stage}
+                ),
+                1,
+            )
+
+    def test_error_counts(self):
+        for records in (["she"], ["she"], ["she/her;unknown"]):
+            with self.assertRaises(podns.error.PODNSParserError):
+                podns.parser.parse_pronoun_records(records, pedantic=True)
+
+        self.assertEqual(
+            self.collector.counter(
+                podns.metrics.PARSE_ERRORS_TOTAL,
+                {"error": "PODNSParserInsufficientPronounSetValues"},
+            ),
+            2,
+        )
+        self.assertEqual(
+            self.collector.counter(
+                podns.metrics.PARSE_ERRORS_TOTAL, {"error": "PODNSParserInvalidTag"}
+            ),
+            1,
+        )
+        self.assertEqual(self.collector.histogram_count(podns.metrics.PARSE_SECONDS), 3)
+
+    def test_disabled(self):
+        podns.metrics.set_metrics_collector(None)
+        podns.parser.parse_pronoun_records(["she/her"])
+        self.assertEqual(self.collector.render_prometheus(), "")
+
+
+class TestLookupMetrics(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.collector = InMemoryCollector()
+        podns.metrics.set_metrics_collector(self.collector)
+        self.server = StubDNSServer(
+            {"abigail.sh": ["she/her"], "invalid.example": ["she"]}
+        )
+        self.server.start()
+
+    def tearDown(self):
+        podns.metrics.set_metrics_collector(None)
+        self.server.stop()
+
+    async def test_lookup_results(self):
+        resolver = self.server.async_resolver()
+        await podns.dns.fetch_pronouns_from_domain_async(
+            "abigail.sh", resolver=resolver
+        )
+        await podns.dns.fetch_pronouns_from_domain_async(
+            "missing.example", resolver=resolver
+        )
+        with self.assertRaises(podns.error.PODNSParserError):
+            await podns.dns.fetch_pronouns_from_domain_async(
+                "invalid.example", resolver=resolver
+            )
+        podns.dns.fetch_pronouns_from_domain_sync(
+            "abigail.sh", resolver=self.server.resolver()
+        )
+
+        for result, count in (("ok", 2), ("nxdomain", 1), ("invalid", 1)):
+            self.assertEqual(
+                self.collector.counter(podns.metrics.LOOKUPS_TOTAL, {"result": result}),
+                count,
+            )
+            self.assertEqual(
+                self.collector.histogram_count(
+                    podns.metrics.LOOKUP_SECONDS, {"result": result}
+                ),
+                count,
+            )
+        self.assertEqual(
+            self.collector.histogram_count(podns.metrics.RESOLVE_SECONDS), 3
+        )
+
+    async def test_lookup_timeout(self):
+        self.server.latency = 1.0
+        with self.assertRaises(podns.error.PODNSLookupTimeout):
+            await podns.dns.fetch_pronouns_from_domain_async(
+                "abigail.sh", resolver=self.server.async_resolver(), deadline=0.1
+            )
+        self.assertEqual(
+            self.collector.counter(podns.metrics.LOOKUPS_TOTAL, {"result": "timeout"}),
+            1,
+        )
@@ -0,0 +1,212 @@
+import asyncio
+import threading
+import time
+import unittest
+
+import dns.nameserver
+import dns.resolver
+
+import podns.bulk
+import podns.dns
+from podns.hedging import HedgingPolicy
+from podns.ratelimit import (
+    NameserverRateLimiter,
+    TokenBucket,
+    nameserver_key,
+    resolver_key,
+)
+from podns.testing import StubDNSServer
+
+
+# concurrent lookups of one domain share a query, so load is spread over many.
+DOMAINS: list[str] = [f"domain{i}.example" for i in range(20)]
+ZONES: dict[str, list[str]] = {
+    "abigail.sh": ["she/her"],
+    **{domain: ["she/her"] for domain in DOMAINS},
+}
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_queue(self):
+        bucket = TokenBucket(100, burst=5)
+        waits: list[float] = [bucket.reserve() for _ in range(8)]
+
+        self.assertEqual(waits[:5], [0.0] * 5)
+        self.assertAlmostEqual(waits[5], 0.01, delta=0.005)
+        self.assertAlmostEqual(waits[7], 0.03, delta=0.005)
+        self.assertEqual(bucket.acquired, 8)
+        self.assertEqual(bucket.queued, 3)
+        self.assertAlmostEqual(bucket.max_wait, 0.03, delta=0.005)
+
+    def test_reservations_are_first_come_first_served(self):
+        bucket = TokenBucket(1000)
+        waits: list[float] = [bucket.reserve() for _ in range(50)]
+        self.assertEqual(waits, sorted(waits))
+
+    def test_refills_over_time(self):
+        bucket = TokenBucket(100, burst=1)
+        bucket.reserve()
+        time.sleep(0.02)
+        self.assertEqual(bucket.reserve(), 0.0)
+
+    def test_sync_rate_across_threads(self):
+        bucket = TokenBucket(200, burst=1)
+
+        def worker():
+            for _ in range(10):
+                bucket.acquire_sync()
+
+        started: float = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # 40 tokens at 200/s, with the first one free.
+        self.assertGreaterEqual(time.perf_counter() - started, 39 / 200 - 0.01)
+        self.assertEqual(bucket.acquired, 40)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(0)
+        with self.assertRaises(ValueError):
+            TokenBucket(1, burst=0)
+
+
+class TestAsyncTokenBucket(unittest.IsolatedAsyncioTestCase):
+    async def test_async_rate(self):
+        bucket = TokenBucket(100, burst=1)
+        started: float = time.perf_counter()
+        waits = await asyncio.gather(*(bucket.acquire() for _ in range(20)))
+
+        self.assertGreaterEqual(time.perf_counter() - started, 19 / 100 - 0.01)
+        # the last caller reserved the 20th token, less however long it took
+        # the loop to get to it.
+        self.assertLessEqual(max(waits), 0.19 + 0.005)
+        self.assertGreater(max(waits), 0.1)
+        self.assertGreater(bucket.mean_wait, 0)
+
+    async def test_cancelled_wait_returns_token(self):
+        bucket = TokenBucket(10, burst=1)
+        await bucket.acquire()
+        waiter = asyncio.create_task(bucket.acquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        self.assertLess(bucket.reserve(), 0.1)
+
+    async def test_cancelled_after_refill_returns_nothing(self):
+        bucket = TokenBucket(10, burst=1)
+        await bucket.acquire()
+        waiter = asyncio.create_task(bucket.acquire())
+        await asyncio.sleep(0)
+        # block the loop past the point the waiter's token was refilled, so it
+        # is cancelled before it wakes up to use it.
+        time.sleep(0.12)
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        # a full refund would have left a token to take at once.
+        self.assertGreater(bucket.reserve(), 0.0)
+
+
+class TestNameserverRateLimiter(unittest.IsolatedAsyncioTestCase):
+    async def test_buckets_are_per_nameserver(self):
+        limiter = NameserverRateLimiter(default_rate=10)
+        self.assertEqual(await limiter.acquire("192.0.2.1"), 0.0)
+        self.assertEqual(await limiter.acquire("192.0.2.2"), 0.0)
+        self.assertIsNot(
+            limiter.bucket_for("192.0.2.1"), limiter.bucket_for("192.0.2.2")
+        )
+
+    async def test_configured_and_unlimited(self):
+        bucket = TokenBucket(5)
+        limiter = NameserverRateLimiter({"192.0.2.1": bucket})
+        self.assertIs(limiter.bucket_for("192.0.2.1"), bucket)
+        self.assertIsNone(limiter.bucket_for("192.0.2.2"))
+        self.assertEqual(limiter.acquire_sync("192.0.2.2"), 0.0)
+
+    def test_nameserver_key(self):
+        self.assertEqual(nameserver_key("192.0.2.1"), "192.0.2.1")
+        self.assertEqual(
+            nameserver_key(dns.nameserver.Do53Nameserver("192.0.2.1")), "192.0.2.1"
+        )
+        self.assertEqual(
+            nameserver_key(dns.nameserver.Do53Nameserver("192.0.2.1", 5353)),
+            "192.0.2.1@5353",
+        )
+
+    def test_resolver_key(self):
+        resolver = dns.resolver.Resolver(configure=False)
+        resolver.nameservers = ["192.0.2.1"]
+        self.assertEqual(resolver_key(resolver), "192.0.2.1")
+        resolver.nameservers = ["192.0.2.1", "192.0.2.2"]
+        self.assertEqual(resolver_key(resolver), "192.0.2.1,192.0.2.2")
+
+
+class TestRateLimitedLookups(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = StubDNSServer(ZONES)
+        self.server.start()
+        self.key: str = nameserver_key(self.server.nameserver)
+
+    def tearDown(self):
+        self.server.stop()
+
+    async def test_async_fetch(self):
+        limiter = NameserverRateLimiter({self.key: TokenBucket(50)})
+        resolver = self.server.async_resolver()
+
+        started: float = time.perf_counter()
+        await asyncio.gather(
+            *(
+                podns.dns.fetch_pronouns_from_domain_async(
+                    domain, resolver=resolver, rate_limiter=limiter
+                )
+                for domain in DOMAINS[:10]
+            )
+        )
+
+        self.assertGreaterEqual(time.perf_counter() - started, 9 / 50 - 0.01)
+        self.assertEqual(self.server.queries, 10)
+        self.assertEqual(limiter.buckets[self.key].queued, 9)
+
+    def test_sync_fetch(self):
+        limiter = NameserverRateLimiter({self.key: TokenBucket(50)})
+        resolver = self.server.resolver()
+
+        started: float = time.perf_counter()
+        for _ in range(5):
+            podns.dns.fetch_pronouns_from_domain_sync(
+                "abigail.sh", resolver=resolver, rate_limiter=limiter
+            )
+        self.assertGreaterEqual(time.perf_counter() - started, 4 / 50 - 0.01)
+
+    async def test_bulk(self):
+        limiter = NameserverRateLimiter(default_rate=100)
+        statuses: list[str] = []
+        async for result in podns.bulk.fetch_pronouns_bulk_async(
+            DOMAINS,
+            resolver=self.server.async_resolver(),
+            rate_limiter=limiter,
+        ):
+            statuses.append(result.status)
+
+        self.assertEqual(statuses, ["ok"] * 20)
+        self.assertEqual(limiter.buckets[self.key].acquired, 20)
+
+    async def test_hedged_queries_are_limited_per_nameserver(self):
+        with StubDNSServer(ZONES, latency=0.5) as slow:
+            slow_key: str = nameserver_key(slow.nameserver)
+            limiter = NameserverRateLimiter(default_rate=1000)
+            policy = HedgingPolicy(
+                [slow.nameserver, self.server.nameserver], initial_delay=0.02
+            )
+            await podns.dns.fetch_pronouns_from_domain_async(
+                "abigail.sh", hedging=policy, rate_limiter=limiter
+            )
+
+        self.assertEqual(limiter.buckets[slow_key].acquired, 1)
+        self.assertEqual(limiter.buckets[self.key].acquired, 1)
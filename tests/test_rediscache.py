@@ -0,0 +1,206 @@
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+import podns.bulk
+import podns.dns
+from podns.cache import CACHE_MISS, LookupCache
+from podns.parser import parse_pronoun_records
+from podns.rediscache import RedisCache
+from podns.testing import StubDNSServer, StubRedisServer
+
+
+SHE_HER = parse_pronoun_records(["she/her"])
+
+
+class TestRedisCache(unittest.TestCase):
+    def setUp(self):
+        self.server = StubRedisServer()
+        self.server.start()
+        self.cache = self.server.cache(ttl=60, negative_ttl=10)
+
+    def tearDown(self):
+        self.cache.close()
+        self.server.stop()
+
+    def test_sync(self):
+        self.assertIs(self.cache.get_sync("example.org"), CACHE_MISS)
+        self.cache.set_sync("example.org", SHE_HER)
+        self.cache.set_sync("missing.example", None)
+
+        self.assertEqual(self.cache.get_sync("example.org"), SHE_HER)
+        self.assertIsNone(self.cache.get_sync("missing.example"))
+        self.assertEqual(
+            self.cache.get_many_sync(["example.org", "other.example"]),
+            [SHE_HER, CACHE_MISS],
+        )
+        self.assertEqual((self.cache.hits, self.cache.misses), (3, 2))
+        self.assertIn(b"podns:example.org", self.server.data)
+
+    def test_async(self):
+        async def run():
+            await self.cache.set("example.org", SHE_HER)
+            self.assertEqual(await self.cache.get("example.org"), SHE_HER)
+            self.assertEqual(
+                await self.cache.get_many(["missing.example", "example.org"]),
+                [CACHE_MISS, SHE_HER],
+            )
+            await self.cache.aclose()
+
+        asyncio.run(run())
+        # connections are reused rather than opened per command.
+        self.assertEqual(self.server.commands["MGET"], 2)
+
+    def test_ttl(self):
+        self.cache.set_sync("example.org", SHE_HER, ttl=3600)
+        self.cache.set_sync("missing.example", None)
+        self.cache.set_sync("short.example", SHE_HER, ttl=0.01)
+
+        pttl = self.server._execute([b"PTTL", b"podns:example.org"], True)[0]
+        self.assertTrue(59_000 <= int(pttl[1:-2]) <= 60_000)
+        pttl = self.server._execute([b"PTTL", b"podns:missing.example"], True)[0]
+        self.assertTrue(9_000 <= int(pttl[1:-2]) <= 10_000)
+        time.sleep(0.02)
+        self.assertIs(self.cache.get_sync("short.example"), CACHE_MISS)
+
+    def test_unreadable_value(self):
+        self.server.data[b"podns:example.org"] = (b"\xffnot a response", None)
+
+        self.assertIs(self.cache.get_sync("example.org"), CACHE_MISS)
+        self.assertEqual(self.cache.errors, 1)
+
+    def test_password(self):
+        with StubRedisServer(password="hunter2") as server:
+            cache = server.cache()
+            cache.set_sync("example.org", SHE_HER)
+            self.assertEqual(cache.get_sync("example.org"), SHE_HER)
+            cache.close()
+
+            wrong = RedisCache(server.host, server.port, password="wrong")
+            self.assertIs(wrong.get_sync("example.org"), CACHE_MISS)
+            self.assertEqual(wrong.errors, 1)
+
+    def test_server_down(self):
+        port = self.server.port
+        self.server.stop()
+        cache = RedisCache("127.0.0.1", port, timeout=0.5)
+
+        self.assertIs(cache.get_sync("example.org"), CACHE_MISS)
+        cache.set_sync("example.org", SHE_HER)
+        self.assertIs(asyncio.run(cache.get("example.org")), CACHE_MISS)
+        self.assertEqual(cache.errors, 3)
+
+    def test_timeout(self):
+        with StubRedisServer(latency=0.5) as server:
+            cache = server.cache(timeout=0.05)
+            self.assertIs(asyncio.run(cache.get("example.org")), CACHE_MISS)
+            self.assertIs(cache.get_sync("example.org"), CACHE_MISS)
+            self.assertEqual(cache.errors, 2)
+
+
+class TestSharedCache(unittest.TestCase):
+    def setUp(self):
+        self.dns = StubDNSServer(
+            {f"domain{i}.example": ["she/her"] for i in range(100)}
+        )
+        self.dns.start()
+        self.redis = StubRedisServer()
+        self.redis.start()
+
+    def tearDown(self):
+        self.redis.stop()
+        self.dns.stop()
+
+    def test_shared_between_caches(self):
+        # two "nodes" with their own client share the lookups.
+        first, second = self.redis.cache(), self.redis.cache()
+        resolver = self.dns.resolver()
+        for cache in (first, second):
+            response = podns.dns.fetch_pronouns_from_domain_sync(
+                "domain1.example", resolver=resolver, cache=cache
+            )
+            self.assertEqual(response, SHE_HER)
+            cache.close()
+
+        self.assertEqual(self.dns.queries, 1)
+        self.assertEqual(second.hits, 1)
+
+    def test_bulk_batches_cache_reads(self):
+        domains = [f"domain{i}.example" for i in range(100)]
+        cache = self.redis.cache()
+
+        async def scan():
+            async for _ in podns.bulk.fetch_pronouns_bulk_async(
+                domains, resolver=self.dns.async_resolver(), cache=cache
+            ):
+                pass
+
+        asyncio.run(scan())
+        self.assertEqual(self.dns.queries, 100)
+        asyncio.run(scan())
+
+        self.assertEqual(self.dns.queries, 100)
+        # 100 domains are read in batches of 64, for two scans.
+        self.assertEqual(self.redis.commands["MGET"], 4)
+        self.assertEqual(cache.hits, 100)
+
+    def test_bulk_in_process(self):
+        cache = LookupCache()
+        domains = ["domain1.example"] * 3
+
+        async def scan():
+            return [
+                result.status
+                async for result in podns.bulk.fetch_pronouns_bulk_async(
+                    domains,
+                    resolver=self.dns.async_resolver(),
+                    cache=cache,
+                    concurrency=1,
+                )
+            ]
+
+        self.assertEqual(asyncio.run(scan()), ["ok"] * 3)
+        self.assertEqual(self.dns.queries, 1)
+
+    def test_bulk_drops_prefetched_results(self):
+        prefetched: list[podns.bulk._PrefetchedCache] = []
+
+        class Recording(podns.bulk._PrefetchedCache):
+            def __init__(self, backend):
+                super().__init__(backend)
+                prefetched.append(self)
+
+        # the second batch's domain0 joins the first batch's query, and the
+        # invalid domain never reaches the cache, so neither reads its entry.
+        self.dns.latency = 0.05
+
+        async def domains():
+            for i in range(64):
+                yield f"domain{i}.example"
+            # lets the first batch's lookups start before the second is read.
+            await asyncio.sleep(0.01)
+            yield "domain0.example"
+            yield "bad..example"
+
+        async def scan():
+            return [
+                result.status
+                async for result in podns.bulk.fetch_pronouns_bulk_async(
+                    domains(),
+                    resolver=self.dns.async_resolver(),
+                    cache=LookupCache(),
+                    concurrency=100,
+                )
+            ]
+
+        with mock.patch.object(podns.bulk, "_PrefetchedCache", Recording):
+            statuses = asyncio.run(scan())
+
+        self.assertEqual(statuses.count("ok"), 65)
+        self.assertEqual(self.dns.queries, 64)
+        self.assertEqual(prefetched[0]._prefetched, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import asyncio
+import time
+import unittest
+
+import podns.bulk
+import podns.dns
+from podns.scheduler import LookupPriority, LookupScheduler
+from podns.testing import StubDNSServer
+
+
+# concurrent lookups of one domain share a query, so load is spread over many.
+DOMAINS: list[str] = [f"domain{i}.example" for i in range(64)]
+ZONES: dict[str, list[str]] = {
+    "abigail.sh": ["she/her"],
+    **{domain: ["she/her"] for domain in DOMAINS},
+}
+
+
+class TestLookupScheduler(unittest.IsolatedAsyncioTestCase):
+    async def test_interactive_dispatched_before_background(self):
+        scheduler = LookupScheduler(1)
+        order: list[str] = []
+
+        async def lookup(name: str, priority: LookupPriority):
+            async with scheduler.slot(priority):
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        await scheduler.acquire()
+        tasks = [
+            asyncio.create_task(lookup(f"background-{i}", LookupPriority.BACKGROUND))
+            for i in range(3)
+        ]
+        await asyncio.sleep(0)
+        tasks.append(
+            asyncio.create_task(lookup("interactive", LookupPriority.INTERACTIVE))
+        )
+        await asyncio.sleep(0)
+        scheduler.release()
+        await asyncio.gather(*tasks)
+
+        self.assertEqual(
+            order, ["interactive", "background-0", "background-1", "background-2"]
+        )
+        self.assertEqual(scheduler.dispatched[LookupPriority.BACKGROUND], 3)
+        self.assertEqual(scheduler.in_flight, 0)
+
+    async def test_reserved_capacity(self):
+        scheduler = LookupScheduler(2, reserved=1)
+        await scheduler.acquire(LookupPriority.BACKGROUND)
+
+        background = asyncio.create_task(scheduler.acquire(LookupPriority.BACKGROUND))
+        await asyncio.sleep(0.01)
+        self.assertFalse(background.done())
+
+        # the reserved slot is still free for interactive lookups.
+        await asyncio.wait_for(scheduler.acquire(LookupPriority.INTERACTIVE), 1)
+        self.assertEqual(scheduler.in_flight, 2)
+
+        scheduler.release()
+        scheduler.release()
+        await asyncio.wait_for(background, 1)
+        self.assertEqual(scheduler.in_flight, 1)
+
+    async def test_cancelled_waiter(self):
+        scheduler = LookupScheduler(1)
+        await scheduler.acquire()
+        waiter = asyncio.create_task(scheduler.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+
+        scheduler.release()
+        self.assertEqual(scheduler.in_flight, 0)
+        self.assertEqual(scheduler.waiting, 0)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            LookupScheduler(0)
+        with self.assertRaises(ValueError):
+            LookupScheduler(2, reserved=2)
+
+
+class TestScheduledLookups(unittest.IsolatedAsyncioTestCase):
+    async def test_interactive_lookup_during_crawl(self):
+        with StubDNSServer(ZONES, latency=0.05) as server:
+            resolver = server.async_resolver()
+            scheduler = LookupScheduler(4)
+
+            async def crawl() -> int:
+                count: int = 0
+                async for result in podns.bulk.fetch_pronouns_bulk_async(
+                    DOMAINS,
+                    concurrency=32,
+                    resolver=resolver,
+                    scheduler=scheduler,
+                ):
+                    count += result.status == "ok"
+                return count
+
+            crawler = asyncio.create_task(crawl())
+            await asyncio.sleep(0.02)  # let the crawl fill the queue
+
+            started: float = time.perf_counter()
+            response = await podns.dns.fetch_pronouns_from_domain_async(
+                "abigail.sh", resolver=resolver, scheduler=scheduler
+            )
+            elapsed: float = time.perf_counter() - started
+
+            self.assertIsNotNone(response)
+            # with ~28 background lookups queued at 4 per 50ms, waiting in line
+            # would take ~350ms. an interactive lookup only waits for one slot.
+            self.assertLess(elapsed, 0.2)
+            self.assertEqual(await crawler, 64)
+            self.assertEqual(scheduler.dispatched[LookupPriority.INTERACTIVE], 1)
+            self.assertEqual(scheduler.dispatched[LookupPriority.BACKGROUND], 64)
@@ -0,0 +1,152 @@
+import time
+import unittest
+
+import podns.dns
+from podns.parser import parse_pronoun_records
+from podns.selection import NameserverSelector
+from podns.testing import StubDNSServer, synthetic_zones
+from podns.transport import UDPResolver
+
+
+ZONES: dict[str, list[str]] = synthetic_zones(20, seed=4)
+
+
+class TestNameserverSelector(unittest.TestCase):
+    def test_unknown_upstreams_first(self):
+        selector = NameserverSelector(probe_rate=0.0)
+        selector.record_success("192.0.2.1", 0.01)
+
+        self.assertEqual(
+            selector.order(["192.0.2.1", "192.0.2.2"]), ["192.0.2.2", "192.0.2.1"]
+        )
+
+    def test_fastest_first(self):
+        selector = NameserverSelector(probe_rate=0.0)
+        selector.record_success("192.0.2.1", 0.2)
+        selector.record_success("192.0.2.2", 0.01)
+        selector.record_success("192.0.2.3", 0.05)
+
+        self.assertEqual(
+            selector.order(["192.0.2.1", "192.0.2.2", "192.0.2.3"]),
+            ["192.0.2.2", "192.0.2.3", "192.0.2.1"],
+        )
+
+    def test_smooths_rtt(self):
+        selector = NameserverSelector(smoothing=0.5)
+        selector.record_success("192.0.2.1", 0.1)
+        selector.record_success("192.0.2.1", 0.3)
+
+        self.assertAlmostEqual(selector.health("192.0.2.1").rtt, 0.2)
+
+    def test_failures_demote(self):
+        selector = NameserverSelector(probe_rate=0.0, failure_threshold=10)
+        selector.record_success("192.0.2.1", 0.01)
+        selector.record_success("192.0.2.2", 0.05)
+        selector.record_failure("192.0.2.1")
+
+        self.assertEqual(
+            selector.order(["192.0.2.1", "192.0.2.2"]), ["192.0.2.2", "192.0.2.1"]
+        )
+
+    def test_probes(self):
+        selector = NameserverSelector(probe_rate=1.0)
+        selector.record_success("192.0.2.1", 0.01)
+        selector.record_success("192.0.2.2", 0.05)
+
+        self.assertEqual(
+            selector.order(["192.0.2.1", "192.0.2.2"]), ["192.0.2.2", "192.0.2.1"]
+        )
+        self.assertEqual(selector.probes, 1)
+
+    def test_circuit_breaker(self):
+        selector = NameserverSelector(probe_rate=0.0, failure_threshold=2)
+        selector.record_success("192.0.2.1", 0.01)
+        selector.record_success("192.0.2.2", 0.05)
+        selector.record_failure("192.0.2.1")
+        selector.record_failure("192.0.2.1")
+
+        self.assertEqual(selector.breaker_trips, 1)
+        self.assertEqual(
+            selector.order(["192.0.2.1", "192.0.2.2", "192.0.2.3"]),
+            ["192.0.2.3", "192.0.2.2", "192.0.2.1"],
+        )
+
+        # once the cooldown is over, a single query checks on it.
+        selector.health("192.0.2.1").open_until = time.monotonic()
+        self.assertEqual(
+            selector.order(["192.0.2.1", "192.0.2.2"]), ["192.0.2.1", "192.0.2.2"]
+        )
+        self.assertEqual(
+            selector.order(["192.0.2.1", "192.0.2.2"]), ["192.0.2.2", "192.0.2.1"]
+        )
+
+        selector.record_success("192.0.2.1", 0.01)
+        self.assertIsNone(selector.health("192.0.2.1").open_until)
+        self.assertEqual(selector.health("192.0.2.1").consecutive_failures, 0)
+
+    def test_failed_recovery_restarts_cooldown(self):
+        selector = NameserverSelector(failure_threshold=1, cooldown=30.0)
+        selector.record_failure("192.0.2.1")
+        selector.health("192.0.2.1").open_until = time.monotonic()
+        selector.order(["192.0.2.1"])
+
+        selector.record_failure("192.0.2.1")
+
+        self.assertGreater(selector.health("192.0.2.1").open_until, time.monotonic())
+        self.assertEqual(selector.breaker_trips, 1)
+
+
+class TestSelectingResolver(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.slow = StubDNSServer(ZONES, latency=0.05)
+        self.fast = StubDNSServer(ZONES)
+        for server in (self.slow, self.fast):
+            server.start()
+            self.addCleanup(server.stop)
+
+    async def fetch(self, domain, resolver):
+        return await podns.dns.fetch_pronouns_from_domain_async(
+            domain, resolver=resolver, deadline=5.0
+        )
+
+    async def test_prefers_fast_nameserver(self):
+        selector = NameserverSelector(probe_rate=0.0)
+        resolver = UDPResolver(
+            [self.slow.nameserver, self.fast.nameserver], selector=selector
+        )
+
+        for domain in ZONES:
+            self.assertEqual(
+                await self.fetch(domain, resolver), parse_pronoun_records(ZONES[domain])
+            )
+
+        # each is tried once before the fast one takes over.
+        self.assertEqual(self.slow.queries, 1)
+        self.assertEqual(self.fast.queries, len(ZONES) - 1)
+
+    async def test_breaker_skips_failing_nameserver(self):
+        self.fast.servfail_rate = 1.0
+        selector = NameserverSelector(probe_rate=0.0, failure_threshold=2)
+        resolver = UDPResolver(
+            [self.fast.nameserver, self.slow.nameserver], selector=selector
+        )
+
+        for domain in ZONES:
+            await self.fetch(domain, resolver)
+
+        self.assertEqual(selector.breaker_trips, 1)
+        self.assertEqual(self.slow.queries, len(ZONES))
+        self.assertEqual(self.fast.queries, 2)
+
+    async def test_static_order_without_selector(self):
+        resolver = UDPResolver([self.slow.nameserver, self.fast.nameserver])
+
+        for domain in list(ZONES)[:5]:
+            await self.fetch(domain, resolver)
+
+        self.assertEqual(self.slow.queries, 5)
+        self.assertEqual(self.fast.queries, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import os
+import tempfile
+import unittest
+
+import podns.error
+import podns.parser
+import podns.store
+from podns.pronouns import (
+    PronounRecord,
+    Pronouns,
+    PronounsResponse,
+)
+
+
+def _parse(*records: str) -> PronounsResponse:
+    return podns.parser.parse_pronoun_records(records)
+
+
+class TestResultStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path: str = os.path.join(self.directory.name, "results.podns")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        results: dict[str, PronounsResponse] = {
+            "abigail.sh": _parse("she/her;preferred", "they/them"),
+            "example.com": _parse("he/him/his/his/himself"),
+            "any.example": _parse("*"),
+            "name.example": _parse("!"),
+            "empty.example": _parse("#just a comment"),
+        }
+        podns.store.write_result_store(self.path, results)
+
+        with podns.store.ResultStore(self.path) as store:
+            self.assertEqual(len(store), len(results))
+            for domain, response in results.items():
+                self.assertIn(domain, store)
+                self.assertEqual(store[domain], response)
+                self.assertEqual(store.get(domain), response)
+            self.assertEqual(set(store), set(results))
+
+    def test_missing_domain(self):
+        podns.store.write_result_store(self.path, {"abigail.sh": _parse("she/her")})
+
+        with podns.store.ResultStore(self.path) as store:
+            self.assertNotIn("example.com", store)
+            self.assertIsNone(store.get("example.com"))
+            with self.assertRaises(KeyError):
+                store["example.com"]
+
+    def test_empty_store(self):
+        podns.store.write_result_store(self.path, {})
+
+        with podns.store.ResultStore(self.path) as store:
+            self.assertEqual(len(store), 0)
+            self.assertIsNone(store.get("abigail.sh"))
+            self.assertEqual(list(store), [])
+
+    def test_many_entries(self):
+        results: list[tuple[str, PronounsResponse]] = [
+            (f"user{i}.example", _parse("she/her" if i % 2 else "they/them;preferred"))
+            for i in range(5000)
+        ]
+        podns.store.write_result_store(self.path, results)
+
+        with podns.store.ResultStore(self.path) as store:
+            self.assertEqual(len(store), 5000)
+            for domain, response in results[::97]:
+                self.assertEqual(store[domain], response)
+
+    def test_strings_are_deduplicated(self):
+        podns.store.write_result_store(
+            self.path, [(f"user{i}.example", _parse("she/her")) for i in range(100)]
+        )
+        with open(self.path, "rb") as f:
+            contents: bytes = f.read()
+
+        self.assertEqual(contents.count(b"she"), 1)
+        self.assertEqual(contents.count(b"her"), 1)
+
+    def test_duplicate_domain(self):
+        with self.assertRaises(podns.error.PODNSStoreError):
+            podns.store.write_result_store(
+                self.path,
+                [("abigail.sh", _parse("she/her")), ("abigail.sh", _parse("he/him"))],
+            )
+
+    def test_invalid_file(self):
+        with open(self.path, "wb") as f:
+            f.write(b"definitely not a result store")
+
+        with self.assertRaises(podns.error.PODNSStoreError):
+            podns.store.ResultStore(self.path)
+
+    def test_empty_file(self):
+        open(self.path, "wb").close()
+
+        with self.assertRaises(podns.error.PODNSStoreError):
+            podns.store.ResultStore(self.path)
+
+    def test_too_many_records(self):
+        records = frozenset(
+            PronounRecord(
+                pronouns=Pronouns(
+                    subject=f"s{i}",
+                    object="o",
+                    possessive_determiner=None,
+                    possessive_pronoun=None,
+                    reflexive=None,
+                ),
+                tags=frozenset(),
+            )
+            for i in range(0x10000)
+        )
+        response = PronounsResponse(
+            uses_any_pronouns=False, uses_name_only=False, records=records
+        )
+
+        with self.assertRaises(podns.error.PODNSStoreError):
+            podns.store.write_result_store(self.path, {"abigail.sh": response})
+
+    def _corrupt_index(self, bucket: tuple[int, int]) -> None:
+        podns.store.write_result_store(self.path, {"abigail.sh": _parse("she/her")})
+        with open(self.path, "r+b") as f:
+            header = podns.store._HEADER.unpack(f.read(podns.store._HEADER.size))
+            bucket_count, index_offset = header[3], header[7]
+            f.seek(index_offset)
+            f.write(podns.store._BUCKET.pack(*bucket) * bucket_count)
+
+    def test_full_index(self):
+        # every bucket taken by some other domain, so no probe ever ends.
+        self._corrupt_index((0, 1))
+
+        with podns.store.ResultStore(self.path) as store:
+            with self.assertRaises(podns.error.PODNSStoreError):
+                store.get("example.com")
+
+    def test_entry_offset_out_of_bounds(self):
+        self._corrupt_index((0, 1 << 40))
+
+        with podns.store.ResultStore(self.path) as store:
+            with self.assertRaises(podns.error.PODNSStoreError):
+                list(store)
@@ -0,0 +1,109 @@
+import unittest
+
+from podns.error import PODNSTemplateError
+from podns.parser import parse_pronoun_records
+from podns.pronouns import PronounsResponse, PronounTemplate
+
+
+PROFILE = PronounTemplate("{Subject} {updates|update} {possessive_determiner} profile.")
+
+
+def parse(*records):
+    return parse_pronoun_records(list(records))
+
+
+class TestPronounTemplate(unittest.TestCase):
+    def test_forms(self):
+        template = PronounTemplate(
+            "{subject} {object} {possessive_determiner} {possessive_pronoun} {reflexive}"
+        )
+
+        self.assertEqual(
+            template.render(parse("xe/xem/xyr/xyrs/xemself")),
+            "xe xem xyr xyrs xemself",
+        )
+
+    def test_capitalised(self):
+        template = PronounTemplate("{Subject}/{Object}/{Reflexive}")
+
+        self.assertEqual(template.render(parse("she/her")), "She/Her/Herself")
+
+    def test_verb_agreement(self):
+        self.assertEqual(PROFILE.render(parse("she/her")), "She updates her profile.")
+        self.assertEqual(
+            PROFILE.render(parse("they/them")), "They update their profile."
+        )
+        self.assertEqual(
+            PROFILE.render(parse("ze/zir/zir/zirs/zirself;plural")),
+            "Ze update zir profile.",
+        )
+
+    def test_preferred_record(self):
+        response = parse("he/him", "she/her;preferred", "they/them")
+
+        self.assertEqual(PROFILE.render(response), "She updates her profile.")
+
+    def test_choice_is_stable(self):
+        response = parse("he/him", "she/her")
+
+        self.assertEqual(PROFILE.render(response), "He updates his profile.")
+
+    def test_fills_in_common_forms(self):
+        template = PronounTemplate("{possessive_pronoun} {reflexive}")
+
+        self.assertEqual(template.render(parse("he/him")), "his himself")
+        self.assertEqual(template.render(parse("it/its")), "its itself")
+
+    def test_skips_records_missing_forms(self):
+        response = parse("xe/xem;preferred", "she/her")
+
+        self.assertEqual(PROFILE.render(response), "She updates her profile.")
+        self.assertEqual(
+            PronounTemplate("{Subject} left.").render(response), "Xe left."
+        )
+
+    def test_fallbacks(self):
+        name_only = PronounsResponse(
+            uses_any_pronouns=False, uses_name_only=True, records=frozenset()
+        )
+        cases = [
+            (None, None, "They update their profile."),
+            (None, "Abigail", "Abigail updates Abigail's profile."),
+            (name_only, "Abigail", "Abigail updates Abigail's profile."),
+            (parse("xe/xem"), None, "They update their profile."),
+            (parse("xe/xem"), "Abigail", "Abigail updates Abigail's profile."),
+        ]
+        for response, name, expected in cases:
+            with self.subTest(response=response, name=name):
+                self.assertEqual(PROFILE.render(response, name=name), expected)
+
+    def test_literal_braces(self):
+        template = PronounTemplate("{{{subject}}} {{x}}")
+
+        self.assertEqual(template.render(parse("she/her")), "{she} {x}")
+
+    def test_plain_text(self):
+        self.assertEqual(PronounTemplate("").render(None), "")
+        self.assertEqual(PronounTemplate("hello").render(None), "hello")
+        self.assertEqual(PronounTemplate("{subject}").render(None), "they")
+
+    def test_invalid(self):
+        for template in (
+            "{name}",
+            "{SUBJECT}",
+            "{a|b|c}",
+            "{subject",
+            "subject}",
+            "{}",
+        ):
+            with self.subTest(template=template):
+                with self.assertRaises(PODNSTemplateError):
+                    PronounTemplate(template)
+
+    def test_invalid_is_value_error(self):
+        with self.assertRaises(ValueError):
+            PronounTemplate("{name}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+
+import podns.dns
+from podns.testing import (
+    StubDNSServer,
+    _BackgroundServer,
+    synthetic_zones,
+)
+
+
+class TestStubDNSServer(unittest.TestCase):
+    def test_truncation_falls_back_to_tcp(self):
+        with StubDNSServer({"example.org": ["she/her"]}, truncation_rate=1.0) as server:
+            response = podns.dns.fetch_pronouns_from_domain_sync(
+                "example.org", resolver=server.resolver()
+            )
+
+            self.assertIsNotNone(response)
+            self.assertEqual(server.truncated, 1)
+            self.assertEqual(server.queries, 2)
+
+    def test_nxdomain_rate(self):
+        zones = {"example.org": ["she/her"]}
+        with StubDNSServer(zones, nxdomain_rate=1.0) as server:
+            self.assertIsNone(
+                podns.dns.fetch_pronouns_from_domain_sync(
+                    "example.org", resolver=server.resolver()
+                )
+            )
+
+    def test_nxdomain_rate_is_seeded(self):
+        zones = {"example.org": ["she/her"]}
+        outcomes = []
+        for _ in range(2):
+            with StubDNSServer(zones, nxdomain_rate=0.5, seed=7) as server:
+                resolver = server.resolver()
+                outcomes.append(
+                    [
+                        podns.dns.fetch_pronouns_from_domain_sync(
+                            "example.org", resolver=resolver
+                        )
+                        is None
+                        for _ in range(20)
+                    ]
+                )
+
+        self.assertEqual(outcomes[0], outcomes[1])
+        self.assertIn(True, outcomes[0])
+        self.assertIn(False, outcomes[0])
+
+
+class TestBackgroundServer(unittest.TestCase):
+    def test_hooks_are_required(self):
+        class NoServer(_BackgroundServer):
+            async def _shutdown(self):
+                pass
+
+        # a server without `_serve` fails when created, not once started.
+        with self.assertRaises(TypeError):
+            NoServer()
+
+
+class TestSyntheticZones(unittest.TestCase):
+    def test_zones(self):
+        zones = synthetic_zones(50, suffix="test", seed=1)
+
+        self.assertEqual(len(zones), 50)
+        self.assertIn("domain49.test", zones)
+        self.assertEqual(zones, synthetic_zones(50, suffix="test", seed=1))
+
+    def test_zones_parse(self):
+        for domain, records in synthetic_zones(50, seed=1).items():
+            with self.subTest(domain):
+                podns.dns.parse_pronoun_records(records, pedantic=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,299 @@
+import asyncio
+import contextlib
+import unittest
+
+import podns.dns
+import podns.error
+import podns.parser
+import podns.tracing
+from podns.hedging import HedgingPolicy
+from podns.ratelimit import NameserverRateLimiter
+from podns.scheduler import LookupScheduler
+from podns.testing import StubDNSServer
+from podns.tracing import ContextManagerTracer, TraceEvent
+from podns.transport import PipelinedTCPResolver, UDPResolver
+
+
+class TracingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.events: list[TraceEvent] = []
+        podns.tracing.set_tracer(self.events.append)
+
+    def tearDown(self):
+        podns.tracing.set_tracer(None)
+
+    def phases(self) -> list[tuple[str, str]]:
+        return [(event.phase, event.kind) for event in self.events]
+
+    def spans(self) -> dict[str, TraceEvent]:
+        return {event.phase: event for event in self.events if event.kind == "start"}
+
+
+class TestSpans(TracingTestCase):
+    def test_disabled(self):
+        podns.tracing.set_tracer(None)
+        self.assertIs(podns.tracing.span("lookup"), podns.tracing.span("parse"))
+        podns.parser.parse_pronoun_records(["she/her"])
+        self.assertEqual(self.events, [])
+
+    def test_nesting(self):
+        with podns.tracing.span("lookup", domain="example.org"):
+            with podns.tracing.span("resolve"):
+                pass
+
+        self.assertEqual(
+            self.phases(),
+            [
+                ("lookup", "start"),
+                ("resolve", "start"),
+                ("resolve", "end"),
+                ("lookup", "end"),
+            ],
+        )
+        spans = self.spans()
+        self.assertIsNone(spans["lookup"].parent_id)
+        self.assertEqual(spans["resolve"].parent_id, spans["lookup"].span_id)
+        self.assertEqual(spans["lookup"].attributes, {"domain": "example.org"})
+        self.assertLessEqual(self.events[0].timestamp, self.events[-1].timestamp)
+
+    def test_error(self):
+        with self.assertRaises(ValueError):
+            with podns.tracing.span("parse"):
+                raise ValueError("bad record")
+
+        self.assertIsNone(self.events[0].error)
+        self.assertIsInstance(self.events[1].error, ValueError)
+
+    def test_parse(self):
+        podns.parser.parse_pronoun_records(["she/her", "she/her"])
+
+        self.assertEqual(
+            self.phases(),
+            [
+                ("parse", "start"),
+                ("dedup", "start"),
+                ("dedup", "end"),
+                ("parse", "end"),
+            ],
+        )
+
+    def test_context_manager_tracer(self):
+        opened: list[tuple[str, dict]] = []
+        closed: list[tuple[str, BaseException | None]] = []
+
+        @contextlib.contextmanager
+        def start_span(phase, attributes):
+            opened.append((phase, dict(attributes)))
+            try:
+                yield
+            except BaseException as e:
+                closed.append((phase, e))
+                raise
+            else:
+                closed.append((phase, None))
+
+        podns.tracing.set_tracer(ContextManagerTracer(start_span))
+        with podns.tracing.span("lookup", domain="example.org"):
+            pass
+        with self.assertRaises(podns.error.PODNSParserError):
+            podns.parser.parse_pronoun_records(["she/her/"], pedantic=True)
+
+        self.assertEqual(
+            opened,
+            [("lookup", {"domain": "example.org"}), ("parse", {})],
+        )
+        self.assertEqual(closed[0], ("lookup", None))
+        self.assertEqual(closed[1][0], "parse")
+        self.assertIsInstance(closed[1][1], podns.error.PODNSParserError)
+
+
+class TestLookupSpans(TracingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.server = StubDNSServer({"example.org": ["she/her"]})
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+        super().tearDown()
+
+    def test_sync(self):
+        podns.dns.fetch_pronouns_from_domain_sync(
+            "example.org",
+            resolver=self.server.resolver(),
+            rate_limiter=NameserverRateLimiter(default_rate=1000),
+        )
+
+        self.assertEqual(
+            self.phases(),
+            [
+                ("lookup", "start"),
+                ("rate_limit", "start"),
+                ("rate_limit", "end"),
+                ("resolve", "start"),
+                ("resolve", "end"),
+                ("parse", "start"),
+                ("dedup", "start"),
+                ("dedup", "end"),
+                ("parse", "end"),
+                ("lookup", "end"),
+            ],
+        )
+        spans = self.spans()
+        for phase in ("rate_limit", "resolve", "parse"):
+            self.assertEqual(spans[phase].parent_id, spans["lookup"].span_id)
+
+    def test_nxdomain(self):
+        podns.dns.fetch_pronouns_from_domain_sync(
+            "missing.example", resolver=self.server.resolver()
+        )
+
+        self.assertEqual(
+            [event.phase for event in self.events],
+            ["lookup", "resolve", "resolve", "lookup"],
+        )
+        self.assertIsNotNone(self.events[2].error)
+        self.assertIsNone(self.events[3].error)
+
+    def test_async(self):
+        async def lookup():
+            await podns.dns.fetch_pronouns_from_domain_async(
+                "example.org",
+                resolver=self.server.async_resolver(),
+                scheduler=LookupScheduler(1),
+            )
+
+        asyncio.run(lookup())
+
+        spans = self.spans()
+        self.assertEqual(
+            [phase for phase, kind in self.phases() if kind == "start"],
+            ["lookup", "queue", "resolve", "parse", "dedup"],
+        )
+        self.assertEqual(spans["queue"].attributes, {"priority": "interactive"})
+        self.assertEqual(spans["resolve"].parent_id, spans["lookup"].span_id)
+
+    def test_concurrent_lookups_keep_separate_parents(self):
+        async def lookup():
+            await asyncio.gather(
+                *(
+                    podns.dns.fetch_pronouns_from_domain_async(
+                        "example.org", resolver=self.server.async_resolver()
+                    )
+                    for _ in range(4)
+                )
+            )
+
+        asyncio.run(lookup())
+
+        lookups = {
+            event.span_id
+            for event in self.events
+            if event.phase == "lookup" and event.kind == "start"
+        }
+        resolves = [
+            event
+            for event in self.events
+            if event.phase == "resolve" and event.kind == "start"
+        ]
+        self.assertEqual(len(lookups), 4)
+        self.assertEqual({event.parent_id for event in resolves}, lookups)
+
+    def test_lookup_joins_the_callers_trace(self):
+        async def lookup():
+            with podns.tracing.span("request"):
+                await podns.dns.fetch_pronouns_from_domain_async(
+                    "example.org", resolver=self.server.async_resolver()
+                )
+
+        asyncio.run(lookup())
+
+        spans = self.spans()
+        self.assertEqual(spans["lookup"].parent_id, spans["request"].span_id)
+        self.assertEqual(spans["resolve"].parent_id, spans["lookup"].span_id)
+
+    def test_shared_lookup(self):
+        resolver = self.server.async_resolver()
+
+        async def request(name):
+            with podns.tracing.span(name):
+                await podns.dns.fetch_pronouns_from_domain_async(
+                    "example.org", resolver=resolver
+                )
+
+        async def lookup():
+            await asyncio.gather(request("first"), request("second"))
+
+        asyncio.run(lookup())
+
+        starts = [event for event in self.events if event.kind == "start"]
+        parents = {event.phase: event.span_id for event in starts}
+        lookups = {
+            event.parent_id: event for event in starts if event.phase == "lookup"
+        }
+        self.assertEqual(set(lookups), {parents["first"], parents["second"]})
+        self.assertEqual(
+            lookups[parents["first"]].attributes, {"domain": "example.org"}
+        )
+        self.assertEqual(
+            lookups[parents["second"]].attributes,
+            {"domain": "example.org", "shared": True},
+        )
+        # the query itself is only traced under the caller that started it.
+        self.assertEqual(
+            [event.parent_id for event in starts if event.phase == "resolve"],
+            [lookups[parents["first"]].span_id],
+        )
+
+    def test_tcp_fallback(self):
+        with StubDNSServer({"example.org": ["she/her"]}, truncation_rate=1.0) as server:
+            for resolver in (
+                UDPResolver([server.nameserver]),
+                PipelinedTCPResolver([server.nameserver], udp_first=True),
+            ):
+                with self.subTest(resolver=type(resolver).__name__):
+                    self.events.clear()
+
+                    async def lookup():
+                        try:
+                            await podns.dns.fetch_pronouns_from_domain_async(
+                                "example.org", resolver=resolver
+                            )
+                        finally:
+                            await resolver.aclose()
+
+                    asyncio.run(lookup())
+
+                    spans = self.spans()
+                    self.assertEqual(
+                        spans["tcp_fallback"].attributes,
+                        {"nameserver": f"127.0.0.1@{server.port}"},
+                    )
+                    self.assertEqual(
+                        spans["tcp_fallback"].parent_id, spans["resolve"].span_id
+                    )
+
+    def test_hedged(self):
+        with StubDNSServer({"example.org": ["she/her"]}) as second:
+            policy = HedgingPolicy([self.server.nameserver, second.nameserver])
+
+            async def lookup():
+                await podns.dns.fetch_pronouns_from_domain_async(
+                    "example.org", hedging=policy
+                )
+
+            asyncio.run(lookup())
+
+        resolve = self.spans()["resolve"]
+        self.assertEqual(
+            resolve.attributes,
+            {"nameserver": f"127.0.0.1@{self.server.port}", "hedge": False},
+        )
+        self.assertEqual(
+            resolve.parent_id,
+            self.spans()["lookup"].span_id,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import dns.resolver
+
+import podns.bulk
+import podns.dns
+from podns.parser import parse_pronoun_records
+from podns.testing import StubDNSServer, synthetic_zones
+from podns.transport import (
+    PipelinedTCPResolver,
+    TransportResolver,
+    _PipelinedConnection,
+)
+
+
+ZONES: dict[str, list[str]] = synthetic_zones(50, seed=3)
+
+
+class TestPipelinedTCPResolver(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = StubDNSServer(ZONES, jitter=0.02, seed=1)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+    def resolver(self, **kwargs):
+        resolver = PipelinedTCPResolver([self.server.nameserver], **kwargs)
+        self.addAsyncCleanup(resolver.aclose)
+        return resolver
+
+    async def fetch(self, domain, resolver):
+        return await podns.dns.fetch_pronouns_from_domain_async(
+            domain, resolver=resolver, deadline=5.0
+        )
+
+    async def test_pipelines_on_one_connection(self):
+        resolver = self.resolver()
+        domains = list(ZONES)
+
+        responses = await asyncio.gather(
+            *(self.fetch(domain, resolver) for domain in domains)
+        )
+
+        for domain, response in zip(domains, responses):
+            self.assertEqual(response, parse_pronoun_records(ZONES[domain]))
+        self.assertEqual(resolver.connections_opened, 1)
+        self.assertEqual(self.server.connections, 1)
+
+        await self.fetch(domains[0], resolver)
+        self.assertEqual(self.server.connections, 1)
+
+    async def test_opens_connections_as_they_fill(self):
+        resolver = self.resolver(max_outstanding=10, max_connections=3)
+        self.server.latency = 0.05
+
+        await asyncio.gather(*(self.fetch(domain, resolver) for domain in ZONES))
+
+        self.assertEqual(resolver.connections_opened, 3)
+
+    async def test_waits_for_room_on_full_connections(self):
+        resolver = self.resolver(max_outstanding=4, max_connections=2)
+        self.server.latency = 0.02
+        in_flight: int = 0
+        most: int = 0
+        query = _PipelinedConnection.query
+
+        async def counted(connection, message):
+            nonlocal in_flight, most
+            in_flight += 1
+            most = max(most, in_flight)
+            try:
+                return await query(connection, message)
+            finally:
+                in_flight -= 1
+
+        with mock.patch.object(_PipelinedConnection, "query", counted):
+            responses = await asyncio.gather(
+                *(self.fetch(domain, resolver) for domain in ZONES)
+            )
+
+        for domain, response in zip(ZONES, responses):
+            self.assertEqual(response, parse_pronoun_records(ZONES[domain]))
+        self.assertEqual(resolver.connections_opened, 2)
+        self.assertEqual(most, 4 * 2)
+
+    async def test_nxdomain(self):
+        self.assertIsNone(await self.fetch("missing.example", self.resolver()))
+
+    async def test_reconnects(self):
+        resolver = self.resolver()
+        await self.fetch("domain0.example", resolver)
+        self.server.stop()
+        self.server.start()
+
+        self.assertIsNotNone(await self.fetch("domain0.example", resolver))
+        self.assertEqual(resolver.connections_opened, 2)
+
+    async def test_udp_first(self):
+        resolver = self.resolver(udp_first=True)
+        self.server.truncation_rate = 0.5
+
+        await asyncio.gather(*(self.fetch(domain, resolver) for domain in ZONES))
+
+        self.assertGreater(self.server.truncated, 0)
+        self.assertEqual(self.server.connections, 1)
+
+    async def test_falls_through_to_next_nameserver(self):
+        with StubDNSServer(ZONES, servfail_rate=1.0) as failing:
+            resolver = PipelinedTCPResolver(
+                [failing.nameserver, self.server.nameserver]
+            )
+            self.addAsyncCleanup(resolver.aclose)
+            self.assertIsNotNone(await self.fetch("domain0.example", resolver))
+
+            resolver.nameservers = [failing.nameserver]
+            with self.assertRaises(dns.resolver.NoNameservers):
+                await resolver.resolve("pronouns.domain0.example", "TXT")
+
+    async def test_bulk(self):
+        resolver = self.resolver()
+
+        statuses = [
+            result.status
+            async for result in podns.bulk.fetch_pronouns_bulk_async(
+                ZONES, resolver=resolver, timeout=5.0
+            )
+        ]
+
+        self.assertEqual(statuses, ["ok"] * len(ZONES))
+        self.assertEqual(self.server.connections, 1)
+
+
+class TestTransportResolver(unittest.TestCase):
+    def test_transport_is_required(self):
+        class NoTransport(TransportResolver):
+            pass
+
+        # a subclass without a transport fails when created, not on first use.
+        with self.assertRaises(TypeError):
+            NoTransport(["192.0.2.1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
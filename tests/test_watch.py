@@ -0,0 +1,157 @@
+import asyncio
+import time
+import unittest
+from contextlib import aclosing
+
+import podns.metrics
+from podns.cache import LookupCache, cache_key
+from podns.metrics import InMemoryCollector
+from podns.parser import parse_pronoun_records
+from podns.testing import StubDNSServer
+from podns.watch import PronounWatcher
+
+
+class TestPronounWatcher(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = StubDNSServer(
+            {"a.example": ["she/her"], "b.example": ["they/them"]}, ttl=0
+        )
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def watcher(self, domains, **kwargs):
+        kwargs.setdefault("min_interval", 0.05)
+        kwargs.setdefault("max_interval", 0.05)
+        return PronounWatcher(domains, resolver=self.server.async_resolver(), **kwargs)
+
+    async def collect(self, watcher, count, *, within=2.0, changes=None):
+        # collects `count` events, applying `changes` once the first arrives.
+        events = []
+        async with asyncio.timeout(within), aclosing(aiter(watcher)) as stream:
+            async for event in stream:
+                events.append(event)
+                if changes is not None and len(events) == 1:
+                    changes()
+                if len(events) == count:
+                    break
+        return events
+
+    async def test_initial_then_changes(self):
+        watcher = self.watcher(["a.example"])
+
+        def change():
+            self.server.zones["a.example"] = ["she/her;preferred", "it/its"]
+
+        initial, changed = await self.collect(watcher, 2, changes=change)
+
+        self.assertTrue(initial.initial)
+        self.assertIsNone(initial.previous)
+        self.assertEqual(initial.diff.added, parse_pronoun_records(["she/her"]).records)
+
+        self.assertFalse(changed.initial)
+        self.assertEqual(
+            {str(record) for record in changed.diff.added}, {"it/it/its/its/itself"}
+        )
+        self.assertEqual(changed.diff.removed, frozenset())
+        ((old, new),) = changed.diff.retagged
+        self.assertEqual((str(old), str(new)), ("she/her", "she/her [preferred]"))
+        self.assertEqual(watcher.state("a.example"), changed.current)
+
+    async def test_unchanged_domains_are_silent(self):
+        known = {
+            "a.example": parse_pronoun_records(["she/her"]),
+            "b.example": parse_pronoun_records(["they/them"]),
+        }
+        watcher = self.watcher(known)
+
+        with self.assertRaises(TimeoutError):
+            await self.collect(watcher, 1, within=0.3)
+        self.assertGreaterEqual(watcher.lookups, 4)
+
+    async def test_flags_and_nxdomain(self):
+        watcher = self.watcher({"a.example": parse_pronoun_records(["she/her"])})
+
+        self.server.zones["a.example"] = ["*"]
+        (flipped,) = await self.collect(watcher, 1)
+        self.assertTrue(flipped.diff.uses_any_pronouns_changed)
+        self.assertFalse(flipped.diff.uses_name_only_changed)
+        self.assertEqual(len(flipped.diff.removed), 1)
+
+        del self.server.zones["a.example"]
+        (gone,) = await self.collect(watcher, 1)
+        self.assertIsNone(gone.current)
+        self.assertTrue(gone.diff.uses_any_pronouns_changed)
+        self.assertIsNone(watcher.state("a.example"))
+
+    async def test_ttl_schedules_lookups(self):
+        with StubDNSServer({"a.example": ["she/her"]}, ttl=3600) as server:
+            watcher = PronounWatcher(
+                ["a.example"],
+                resolver=server.async_resolver(),
+                min_interval=0.0,
+                max_interval=7200.0,
+            )
+            await self.collect(watcher, 1)
+            with self.assertRaises(TimeoutError):
+                await self.collect(watcher, 1, within=0.2)
+            self.assertEqual(server.queries, 1)
+
+    async def test_polls_are_not_cache_misses(self):
+        collector = InMemoryCollector()
+        podns.metrics.set_metrics_collector(collector)
+        try:
+            await self.collect(self.watcher(["a.example"]), 1)
+        finally:
+            podns.metrics.set_metrics_collector(None)
+
+        self.assertEqual(collector.counter(podns.metrics.CACHE_MISSES_TOTAL), 0)
+
+    async def test_shares_cache(self):
+        cache = LookupCache()
+        cached = parse_pronoun_records(["it/its"])
+        cache.set_sync(cache_key("a.example", pedantic=False), cached, ttl=60)
+        watcher = self.watcher(["a.example"], cache=cache)
+
+        (event,) = await self.collect(watcher, 1)
+        self.assertEqual(event.current, cached)
+        self.assertEqual(self.server.queries, 0)
+
+    async def test_add_and_remove(self):
+        watcher = self.watcher([])
+
+        async def add_later():
+            await asyncio.sleep(0.05)
+            watcher.add("b.example")
+
+        adder = asyncio.create_task(add_later())
+        (event,) = await self.collect(watcher, 1)
+        await adder
+        self.assertEqual(event.domain, "b.example")
+
+        watcher.remove("b.example")
+        queries = self.server.queries
+        with self.assertRaises(TimeoutError):
+            await self.collect(watcher, 1, within=0.2)
+        self.assertEqual(self.server.queries, queries)
+        self.assertNotIn("b.example", watcher)
+
+    async def test_failures_are_retried(self):
+        with StubDNSServer({"a.example": ["she/her"]}, drop_rate=1.0) as server:
+            watcher = PronounWatcher(
+                ["a.example"],
+                resolver=server.async_resolver(),
+                deadline=0.05,
+                retry_interval=0.05,
+            )
+            started = time.monotonic()
+            with self.assertRaises(TimeoutError):
+                await self.collect(watcher, 1, within=0.3)
+
+        self.assertGreaterEqual(watcher.errors, 2)
+        self.assertLess(time.monotonic() - started, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
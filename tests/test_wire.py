@@ -0,0 +1,176 @@
+import socket
+import unittest
+
+import dns.flags
+import dns.message
+import dns.rcode
+import dns.rrset
+
+import podns.dns
+from podns.error import (
+    PODNSInvalidDomain,
+    PODNSLookupError,
+    PODNSParserError,
+)
+from podns.parser import parse_pronoun_records
+from podns.testing import StubDNSServer, synthetic_zones
+from podns.wire import build_query, parse_response
+
+
+# split into two character-strings in the middle of `they/them`.
+LONG_RECORD: str = " " * 250 + "they/them"
+ZONES: dict[str, list[str]] = {
+    **synthetic_zones(20, seed=6),
+    "long.example": [LONG_RECORD],
+}
+
+
+def make_response(domain, rcode=dns.rcode.NOERROR, records=(), ttl=300):
+    query = dns.message.from_wire(build_query(domain, query_id=42))
+    response = dns.message.make_response(query)
+    response.set_rcode(rcode)
+    if records:
+        response.answer.append(
+            dns.rrset.from_text_list(
+                query.question[0].name,
+                ttl,
+                "IN",
+                "TXT",
+                [f'"{record}"' for record in records],
+            )
+        )
+    return response
+
+
+class TestBuildQuery(unittest.TestCase):
+    def test_query(self):
+        query = dns.message.from_wire(build_query("Abigail.SH.", query_id=1234))
+
+        self.assertEqual(query.id, 1234)
+        self.assertEqual(query.question[0].to_text(), "pronouns.abigail.sh. IN TXT")
+        self.assertTrue(query.flags & dns.flags.RD)
+        self.assertEqual(query.edns, 0)
+
+    def test_matches_dnspython(self):
+        self.assertEqual(
+            build_query("abigail.sh", query_id=7),
+            dns.message.make_query(
+                "pronouns.abigail.sh", "TXT", use_edns=0, payload=1232, id=7
+            ).to_wire(),
+        )
+
+    def test_invalid(self):
+        with self.assertRaises(PODNSInvalidDomain):
+            build_query("abigail..sh")
+        with self.assertRaises(ValueError):
+            build_query("abigail.sh", query_id=0x10000)
+
+
+class TestParseResponse(unittest.TestCase):
+    def test_answer(self):
+        answer = parse_response(
+            make_response("abigail.sh", records=["she/her"], ttl=60).to_wire()
+        )
+
+        self.assertEqual(answer.query_id, 42)
+        self.assertEqual(answer.domain, "abigail.sh")
+        self.assertEqual(answer.response, parse_pronoun_records(["she/her"]))
+        self.assertEqual(answer.ttl, 60)
+
+    def test_nxdomain(self):
+        answer = parse_response(
+            make_response("abigail.sh", rcode=dns.rcode.NXDOMAIN).to_wire()
+        )
+
+        self.assertIsNone(answer.response)
+        self.assertIsNone(answer.ttl)
+
+    def test_joins_character_strings(self):
+        response = make_response("abigail.sh")
+        response.answer.append(
+            dns.rrset.from_text(
+                response.question[0].name, 60, "IN", "TXT", '"she/" "her"'
+            )
+        )
+
+        self.assertEqual(
+            parse_response(response.to_wire()).response,
+            parse_pronoun_records(["she/her"]),
+        )
+
+    def test_follows_cname(self):
+        response = make_response("abigail.sh")
+        target = "pronouns.example."
+        response.answer.append(
+            dns.rrset.from_text(response.question[0].name, 60, "IN", "CNAME", target)
+        )
+        response.answer.append(
+            dns.rrset.from_text(target, 30, "IN", "TXT", '"they/them"')
+        )
+
+        answer = parse_response(response.to_wire())
+
+        self.assertEqual(answer.response, parse_pronoun_records(["they/them"]))
+        self.assertEqual(answer.ttl, 30)
+
+    def test_errors(self):
+        servfail = make_response("abigail.sh", rcode=dns.rcode.SERVFAIL)
+        truncated = make_response("abigail.sh")
+        truncated.flags |= dns.flags.TC
+        cases = {
+            "malformed": b"\x00\x01",
+            "query": build_query("abigail.sh"),
+            "servfail": servfail.to_wire(),
+            "truncated": truncated.to_wire(),
+            "no answer": make_response("abigail.sh").to_wire(),
+            "not pronouns": dns.message.make_response(
+                dns.message.make_query("abigail.sh", "TXT")
+            ).to_wire(),
+        }
+        for name, wire in cases.items():
+            with self.subTest(name):
+                with self.assertRaises(PODNSLookupError):
+                    parse_response(wire)
+
+    def test_pedantic(self):
+        wire = make_response("abigail.sh", records=["she/her;;"]).to_wire()
+
+        with self.assertRaises(PODNSParserError):
+            parse_response(wire, pedantic=True)
+        self.assertIsNotNone(parse_response(wire).response)
+
+
+class TestOwnSocket(unittest.TestCase):
+    def test_batch_over_udp(self):
+        domains = [*ZONES, "missing.example"]
+        with (
+            StubDNSServer(ZONES) as server,
+            socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock,
+        ):
+            sock.settimeout(5.0)
+            for query_id, domain in enumerate(domains):
+                sock.sendto(
+                    build_query(domain, query_id=query_id), (server.host, server.port)
+                )
+            answers = [parse_response(sock.recv(65_535)) for _ in range(len(domains))]
+
+        for answer in answers:
+            self.assertEqual(answer.domain, domains[answer.query_id])
+            if answer.domain in ZONES:
+                self.assertEqual(
+                    answer.response, parse_pronoun_records(ZONES[answer.domain])
+                )
+            else:
+                self.assertIsNone(answer.response)
+
+    def test_fetch_joins_long_records(self):
+        with StubDNSServer(ZONES) as server:
+            response = podns.dns.fetch_pronouns_from_domain_sync(
+                "long.example", resolver=server.resolver()
+            )
+
+        self.assertEqual(response, parse_pronoun_records([LONG_RECORD]))
+
+
+if __name__ == "__main__":
+    unittest.main()
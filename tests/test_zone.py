@@ -0,0 +1,208 @@
+import io
+import json
+import os
+import tempfile
+import textwrap
+import unittest
+from contextlib import redirect_stdout
+
+import podns.cli
+from podns.error import PODNSParserTooManyPronounSetValues, PODNSZoneError
+from podns.parser import parse_pronoun_records
+from podns.zone import (
+    lint_zone,
+    lint_zones,
+    read_zone_records,
+)
+
+
+ZONE: str = """\
+$ORIGIN example.org.
+$TTL 3600
+@               IN SOA ns1 hostmaster ( 1 7200 900 1209600 300 )
+                IN NS  ns1
+ns1             IN A   192.0.2.1
+pronouns        IN TXT "she/her;preferred"
+pronouns.alice  300 TXT "they/them" ; a comment
+                TXT ( "xe/"
+                      "xem" )
+www             CNAME @
+pronouns.bad    TXT "she/her/hers/herself/extra/more"
+pronouns.Bob    IN 60 TXT "!"
+not.pronouns    TXT "he/him"
+pronouns.bob    TXT "he/him"
+"""
+
+AXFR: str = """\
+
+; <<>> DiG 9.18.0 <<>> AXFR example.net @ns1.example.net
+;; global options: +cmd
+example.net.\t\t3600\tIN\tSOA\tns1.example.net. h.example.net. 1 7200 900 1209600 300
+pronouns.example.net.\t3600\tIN\tTXT\t"it/its" "/its/itself"
+example.net.\t\t3600\tIN\tNS\tns1.example.net.
+example.net.\t\t3600\tIN\tSOA\tns1.example.net. h.example.net. 1 7200 900 1209600 300
+;; Query time: 1 msec
+"""
+
+
+class ZoneTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, text):
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as f:
+            f.write(textwrap.dedent(text))
+        return path
+
+
+class TestReadZoneRecords(ZoneTestCase):
+    def test_zone_file(self):
+        records = list(read_zone_records(self.write("example.org.zone", ZONE)))
+
+        self.assertEqual(
+            [(r.domain, r.text, r.line) for r in records],
+            [
+                ("example.org", "she/her;preferred", 6),
+                ("alice.example.org", "they/them", 7),
+                ("alice.example.org", "xe/xem", 8),
+                ("bad.example.org", "she/her/hers/herself/extra/more", 11),
+                ("bob.example.org", "!", 12),
+                ("bob.example.org", "he/him", 14),
+            ],
+        )
+
+    def test_axfr_dump(self):
+        records = list(read_zone_records(self.write("example.net.axfr", AXFR)))
+
+        self.assertEqual(
+            [(r.domain, r.text) for r in records],
+            [("example.net", "it/its/its/itself")],
+        )
+
+    def test_origin(self):
+        path = self.write("zone", 'pronouns 60 IN TXT "she/her"\n')
+
+        with self.assertRaises(PODNSZoneError):
+            list(read_zone_records(path))
+        records = list(read_zone_records(path, origin="example.com"))
+        self.assertEqual(records[0].domain, "example.com")
+
+    def test_syntax_error(self):
+        path = self.write("zone", '$ORIGIN example.com.\npronouns TXT "she/her\n')
+
+        with self.assertRaisesRegex(PODNSZoneError, r"zone:\d+:"):
+            list(read_zone_records(path))
+
+
+BROKEN: str = """\
+$ORIGIN example.org.
+weird           FOOBAR 1 2 3
+pronouns.carol  TXT
+pronouns.dave   TXT "she/her"
+pronouns.erin   TXT ( "they/them"
+                      "" )
+pronouns.frank  TXT "he/him"
+"""
+
+
+class TestLintZone(ZoneTestCase):
+    def test_lint(self):
+        report = lint_zone(self.write("example.org.zone", ZONE))
+        results = {result.domain: result for result in report.results}
+
+        self.assertIsNone(report.error)
+        self.assertEqual(len(results), 4)
+        self.assertTrue(results["alice.example.org"].ok)
+        self.assertEqual(
+            results["alice.example.org"].response,
+            parse_pronoun_records(["they/them", "xe/xem"]),
+        )
+
+        bad = results["bad.example.org"]
+        self.assertFalse(bad.ok)
+        self.assertIsInstance(bad.records[0].error, PODNSParserTooManyPronounSetValues)
+        self.assertIsNone(bad.error)
+
+        # each record is valid, but nothing may follow a `!`.
+        bob = results["bob.example.org"]
+        self.assertFalse(bob.ok)
+        self.assertIsNotNone(bob.error)
+        self.assertTrue(all(r.error is None for r in bob.records))
+        self.assertTrue(bob.response.uses_name_only)
+
+        encoded = json.loads(json.dumps(bad.to_dict()))
+        self.assertEqual(encoded["records"][0]["line"], 11)
+        self.assertTrue(encoded["records"][0]["error"])
+
+    def test_bad_lines(self):
+        path = self.write("broken.zone", BROKEN)
+        report = lint_zone(path)
+
+        # an unknown record type is not a pronouns record, and does not stop
+        # the file. lines that cannot be read are reported, and the rest read.
+        self.assertIsNone(report.error)
+        self.assertFalse(report.ok)
+        self.assertEqual(
+            [(e.domain, e.line) for e in report.line_errors],
+            [("carol.example.org", 3)],
+        )
+        self.assertIsInstance(report.line_errors[0].error, PODNSZoneError)
+        self.assertFalse(report.line_errors[0].to_dict()["ok"])
+        self.assertEqual(
+            [result.domain for result in report.results],
+            ["dave.example.org", "erin.example.org", "frank.example.org"],
+        )
+
+        with self.assertRaisesRegex(PODNSZoneError, r"broken.zone:3:"):
+            list(read_zone_records(path))
+
+    def test_missing_file(self):
+        report = lint_zone(os.path.join(self.directory, "missing"))
+
+        self.assertEqual(report.results, ())
+        self.assertIsInstance(report.error, PODNSZoneError)
+
+
+class TestLintZones(ZoneTestCase):
+    def test_workers(self):
+        paths = [self.write(f"{i}.zone", ZONE) for i in range(6)]
+        paths.append(self.write("example.net.axfr", AXFR))
+
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                reports = list(lint_zones(iter(paths), workers=workers))
+
+                self.assertEqual(
+                    sorted(report.source for report in reports), sorted(paths)
+                )
+                self.assertEqual(sum(len(report.results) for report in reports), 25)
+
+    def test_cli(self):
+        paths = [self.write("example#org.zone", ZONE), self.write("axfr", AXFR)]
+        listing = self.write(
+            "zones.txt", "# zones to lint\n" + "\n".join(paths) + "  # dumps\n"
+        )
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            exit_code = podns.cli.main([listing, "--zones", "--workers", "1"])
+
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(exit_code, 1)
+        self.assertEqual(
+            {line["domain"]: line["ok"] for line in lines},
+            {
+                "example.org": True,
+                "alice.example.org": True,
+                "bad.example.org": False,
+                "bob.example.org": False,
+                "example.net": True,
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()